@@ -0,0 +1,340 @@
+# almacen_resultados.py
+# Uso:
+#   python almacen_resultados.py agregar  resultados/ img1.png img2.png ... [--thresh 128] [--invert]
+#   python almacen_resultados.py consultar resultados/ --cols imagen area xc yc [--csv salida.csv]
+#   python almacen_resultados.py compactar resultados/
+#
+#   Los scripts ej1a, ej1b, ej1c, ej5 y ej6 aceptan además  --store resultados/
+#   para agregar su fila al almacén en vez de solo imprimir.
+#
+# Qué hace:
+#   - Almacén columnar solo-agregar: cada bloque (chunk) es una carpeta con un
+#     .npy por columna. Una consulta abre con mmap SOLO las columnas pedidas.
+#   - Columnas: imagen, origen, umbral, invertido, área, centroide, m23/μ23/η23,
+#     Hu H1–H3, áreas R/G/B, modos R/G/B/Gris e histogramas completos (4x256).
+#   - Los valores que un script no calcula quedan como NaN / -1.
+#   - 'imagen' es de largo variable: bytes UTF-8 concatenados (imagen.npy) más
+#     offsets (imagen_offs.npy); las rutas largas no se truncan.
+#   - 'compactar' junta los bloques en uno. Además, al pasar de LIMITE_BLOQUES
+#     bloques se juntan solos los tramos consecutivos de bloques chicos (p.ej. 1
+#     fila por corrida de --store), sin cambiar el orden de las filas.
+#   - La compactación es atómica ante caídas: el bloque nuevo lista en
+#     'reemplaza.txt' los bloques que sustituye y se publica con un rename; desde
+#     ese momento los lectores ignoran los viejos, que se borran después. Un lector
+#     que listó los bloques justo antes de ese borrado no encuentra alguno al abrirlo:
+#     vuelve a listar (el bloque nuevo ya está publicado) y abre todo de nuevo.
+
+import numpy as np
+from pathlib import Path
+import argparse, csv, os, shutil, sys, time, uuid
+
+TEXTO = "texto"          # columna de largo variable (ver cabecera)
+LIMITE_BLOQUES = 16      # más bloques que esto -> compactación automática de los chicos
+REEMPLAZA = "reemplaza.txt"
+_VENCE_S = 600           # un lock o .tmp_ más viejo que esto quedó de una corrida caída
+_REINTENTOS = 5          # relecturas si una compactación borra un bloque mientras se abre
+
+# nombre -> (dtype, forma por fila, valor faltante)
+COLUMNAS = {
+    "imagen":    (TEXTO,  (),         ""),
+    "origen":    ("<U16",  (),        ""),
+    "umbral":    (np.int16, (),       -1),
+    "invertido": (np.int8, (),        -1),
+    "area":      (np.int64, (),       -1),
+    "xc":        (np.float64, (),     np.nan),
+    "yc":        (np.float64, (),     np.nan),
+    "m23":       (np.float64, (),     np.nan),
+    "mu23":      (np.float64, (),     np.nan),
+    "eta23":     (np.float64, (),     np.nan),
+    "hu":        (np.float64, (3,),   np.nan),
+    "area_rgb":  (np.int64, (3,),     -1),
+    "modos":     (np.int16, (4,),     -1),      # R, G, B, Gris
+    "hist":      (np.uint32, (4, 256), 0),      # R, G, B, Gris
+}
+
+def _guardar_columna(d: Path, k, a):
+    if COLUMNAS[k][0] == TEXTO:
+        datos = [str(v).encode("utf-8") for v in a]
+        offs = np.zeros(len(datos) + 1, dtype=np.int64)
+        offs[1:] = np.cumsum([len(b) for b in datos])
+        np.save(d / f"{k}.npy", np.frombuffer(b"".join(datos), dtype=np.uint8))
+        np.save(d / f"{k}_offs.npy", offs)
+    else:
+        np.save(d / f"{k}.npy", a)
+
+def _cargar_columna(d: Path, k):
+    """Columna de un bloque: memmap, o arreglo str si es de texto (bloques viejos: <U255)."""
+    if COLUMNAS[k][0] == TEXTO and (d / f"{k}_offs.npy").exists():
+        datos = bytes(np.load(d / f"{k}.npy", mmap_mode="r"))
+        offs = np.load(d / f"{k}_offs.npy").tolist()
+        return np.array([datos[a:b].decode("utf-8") for a, b in zip(offs[:-1], offs[1:])], dtype=str)
+    return np.load(d / f"{k}.npy", mmap_mode="r")
+
+class AlmacenResultados:
+    """
+    Almacén columnar en disco. Las filas se acumulan en memoria y se escriben
+    en bloques de 'tam_bloque'; cada bloque se publica con un rename atómico,
+    así varios procesos pueden agregar a la vez sin pisarse.
+    """
+    def __init__(self, ruta, tam_bloque=4096, auto_compactar=True):
+        self.ruta = Path(ruta)
+        self.ruta.mkdir(parents=True, exist_ok=True)
+        self.tam_bloque = int(tam_bloque)
+        self.auto_compactar = auto_compactar
+        self._filas = []
+
+    # ---- escritura ----
+    def agregar(self, **campos):
+        desconocidas = set(campos) - set(COLUMNAS)
+        if desconocidas:
+            raise ValueError(f"Columnas desconocidas: {sorted(desconocidas)}")
+        self._filas.append(campos)
+        if len(self._filas) >= self.tam_bloque:
+            self.flush()
+
+    def flush(self):
+        if not self._filas:
+            return None
+        cols = {}
+        n = len(self._filas)
+        for nombre, (dt, forma, falta) in COLUMNAS.items():
+            if dt == TEXTO:
+                cols[nombre] = [f.get(nombre) or falta for f in self._filas]
+                continue
+            a = np.full((n,) + forma, falta, dtype=dt)
+            for i, f in enumerate(self._filas):
+                if nombre in f and f[nombre] is not None:
+                    a[i] = f[nombre]
+            cols[nombre] = a
+        destino = self._escribir_bloque(cols)
+        self._filas = []
+        if self.auto_compactar and len(self.bloques()) > LIMITE_BLOQUES:
+            self.compactar(solo_chicos=True)
+        return destino
+
+    def _escribir_bloque(self, cols, nombre=None, reemplaza=()):
+        nombre = nombre or f"bloque_{time.time_ns():020d}_{uuid.uuid4().hex[:8]}"
+        tmp = self.ruta / f".tmp_{nombre}_{uuid.uuid4().hex[:8]}"
+        tmp.mkdir()
+        for k, a in cols.items():
+            _guardar_columna(tmp, k, a)
+        if reemplaza:
+            (tmp / REEMPLAZA).write_text("\n".join(d.name for d in reemplaza), encoding="utf-8")
+        destino = self.ruta / nombre
+        os.rename(tmp, destino)           # publicación atómica del bloque
+        return destino
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    # ---- lectura ----
+    def bloques(self):
+        """Bloques vigentes en orden (sin los ya sustituidos por una compactación)."""
+        # solo por nombre: un bloque borrado entre listar y abrir debe fallar en _abrir
+        # (que vuelve a listar), no desaparecer en silencio del resultado
+        todos = sorted(d for d in self.ruta.iterdir() if d.name.startswith("bloque_"))
+        sustituidos = set()
+        for d in todos:
+            try:
+                sustituidos.update((d / REEMPLAZA).read_text(encoding="utf-8").split())
+            except FileNotFoundError:
+                pass          # sin reemplazos (o ya limpiado por una compactación)
+        return [d for d in todos if d.name not in sustituidos]
+
+    def _abrir(self, nombres, bloques=None):
+        """
+        [dict columna -> memmap] por bloque. Sin 'bloques' se lista y, si una compactación
+        concurrente borra un bloque antes de abrirlo, se vuelve a listar y abrir todo.
+        Los memmap ya abiertos siguen siendo válidos aunque se borre el archivo.
+        """
+        for n in nombres:
+            if n not in COLUMNAS:
+                raise ValueError(f"Columna desconocida: {n}")
+        for intento in range(_REINTENTOS):
+            lista = self.bloques() if bloques is None else bloques
+            try:
+                return [{n: _cargar_columna(d, n) for n in nombres} for d in lista]
+            except FileNotFoundError:
+                if bloques is not None or intento == _REINTENTOS - 1:
+                    raise
+
+    def iter_bloques(self, *nombres):
+        """Genera dict columna -> np.memmap por bloque (sin copiar a memoria)."""
+        yield from self._abrir(nombres or tuple(COLUMNAS))
+
+    def columnas(self, *nombres, bloques=None):
+        """Concatena las columnas pedidas de todos los bloques (o de 'bloques')."""
+        nombres = nombres or tuple(COLUMNAS)
+        partes = {n: [] for n in nombres}
+        for cols in self._abrir(nombres, bloques):
+            for n in nombres:
+                partes[n].append(cols[n])
+        out = {}
+        for n in nombres:
+            dt, forma, _ = COLUMNAS[n]
+            vacio = np.empty((0,) + forma, dtype=str if dt == TEXTO else dt)
+            out[n] = np.concatenate(partes[n]) if partes[n] else vacio
+        return out
+
+    def _filas_de(self, d: Path) -> int:
+        return len(np.load(d / "umbral.npy", mmap_mode="r"))
+
+    def __len__(self):
+        return sum(len(c["umbral"]) for c in self._abrir(("umbral",)))
+
+    # ---- compactación ----
+    def _limpiar(self):
+        """Borra bloques ya sustituidos y .tmp_ abandonados (recuperación tras una caída)."""
+        for d in sorted(self.ruta.iterdir()):
+            r = d / REEMPLAZA
+            if d.name.startswith("bloque_") and r.exists():
+                for viejo in r.read_text(encoding="utf-8").split():
+                    shutil.rmtree(self.ruta / viejo, ignore_errors=True)
+                r.unlink()
+            elif d.name.startswith(".tmp_") and time.time() - d.stat().st_mtime > _VENCE_S:
+                shutil.rmtree(d, ignore_errors=True)
+
+    def _tramos_chicos(self, bloques):
+        """Tramos consecutivos de bloques con menos de tam_bloque filas."""
+        tramos, actual = [], []
+        for d in bloques:
+            if self._filas_de(d) < self.tam_bloque:
+                actual.append(d)
+            else:
+                tramos.append(actual)
+                actual = []
+        return tramos + [actual]
+
+    def compactar(self, solo_chicos=False):
+        """
+        Junta todos los bloques en uno (o, con solo_chicos, cada tramo consecutivo de
+        bloques chicos), sin cambiar el orden. Devuelve cuántos bloques se juntaron.
+        """
+        lock = self.ruta / ".compactando"
+        try:
+            lock.mkdir()
+        except FileExistsError:
+            if time.time() - lock.stat().st_mtime < _VENCE_S:
+                return 0                  # otro proceso está compactando
+        try:
+            self._limpiar()
+            viejos = self.bloques()
+            tramos = self._tramos_chicos(viejos) if solo_chicos else [viejos]
+            n = 0
+            for tramo in tramos:
+                if len(tramo) < 2:
+                    continue
+                # mismo prefijo que el primer bloque del tramo (+ generación): mismo orden de filas
+                base, _, gen = tramo[0].name.partition(".c")
+                self._escribir_bloque(self.columnas(bloques=tramo), nombre=f"{base}.c{int(gen or 0) + 1}",
+                                      reemplaza=tramo)
+                n += len(tramo)
+            self._limpiar()
+            return n if solo_chicos or len(viejos) > 1 else len(viejos)
+        finally:
+            shutil.rmtree(lock, ignore_errors=True)
+
+# -------- cálculo completo de una imagen ----------
+def resultados_de_imagen(path, thresh=128, invertir=False):
+    """Todas las columnas para una imagen, usando las funciones de ej1a/ej1b/ej1c/ej6."""
+    if not 0 <= thresh <= 255:
+        raise ValueError(f"Umbral fuera de 0..255: {thresh}")
+    from PIL import Image
+    from ej1a_area_centroide import binarizar, area_pixeles, centroide_por_momentos
+    from ej1b_momentos_23 import momentos_raw, momento_central, momento_central_normalizado
+    from ej1c_hu import hu_moments
+    from ej6_histograma_rgb_y_gris import hist256
+
+    img = Image.open(path)
+    rgb = np.asarray(img.convert("RGB"))
+    gris = np.asarray(img.convert("RGB").convert("L"))
+    B = binarizar(img, thresh=thresh, invertir=invertir)
+    fila = {"imagen": str(path), "origen": "almacen", "umbral": thresh, "invertido": int(invertir),
+            "area": area_pixeles(B)}
+    c = centroide_por_momentos(B)
+    if c is not None:
+        xc, yc = c
+        mu23 = momento_central(B, 2, 3, xc, yc)
+        fila.update(xc=xc, yc=yc, m23=momentos_raw(B, 2, 3), mu23=mu23,
+                    eta23=momento_central_normalizado(mu23, fila["area"], 2, 3),
+                    hu=hu_moments(B))
+    hists = np.stack([hist256(rgb[..., 0]), hist256(rgb[..., 1]), hist256(rgb[..., 2]), hist256(gris)])
+    fila.update(hist=hists, modos=hists.argmax(axis=1), area_rgb=hists[:3, thresh:].sum(axis=1))
+    return fila
+
+def agregar_a_almacen(ruta, **campos):
+    """Atajo para los scripts ej*: agrega una fila y la escribe de inmediato."""
+    with AlmacenResultados(ruta) as alm:
+        alm.agregar(**campos)
+
+# -------- principal ----------
+def main():
+    ap = argparse.ArgumentParser(description="Almacén columnar de resultados (descriptores e histogramas).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    a = sub.add_parser("agregar", help="Calcula y agrega filas para varias imágenes")
+    a.add_argument("almacen")
+    a.add_argument("imagenes", nargs="+")
+    a.add_argument("--thresh", type=int, default=128, help="Umbral 0..255 (def:128)")
+    a.add_argument("--invert", action="store_true", help="Invierte la máscara (1=figura)")
+
+    q = sub.add_parser("consultar", help="Lee columnas (mmap) y las imprime o exporta a CSV")
+    q.add_argument("almacen")
+    q.add_argument("--cols", nargs="+", default=["imagen", "origen", "area", "xc", "yc"],
+                   help=f"Columnas: {' '.join(COLUMNAS)}")
+    q.add_argument("--csv", help="Exporta a CSV (columnas vectoriales se expanden)")
+
+    c = sub.add_parser("compactar", help="Junta los bloques en uno")
+    c.add_argument("almacen")
+    args = ap.parse_args()
+
+    if args.cmd == "agregar":
+        if not 0 <= args.thresh <= 255:
+            a.error(f"--thresh fuera de 0..255: {args.thresh}")
+        n = 0
+        with AlmacenResultados(args.almacen) as alm:
+            for im in args.imagenes:
+                if not Path(im).exists():
+                    print(f"Archivo no encontrado: {im}")
+                    continue
+                alm.agregar(**resultados_de_imagen(im, thresh=args.thresh, invertir=args.invert))
+                n += 1
+        print(f"Filas agregadas: {n}  |  Total en almacén: {len(alm)}")
+
+    elif args.cmd == "consultar":
+        alm = AlmacenResultados(args.almacen)
+        try:
+            cols = alm.columnas(*args.cols)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        n = len(next(iter(cols.values())))
+        planas = {}
+        for k, v in cols.items():
+            if v.ndim == 1:
+                planas[k] = v
+            else:
+                v2 = v.reshape(n, -1)
+                for j in range(v2.shape[1]):
+                    planas[f"{k}_{j}"] = v2[:, j]
+        if args.csv:
+            with open(args.csv, "w", newline="", encoding="utf-8") as fh:
+                wr = csv.writer(fh)
+                wr.writerow(planas)
+                wr.writerows(zip(*(v.tolist() for v in planas.values())))
+            print(f"Filas: {n}  |  CSV: {args.csv}")
+        else:
+            print("\t".join(planas))
+            for i in range(n):
+                print("\t".join(str(v[i]) for v in planas.values()))
+
+    elif args.cmd == "compactar":
+        alm = AlmacenResultados(args.almacen)
+        n = alm.compactar()
+        print(f"Bloques compactados: {n}  |  Filas: {len(alm)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# arreglos_crudos.py
+# Planos, grises y máscaras como arreglos crudos para pasar imágenes entre
+# procesos sin codificar/decodificar PNG.
+#
+# Qué hace:
+#   - Escribe .npy (cabecera + datos crudos) con np.lib.format.open_memmap; el
+#     lector los abre con np.load(mmap_mode="r"): sin copia, solo páginas tocadas.
+#   - O publica el mismo formato .npy dentro de un segmento de memoria compartida
+#     (multiprocessing.shared_memory); se referencia como "shm://<nombre>".
+#     El segmento vive hasta liberarlo (liberar_shm o el subcomando "liberar").
+#   - Convenciones: planos y gris = HxW uint8, RGB = HxWx3 uint8,
+#     máscaras binarias = HxW bool (así ej1 no las vuelve a umbralizar).
+#
+# Uso:
+#   python ej3_planos_y_gris.py foto.jpg --formato npy      -> foto_R.npy, ..., foto_GRAY.npy
+#   python ej1c_hu.py foto_GRAY.npy --thresh 100
+#   python ej1a_area_centroide.py fig.png --save-npy         -> fig_bin.npy (bool)
+#   python ej1b_momentos_23.py fig_bin.npy
+#   python arreglos_crudos.py info foto_GRAY.npy | shm://foto_GRAY
+#   python arreglos_crudos.py liberar shm://foto_GRAY
+
+import argparse, io, sys
+from pathlib import Path
+import numpy as np
+
+PREFIJO_SHM = "shm://"
+EXTENSIONES = (".npy",)
+
+_SEGMENTOS = {}     # segmentos abiertos por este proceso (los arreglos apuntan a su buffer)
+
+def es_crudo(ruta) -> bool:
+    """True si la ruta es un .npy o una referencia shm://nombre."""
+    s = str(ruta)
+    return s.startswith(PREFIJO_SHM) or Path(s).suffix.lower() in EXTENSIONES
+
+def existe(ruta) -> bool:
+    s = str(ruta)
+    if s.startswith(PREFIJO_SHM):
+        try:
+            _abrir_shm(s[len(PREFIJO_SHM):])
+            return True
+        except FileNotFoundError:
+            return False
+    return Path(s).exists()
+
+def ruta_base(ruta) -> Path:
+    """Ruta para nombrar salidas: la misma si es archivo; ./<nombre> si es shm://nombre."""
+    s = str(ruta)
+    if s.startswith(PREFIJO_SHM):
+        return Path.cwd() / s[len(PREFIJO_SHM):]
+    return Path(s)
+
+# -------- memoria compartida ----------
+def _abrir_shm(nombre, crear=False, tam=0):
+    from multiprocessing import shared_memory
+    if nombre in _SEGMENTOS and not crear:
+        return _SEGMENTOS[nombre]
+    try:
+        shm = shared_memory.SharedMemory(name=nombre, create=crear, size=tam, track=False)
+    except TypeError:   # Python < 3.13: sin 'track'; el rastreador borraría el segmento al salir
+        shm = shared_memory.SharedMemory(name=nombre, create=crear, size=tam)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    _SEGMENTOS[nombre] = shm
+    return shm
+
+def _cabecera_npy(arr: np.ndarray) -> bytes:
+    f = io.BytesIO()
+    np.lib.format.write_array_header_1_0(f, np.lib.format.header_data_from_array_1_0(arr))
+    return f.getvalue()
+
+def publicar_shm(nombre: str, arr: np.ndarray) -> str:
+    """Copia 'arr' (con cabecera .npy) a un segmento nuevo; devuelve 'shm://nombre'."""
+    arr = np.ascontiguousarray(arr)
+    cab = _cabecera_npy(arr)
+    try:
+        liberar_shm(nombre)                  # reemplaza una publicación anterior
+    except FileNotFoundError:
+        pass
+    shm = _abrir_shm(nombre, crear=True, tam=len(cab) + arr.nbytes)
+    shm.buf[:len(cab)] = cab
+    np.ndarray(arr.shape, arr.dtype, buffer=shm.buf, offset=len(cab))[...] = arr
+    return PREFIJO_SHM + nombre
+
+def _leer_shm(nombre: str) -> np.ndarray:
+    shm = _abrir_shm(nombre)
+    f = io.BytesIO(bytes(shm.buf[:4096]))
+    version = np.lib.format.read_magic(f)
+    if version != (1, 0):
+        raise ValueError(f"Segmento {nombre}: versión .npy {version} no soportada.")
+    forma, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+    a = np.ndarray(forma, dtype, buffer=shm.buf, offset=f.tell(), order="F" if fortran else "C")
+    a.flags.writeable = False
+    return a
+
+def liberar_shm(nombre: str):
+    """Elimina el segmento (los procesos que lo tengan abierto conservan su mapeo)."""
+    nombre = nombre[len(PREFIJO_SHM):] if nombre.startswith(PREFIJO_SHM) else nombre
+    shm = _SEGMENTOS.pop(nombre, None) or _abrir_shm(nombre)
+    _SEGMENTOS.pop(nombre, None)
+    if not hasattr(shm, "_track"):
+        # Python < 3.13: unlink() se desregistra del rastreador; se registra antes para que no falle
+        from multiprocessing import resource_tracker
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+# -------- lectura / escritura ----------
+def guardar_npy(path, arr: np.ndarray) -> Path:
+    """Escribe 'arr' como .npy (cabecera + datos crudos) vía memmap."""
+    path = Path(path)
+    mm = np.lib.format.open_memmap(path, mode="w+", dtype=arr.dtype, shape=arr.shape)
+    mm[...] = arr
+    mm.flush()
+    del mm
+    return path
+
+def guardar_crudo(base: Path, sufijo: str, arr: np.ndarray, formato: str) -> str:
+    """Guarda <stem><sufijo>.npy o publica shm://<stem><sufijo>; devuelve la ruta/referencia."""
+    if formato == "npy":
+        return str(guardar_npy(base.with_name(base.stem + sufijo + ".npy"), arr))
+    if formato == "shm":
+        return publicar_shm(base.stem + sufijo, arr)
+    raise ValueError(f"Formato crudo desconocido: {formato}")
+
+def cargar(ruta) -> np.ndarray:
+    """Arreglo de solo lectura desde .npy (mmap) o shm://nombre (sin copia)."""
+    s = str(ruta)
+    if s.startswith(PREFIJO_SHM):
+        return _leer_shm(s[len(PREFIJO_SHM):])
+    return np.load(s, mmap_mode="r")
+
+def cargar_rgb(ruta) -> np.ndarray:
+    """HxWx3 uint8 desde imagen, .npy o shm (un gris HxW se replica como convert("RGB"))."""
+    if not es_crudo(ruta):
+        from PIL import Image
+        return np.asarray(Image.open(ruta).convert("RGB"))
+    a = cargar(ruta)
+    if a.dtype == bool:
+        a = a.view(np.uint8) * np.uint8(255)
+    if a.dtype != np.uint8:
+        raise ValueError(f"{ruta}: se esperaba uint8, hay {a.dtype}.")
+    if a.ndim == 2:
+        return np.repeat(a[..., None], 3, axis=2)
+    if a.ndim == 3 and a.shape[2] >= 3:
+        return a[..., :3]
+    raise ValueError(f"{ruta}: forma {a.shape} no es HxW ni HxWx3.")
+
+def cargar_binaria(ruta, thresh=128, invertir=False) -> np.ndarray:
+    """
+    Máscara 0/1 uint8 desde .npy o shm: si es bool se usa tal cual (se ignoran
+    thresh/invertir, como con .rle); si es gris/RGB uint8 se umbraliza como binarizar().
+    """
+    a = cargar(ruta)
+    if a.dtype == bool:
+        return a.view(np.uint8)
+    if a.ndim == 3:
+        from kernels_color import gris, buffer_hilo
+        a = gris(np.ascontiguousarray(a[..., :3]), out=buffer_hilo(a.shape[:2]))
+    B = (a >= thresh).astype(np.uint8)
+    return 1 - B if invertir else B
+
+# -------- principal ----------
+def main():
+    ap = argparse.ArgumentParser(description="Arreglos crudos (.npy / memoria compartida): inspeccionar y liberar.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_info = sub.add_parser("info", help="Forma, tipo y rango de un .npy o shm://nombre")
+    p_info.add_argument("ruta")
+    p_lib = sub.add_parser("liberar", help="Elimina segmentos shm://nombre")
+    p_lib.add_argument("nombres", nargs="+")
+    p_pub = sub.add_parser("publicar", help="Copia un .npy o imagen a memoria compartida")
+    p_pub.add_argument("ruta")
+    p_pub.add_argument("--nombre", help="Nombre del segmento (def: stem del archivo)")
+    args = ap.parse_args()
+
+    try:
+        if args.cmd == "info":
+            a = cargar(args.ruta)
+            rango = (a.min(), a.max()) if a.size else ("-", "-")
+            print(f"{args.ruta}: forma={a.shape} dtype={a.dtype} bytes={a.nbytes} "
+                  f"min={rango[0]} max={rango[1]}")
+        elif args.cmd == "liberar":
+            for n in args.nombres:
+                liberar_shm(n)
+                print(f"Liberado: {n}")
+        else:
+            a = cargar(args.ruta) if es_crudo(args.ruta) else cargar_rgb(args.ruta)
+            ref = publicar_shm(args.nombre or ruta_base(args.ruta).stem, a)
+            print(f"Publicado: {ref}  ({a.shape}, {a.dtype})")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# cobertura_canales.py
+# Uso:
+#   python cobertura_canales.py ruta/imagen.png [--tile 32] [--umbrales 64 128 192]
+#                               [--regiones etiquetas.png] [--heatmap-umbral 128] [--show]
+#
+# Qué hace:
+#   - Extiende el área por canal de ej5 (px >= umbral) a una grilla de tiles y,
+#     opcionalmente, a regiones etiquetadas (imagen de etiquetas 0..N).
+#   - En lugar de comparar el cuadro completo una vez por (canal, umbral), arma en
+#     UNA pasada los histogramas de 256 bins por (tile, canal) con np.bincount y
+#     obtiene los conteos para todos los umbrales con una suma acumulada inversa.
+#   - Guarda:
+#       1) conteos por tile:   *_cobertura_tiles.csv
+#       2) conteos por región: *_cobertura_regiones.csv  (si se pasa --regiones)
+#       3) mapas de calor R/G/B para un umbral: *_cobertura_heatmap.png
+
+from PIL import Image
+import numpy as np
+from pathlib import Path
+import argparse, csv, sys
+
+CANALES = ("R", "G", "B")
+
+def pedir_archivo_si_falta():
+    try:
+        import tkinter as tk
+        from tkinter import filedialog
+        root = tk.Tk(); root.withdraw()
+        path = filedialog.askopenfilename(
+            title="Selecciona la imagen (para cobertura por tiles RGB)",
+            filetypes=[("Imágenes", "*.png;*.jpg;*.jpeg;*.bmp;*.tif;*.tiff"), ("Todos", "*.*")]
+        )
+        return path or None
+    except Exception:
+        return None
+
+# -------- núcleo vectorizado ----------
+def _normalizar_umbrales(umbrales) -> np.ndarray:
+    u = np.asarray(umbrales, dtype=np.int64).ravel()
+    if u.size == 0 or u.min() < 0 or u.max() > 255:
+        raise ValueError("Los umbrales deben estar en 0..255.")
+    return u
+
+def histogramas_por_grupo(rgb: np.ndarray, grupo: np.ndarray, n_grupos: int) -> np.ndarray:
+    """
+    Histogramas de 256 bins por (grupo, canal) en una sola llamada a bincount.
+    rgb: HxWxC uint8 ; grupo: HxW con índices 0..n_grupos-1.
+    Devuelve (n_grupos, C, 256) int64.
+    """
+    if rgb.ndim == 2:
+        rgb = rgb[..., None]
+    C = rgb.shape[2]
+    g = grupo.astype(np.int64, copy=False)[..., None]        # HxWx1
+    c = np.arange(C, dtype=np.int64)                          # C
+    idx = (g * C + c) * 256 + rgb                             # HxWxC
+    h = np.bincount(idx.ravel(), minlength=n_grupos * C * 256)
+    return h.reshape(n_grupos, C, 256)
+
+def conteos_desde_histogramas(h: np.ndarray, umbrales) -> np.ndarray:
+    """
+    Conteo de píxeles >= t para cada umbral t, a partir de histogramas (..., 256).
+    Usa la acumulada inversa: cum[t] = sum_{v>=t} h[v]. Devuelve (..., T).
+    """
+    u = _normalizar_umbrales(umbrales)
+    cum = np.zeros(h.shape[:-1] + (257,), dtype=np.int64)
+    cum[..., :256] = np.cumsum(h[..., ::-1], axis=-1)[..., ::-1]
+    return cum[..., u]
+
+def indice_de_tiles(shape_hw, tile: int):
+    """Índice de tile por píxel (HxW) y tamaño de la grilla (ty, tx). Bordes parciales incluidos."""
+    if tile <= 0:
+        raise ValueError("El tamaño de tile debe ser > 0.")
+    h, w = shape_hw
+    ty, tx = -(-h // tile), -(-w // tile)
+    fila = (np.arange(h) // tile) * tx
+    col = np.arange(w) // tile
+    return fila[:, None] + col[None, :], (ty, tx)
+
+def cobertura_por_tiles(rgb: np.ndarray, tile: int = 32, umbrales=(128,)):
+    """
+    Tensor de conteos (ty, tx, C, T): píxeles >= umbral por tile, canal y umbral.
+    También devuelve el número de píxeles de cada tile (ty, tx), útil en los bordes.
+    """
+    idx, (ty, tx) = indice_de_tiles(rgb.shape[:2], tile)
+    h = histogramas_por_grupo(rgb, idx, ty * tx)
+    conteos = conteos_desde_histogramas(h, umbrales)
+    totales = h[:, 0, :].sum(axis=-1)
+    return conteos.reshape(ty, tx, *conteos.shape[1:]), totales.reshape(ty, tx)
+
+def cobertura_por_regiones(rgb: np.ndarray, etiquetas: np.ndarray, umbrales=(128,)):
+    """
+    Conteos (L, C, T) por región etiquetada (etiquetas HxW enteras >= 0; L = max+1)
+    y número de píxeles de cada región (L,).
+    """
+    if etiquetas.shape != rgb.shape[:2]:
+        raise ValueError("La imagen de etiquetas debe tener el mismo tamaño que la imagen.")
+    if etiquetas.min() < 0:
+        raise ValueError("Las etiquetas deben ser >= 0.")
+    n = int(etiquetas.max()) + 1
+    h = histogramas_por_grupo(rgb, etiquetas, n)
+    return conteos_desde_histogramas(h, umbrales), h[:, 0, :].sum(axis=-1)
+
+# -------- salidas ----------
+def guardar_csv_tiles(path, conteos, totales, umbrales, tile):
+    ty, tx, C, _ = conteos.shape
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        wr = csv.writer(fh)
+        wr.writerow(["tile_y", "tile_x", "y0", "x0", "px_tile", "canal", "umbral", "area_px", "fraccion"])
+        for i in range(ty):
+            for j in range(tx):
+                n = int(totales[i, j])
+                for c in range(C):
+                    for k, t in enumerate(umbrales):
+                        a = int(conteos[i, j, c, k])
+                        wr.writerow([i, j, i * tile, j * tile, n, CANALES[c], int(t), a, f"{a / n:.6f}"])
+
+def guardar_csv_regiones(path, conteos, totales, umbrales):
+    L, C, _ = conteos.shape
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        wr = csv.writer(fh)
+        wr.writerow(["region", "px_region", "canal", "umbral", "area_px", "fraccion"])
+        for r in range(L):
+            n = int(totales[r])
+            if n == 0:
+                continue
+            for c in range(C):
+                for k, t in enumerate(umbrales):
+                    a = int(conteos[r, c, k])
+                    wr.writerow([r, n, CANALES[c], int(t), a, f"{a / n:.6f}"])
+
+def guardar_heatmap(path, conteos, totales, umbrales, umbral_mapa, titulo="", show=False):
+    import matplotlib.pyplot as plt
+    k = int(np.searchsorted(umbrales, umbral_mapa))
+    if k >= len(umbrales) or umbrales[k] != umbral_mapa:
+        raise ValueError(f"El umbral del mapa ({umbral_mapa}) no está entre los umbrales calculados.")
+    frac = conteos[..., k] / totales[..., None]
+    fig, axs = plt.subplots(1, 3, figsize=(10, 3.2))
+    for c, (ax, cmap) in enumerate(zip(axs, ("Reds", "Greens", "Blues"))):
+        im = ax.imshow(frac[..., c], cmap=cmap, vmin=0.0, vmax=1.0, interpolation="nearest")
+        ax.set_title(f"{CANALES[c]} >= {umbral_mapa}")
+        ax.axis("off")
+        fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
+    fig.suptitle(titulo, fontsize=9)
+    plt.tight_layout()
+    fig.savefig(path, dpi=150)
+    if show:
+        plt.show()
+    plt.close(fig)
+
+# -------- principal ----------
+def main():
+    ap = argparse.ArgumentParser(description="Cobertura por canal RGB por tiles y regiones (varios umbrales).")
+    ap.add_argument("imagen", nargs="?", help="Ruta de la imagen")
+    ap.add_argument("--tile", type=int, default=32, help="Lado del tile en px (def:32)")
+    ap.add_argument("--umbrales", nargs="+", type=int, default=[128],
+                    help="Umbrales 0..255 (p.ej. 64 128 192)")
+    ap.add_argument("--regiones", help="Imagen de etiquetas (L/I) del mismo tamaño; 0..N por región")
+    ap.add_argument("--heatmap-umbral", type=int, default=None,
+                    help="Umbral para los mapas de calor (def: el primero)")
+    ap.add_argument("--show", action="store_true", help="Muestra los mapas de calor")
+    args = ap.parse_args()
+    if any(not 0 <= u <= 255 for u in args.umbrales):
+        ap.error("--umbrales deben estar en 0..255.")
+    if args.heatmap_umbral is not None and args.heatmap_umbral not in args.umbrales:
+        ap.error(f"--heatmap-umbral {args.heatmap_umbral} no está entre --umbrales "
+                 f"({' '.join(map(str, args.umbrales))}).")
+
+    in_path = args.imagen or pedir_archivo_si_falta()
+    if not in_path:
+        print("Uso: python cobertura_canales.py <ruta> [--tile 32] [--umbrales 64 128 192] [--show]")
+        sys.exit(1)
+    p = Path(in_path)
+    if not p.exists():
+        print(f"Archivo no encontrado: {p}")
+        sys.exit(1)
+
+    umbrales = np.unique(np.asarray(args.umbrales, dtype=np.int64))
+    rgb = np.asarray(Image.open(p).convert("RGB"))
+    h, w = rgb.shape[:2]
+
+    try:
+        conteos, totales = cobertura_por_tiles(rgb, tile=args.tile, umbrales=umbrales)
+        out_tiles = p.with_name(p.stem + "_cobertura_tiles.csv")
+        guardar_csv_tiles(out_tiles, conteos, totales, umbrales, args.tile)
+
+        umbral_mapa = args.heatmap_umbral if args.heatmap_umbral is not None else int(umbrales[0])
+        out_heat = p.with_name(p.stem + "_cobertura_heatmap.png")
+        guardar_heatmap(out_heat, conteos, totales, umbrales, umbral_mapa,
+                        titulo=f"{p.name} | tile={args.tile}px", show=args.show)
+
+        out_reg = None
+        if args.regiones:
+            etiquetas = np.asarray(Image.open(args.regiones))
+            if etiquetas.ndim == 3:
+                etiquetas = etiquetas[..., 0]
+            conteos_r, totales_r = cobertura_por_regiones(rgb, etiquetas, umbrales=umbrales)
+            out_reg = p.with_name(p.stem + "_cobertura_regiones.csv")
+            guardar_csv_regiones(out_reg, conteos_r, totales_r, umbrales)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    # Global (equivale a ej5) sumando los tiles
+    glob = conteos.sum(axis=(0, 1))
+    print(f"Imagen: {p.name}  |  Dimensión: {w}x{h}  |  Tile: {args.tile}px  |  Grilla: {conteos.shape[1]}x{conteos.shape[0]}")
+    for k, t in enumerate(umbrales):
+        print(f"Umbral {int(t):3d}: " + "  ".join(
+            f"{CANALES[c]}={int(glob[c, k])} ({glob[c, k] / (w * h):.2%})" for c in range(3)))
+    print("Guardados:")
+    print(f"  CSV tiles:    {out_tiles}")
+    if out_reg:
+        print(f"  CSV regiones: {out_reg}")
+    print(f"  Mapa calor:   {out_heat}")
+    print("Todo OK ✔️")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# difuminado.py
+# Motor de "feather" (borde suave) para las máscaras alfa de ej4.
+#
+# Qué hace:
+#   - Tres métodos sobre un alfa HxW uint8:
+#       * "gauss":     gaussiana separable exacta (sigma = radio, como PIL GaussianBlur).
+#       * "caja":      3 pasadas de caja (box blur) que aproximan la gaussiana; cada
+#                      pasada usa sumas acumuladas => costo O(1) por píxel sin importar el radio.
+#       * "distancia": caída lineal desde el borde de la máscara según la distancia
+#                      al borde (transformada de distancia; scipy si está, si no chamfer).
+#   - Solo se procesa una BANDA alrededor del borde: los tiles donde el alfa es
+#     constante en todo el vecindario del kernel (interior = 255, exterior = 0)
+#     se copian tal cual.
+#
+# Uso:
+#   from difuminado import difuminar
+#   a = difuminar(np.asarray(alpha_L), radio=8, metodo="caja")
+
+import numpy as np
+
+METODOS = ("gauss", "caja", "distancia")
+TILE = 128
+
+# -------- kernels 1-D ----------
+def _pad_eje(a, r, eje):
+    pads = [(0, 0)] * a.ndim
+    pads[eje] = (r, r)
+    return np.pad(a, pads, mode="edge")
+
+def _gauss_1d(a, sigma, eje):
+    R = max(1, int(np.ceil(3.0 * sigma)))
+    x = np.arange(-R, R + 1, dtype=np.float64)
+    k = np.exp(-0.5 * (x / sigma) ** 2)
+    k /= k.sum()
+    p = _pad_eje(a, R, eje)
+    n = a.shape[eje]
+    out = np.zeros_like(a, dtype=np.float64)
+    for i, w in enumerate(k):
+        sl = [slice(None)] * a.ndim
+        sl[eje] = slice(i, i + n)
+        out += w * p[tuple(sl)]
+    return out
+
+def _caja_1d(a, r, eje):
+    """Media móvil de ancho 2r+1 con suma acumulada (bordes replicados)."""
+    if r <= 0:
+        return a
+    p = _pad_eje(a, r + 1, eje)
+    c = np.cumsum(p, axis=eje, dtype=np.float64)
+    n = a.shape[eje]
+    hi = [slice(None)] * a.ndim
+    lo = [slice(None)] * a.ndim
+    hi[eje] = slice(2 * r + 1, 2 * r + 1 + n)
+    lo[eje] = slice(0, n)
+    return (c[tuple(hi)] - c[tuple(lo)]) / (2 * r + 1)
+
+def radios_caja(sigma, n=3):
+    """Radios de n cajas cuya convolución aproxima una gaussiana de desviación sigma."""
+    w_ideal = np.sqrt(12.0 * sigma * sigma / n + 1.0)
+    wl = int(np.floor(w_ideal))
+    if wl % 2 == 0:
+        wl -= 1
+    wu = wl + 2
+    m = round((12.0 * sigma * sigma - n * wl * wl - 4 * n * wl - 3 * n) / (-4 * wl - 4))
+    return [((wl if i < m else wu) - 1) // 2 for i in range(n)]
+
+# -------- distancia ----------
+def _distancia_al_fondo(m, tope):
+    """Distancia euclídea de cada píxel True al False más cercano (acotada a 'tope')."""
+    try:
+        from scipy.ndimage import distance_transform_edt
+        return np.minimum(distance_transform_edt(m), tope)
+    except ImportError:
+        pass
+    # chamfer 3x3 (1, √2) iterado 'tope' veces: suficiente porque más allá se satura
+    d = np.where(m, float(tope), 0.0)
+    diag = np.sqrt(2.0)
+    for _ in range(int(np.ceil(tope))):
+        p = np.pad(d, 1, mode="edge")
+        nuevo = np.minimum.reduce([
+            d,
+            p[:-2, 1:-1] + 1, p[2:, 1:-1] + 1, p[1:-1, :-2] + 1, p[1:-1, 2:] + 1,
+            p[:-2, :-2] + diag, p[:-2, 2:] + diag, p[2:, :-2] + diag, p[2:, 2:] + diag,
+        ])
+        if np.array_equal(nuevo, d):
+            break
+        d = nuevo
+    return d
+
+def _feather_distancia(a, radio):
+    m = a >= 128
+    tope = radio + 1.0
+    s = _distancia_al_fondo(m, tope) - _distancia_al_fondo(~m, tope)
+    return np.clip(0.5 + s / (2.0 * radio), 0.0, 1.0) * 255.0
+
+# -------- núcleo sobre un recorte ----------
+def _halo(radio, metodo):
+    if metodo == "gauss":
+        return max(1, int(np.ceil(3.0 * radio)))
+    if metodo == "caja":
+        return sum(radios_caja(radio)) + 1
+    return int(np.ceil(radio)) + 2
+
+def _difuminar_bloque(a, radio, metodo):
+    f = a.astype(np.float64)
+    if metodo == "gauss":
+        f = _gauss_1d(_gauss_1d(f, radio, 0), radio, 1)
+    elif metodo == "caja":
+        for r in radios_caja(radio):
+            f = _caja_1d(_caja_1d(f, r, 0), r, 1)
+    else:
+        f = _feather_distancia(a, radio)
+    return f
+
+# -------- API ----------
+def difuminar(alpha: np.ndarray, radio: float, metodo: str = "caja", banda: bool = True,
+              tile: int = TILE) -> np.ndarray:
+    """
+    Devuelve el alfa HxW uint8 difuminado. Con banda=True solo se recalculan los
+    tiles que tocan el borde (los demás son 0 o 255 en todo el vecindario).
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método de difuminado desconocido: {metodo} (usa {', '.join(METODOS)})")
+    a = np.asarray(alpha, dtype=np.uint8)
+    if radio <= 0 or a.size == 0:
+        return a.copy()
+    g = _halo(radio, metodo)
+    if not banda:
+        return np.clip(np.round(_difuminar_bloque(a, radio, metodo)), 0, 255).astype(np.uint8)
+
+    h, w = a.shape
+    tile = max(int(tile), 4 * g)      # el halo no debe dominar el costo de cada tile
+    ty, tx = -(-h // tile), -(-w // tile)
+    # mínimo y máximo por tile (con la región rellenada a múltiplo de tile)
+    ph, pw = ty * tile - h, tx * tile - w
+    ap = np.pad(a, ((0, ph), (0, pw)), mode="edge").reshape(ty, tile, tx, tile)
+    tmin, tmax = ap.min(axis=(1, 3)), ap.max(axis=(1, 3))
+    # un tile necesita cálculo si él o algún vecino dentro del halo no es constante,
+    # o si los constantes vecinos difieren entre sí
+    k = -(-g // tile)
+    pmin = np.pad(tmin, k, mode="edge")
+    pmax = np.pad(tmax, k, mode="edge")
+    vmin = np.full_like(tmin, 255)
+    vmax = np.zeros_like(tmax)
+    for dy in range(2 * k + 1):
+        for dx in range(2 * k + 1):
+            vmin = np.minimum(vmin, pmin[dy:dy + ty, dx:dx + tx])
+            vmax = np.maximum(vmax, pmax[dy:dy + ty, dx:dx + tx])
+    activo = vmin != vmax
+
+    out = a.copy()
+    if metodo == "distancia":
+        # lejos del borde la rampa satura: el resultado es la máscara binarizada
+        out[:] = np.where(a >= 128, 255, 0)
+    # tiles activos consecutivos de una fila de tiles se procesan como un solo recorte
+    for i in range(ty):
+        fila = np.concatenate(([False], activo[i], [False]))
+        cambios = np.flatnonzero(fila[1:] != fila[:-1])
+        y0, y1 = i * tile, min(h, (i + 1) * tile)
+        Y0, Y1 = max(0, y0 - g), min(h, y1 + g)
+        for j0, j1 in zip(cambios[::2], cambios[1::2]):
+            x0, x1 = j0 * tile, min(w, j1 * tile)
+            X0, X1 = max(0, x0 - g), min(w, x1 + g)
+            f = _difuminar_bloque(a[Y0:Y1, X0:X1], radio, metodo)
+            out[y0:y1, x0:x1] = np.clip(np.round(f[y0 - Y0:y1 - Y0, x0 - X0:x1 - X0]), 0, 255)
+    return out
@@ -1,12 +1,20 @@
 # ej1a_area_centroide.py
 # Uso:
-#   python ej1a_area_centroide.py [ruta/figura1a.png] [--thresh 128] [--invert] [--save-bin]
+#   python ej1a_area_centroide.py [ruta/figura1a.png] [--thresh 128] [--invert] [--save-bin] [--save-rle]
+#                                 [--save-npy] [--backend auto|area|contorno] [--store resultados/]
+#                                 [--muestreo N] [--confianza 0.95]
+#
+# Con --muestreo N el área y el centroide se estiman con N píxeles muestreados por
+# tiles (muestreo.py) e intervalos de confianza; si la figura casi no aparece en la
+# muestra se calcula exacto. Con --store se calcula exacto siempre.
+#
+# La figura también puede ser un arreglo crudo (.npy o shm://nombre, ver arreglos_crudos.py):
+# una máscara bool se usa tal cual; un gris/RGB uint8 se umbraliza.
 #
 # Si no se entrega la ruta, se abre un cuadro para elegir la imagen.
 
 from PIL import Image, ImageDraw
 import numpy as np
-from pathlib import Path
 import argparse
 import sys
 
@@ -36,8 +44,22 @@ def binarizar(img: Image.Image, thresh: int = 128, invertir: bool = False) -> np
         B = 1 - B
     return B
 
-def momentos_geometricos(B: np.ndarray):
-    """m00, m10, m01 para B binaria (1=figura)."""
+def _momentos_por_runs(B: np.ndarray, backend: str, runs=None):
+    """(m00, m10, m01) int exactos desde runs si el backend resuelve a contorno; si no None."""
+    if backend == "area":
+        return None
+    from momentos_contorno import resolver_backend, momentos_raw_por_runs
+    usado, runs = resolver_backend(B, backend, runs=runs)
+    if usado != "contorno":
+        return None
+    m = momentos_raw_por_runs(*runs, orden=1)
+    return m[(0, 0)], m[(1, 0)], m[(0, 1)]
+
+def momentos_geometricos(B: np.ndarray, backend: str = "area", runs=None):
+    """m00, m10, m01 para B binaria (1=figura). backend: area | contorno | auto."""
+    m = _momentos_por_runs(B, backend, runs)
+    if m is not None:
+        return tuple(float(v) for v in m)
     yy, xx = np.indices(B.shape, dtype=np.float64)
     f = B.astype(np.float64)
     m00 = f.sum()
@@ -45,9 +67,9 @@ def momentos_geometricos(B: np.ndarray):
     m01 = (yy * f).sum()
     return m00, m10, m01
 
-def centroide_por_momentos(B: np.ndarray):
+def centroide_por_momentos(B: np.ndarray, backend: str = "area", runs=None):
     """(xc, yc) a partir de m_{pq}. Equivale al centroide geométrico."""
-    m00, m10, m01 = momentos_geometricos(B)
+    m00, m10, m01 = momentos_geometricos(B, backend, runs)
     if m00 == 0:
         return None
     return (m10 / m00, m01 / m00)
@@ -77,25 +99,53 @@ def marcar_centroide(img: Image.Image, xc: float, yc: float,
 #  PROCESO PRINCIPAL
 # -----------------------------------------------------
 
-def calcular_area_y_centroide_desde_path(path_img: str, thresh=128, invertir=False,
-                                         guardar_bin=False):
-    p = Path(path_img)
-    img = Image.open(p)
-    B = binarizar(img, thresh=thresh, invertir=invertir)
-    area = area_pixeles(B)
-
-    c_mom = centroide_por_momentos(B)
+def _area_y_centroides(B: np.ndarray, backend: str = "area"):
+    """(área, centroide por momentos, centroide por definición, distancia entre ambos)."""
+    m = _momentos_por_runs(B, backend)
+    if m is not None:
+        # runs exactos: el promedio de coordenadas (definición) es m10/m00, m01/m00 sin
+        # redondeo, así que no hace falta otra pasada por píxel para el área ni el chequeo
+        m00, m10, m01 = m
+        if m00 == 0:
+            raise ValueError("Figura vacía (m00=0). Ajusta --thresh o usa --invert.")
+        c = (m10 / m00, m01 / m00)
+        return m00, c, c, 0.0
+    c_mom = centroide_por_momentos(B, "area")     # backend ya resuelto: no volver a elegir
     if c_mom is None:
         raise ValueError("Figura vacía (m00=0). Ajusta --thresh o usa --invert.")
-    xc_m, yc_m = c_mom
-
     c_def = centroide_por_definicion(B)
     if c_def is None:
         raise ValueError("Figura vacía tras definición. Revisa binarización.")
-    xc_d, yc_d = c_def
-
     # Chequeo numérico (deberían coincidir)
-    diff = float(np.hypot(xc_m - xc_d, yc_m - yc_d))
+    diff = float(np.hypot(c_mom[0] - c_def[0], c_mom[1] - c_def[1]))
+    return area_pixeles(B), c_mom, c_def, diff
+
+def calcular_area_y_centroide_desde_path(path_img: str, thresh=128, invertir=False,
+                                         guardar_bin=False, backend="area", guardar_rle=False,
+                                         guardar_npy=False, muestreo=0, confianza=0.95):
+    from arreglos_crudos import es_crudo, ruta_base
+    p = ruta_base(path_img)
+    if es_crudo(path_img):
+        from arreglos_crudos import cargar_binaria
+        B = cargar_binaria(path_img, thresh=thresh, invertir=invertir)
+        img = Image.fromarray(B * np.uint8(255))
+    else:
+        img = Image.open(p)
+        B = binarizar(img, thresh=thresh, invertir=invertir)
+
+    est = None
+    if muestreo:
+        from muestreo import centroide_por_muestreo
+        est = centroide_por_muestreo(B, presupuesto=muestreo, confianza=confianza)
+        if est is None:
+            raise ValueError("Figura vacía (m00=0). Ajusta --thresh o usa --invert.")
+    if est is not None and not est["exacto"]:
+        # triage: sin pasadas completas sobre B
+        area = est["area"]
+        xc_m, yc_m = xc_d, yc_d = est["centroide"]
+        diff = 0.0
+    else:
+        area, (xc_m, yc_m), (xc_d, yc_d), diff = _area_y_centroides(B, backend)
 
     marcado = marcar_centroide(img, xc_m, yc_m)
     out_cent = p.with_name(p.stem + "_centroide.png")
@@ -107,13 +157,27 @@ def calcular_area_y_centroide_desde_path(path_img: str, thresh=128, invertir=Fal
         out_bin = p.with_name(p.stem + "_bin.png")
         PILImage.fromarray((B * 255).astype(np.uint8)).save(out_bin)
 
+    out_rle = None
+    if guardar_rle:
+        from mascara_rle import MascaraRLE
+        out_rle = p.with_name(p.stem + "_bin.rle")
+        MascaraRLE.desde_densa(B).guardar(out_rle)
+
+    out_npy = None
+    if guardar_npy:
+        from arreglos_crudos import guardar_npy
+        out_npy = guardar_npy(p.with_name(p.stem + "_bin.npy"), B.astype(bool))
+
     return {
         "area_px": area,
         "centroide_momentos": (xc_m, yc_m),
         "centroide_definicion": (xc_d, yc_d),
         "distancia_entre_metodos": diff,
         "salida_centroide": str(out_cent),
-        "salida_binaria": str(out_bin) if out_bin else None
+        "salida_binaria": str(out_bin) if out_bin else None,
+        "salida_rle": str(out_rle) if out_rle else None,
+        "salida_npy": str(out_npy) if out_npy else None,
+        "muestreo": est
     }
 
 # -----------------------------------------------------
@@ -128,6 +192,18 @@ def main():
     parser.add_argument("--thresh", type=int, default=128, help="Umbral 0..255 (def:128)")
     parser.add_argument("--invert", action="store_true", help="Invierte la máscara (1=figura)")
     parser.add_argument("--save-bin", action="store_true", help="Guarda la binaria *_bin.png")
+    parser.add_argument("--save-rle", action="store_true",
+                        help="Guarda la binaria compacta *_bin.rle (mascara_rle.py)")
+    parser.add_argument("--save-npy", action="store_true",
+                        help="Guarda la binaria como arreglo crudo bool *_bin.npy (arreglos_crudos.py)")
+    parser.add_argument("--backend", choices=("auto", "area", "contorno"), default="area",
+                        help="Momentos por píxeles (area, def; con chequeo contra la definición), "
+                             "por runs (contorno, sin chequeo) o auto")
+    parser.add_argument("--store", help="Agrega el resultado al almacén columnar (almacen_resultados.py)")
+    parser.add_argument("--muestreo", type=int, default=0, metavar="N",
+                        help="Estima área y centroide con N píxeles muestreados (def: 0 = exacto; "
+                             "se ignora con --store)")
+    parser.add_argument("--confianza", type=float, default=0.95, help="Nivel de los intervalos (def:0.95)")
     args = parser.parse_args()
 
     # Si no se pasa por consola, abrir diálogo
@@ -138,22 +214,43 @@ def main():
 
     try:
         res = calcular_area_y_centroide_desde_path(
-            in_path, thresh=args.thresh, invertir=args.invert, guardar_bin=args.save_bin
+            in_path, thresh=args.thresh, invertir=args.invert, guardar_bin=args.save_bin,
+            backend=args.backend, guardar_rle=args.save_rle, guardar_npy=args.save_npy,
+            # el almacén guarda solo valores exactos: no se mezclan estimaciones sin marcar
+            muestreo=0 if args.store else args.muestreo, confianza=args.confianza
         )
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
 
     print(f"Umbral: {args.thresh} | Invertido: {bool(args.invert)}")
-    print(f"Área (px): {res['area_px']}")
     xm, ym = res["centroide_momentos"]
     xd, yd = res["centroide_definicion"]
-    print(f"Centroide por momentos (x,y): ({xm:.6f}, {ym:.6f})")
-    print(f"Centroide por definición (x,y): ({xd:.6f}, {yd:.6f})")
-    print(f"Diferencia entre métodos (px): {res['distancia_entre_metodos']:.6e}")
+    est = res["muestreo"]
+    if est is not None and not est["exacto"]:
+        mx, my = est["margen"]
+        print(f"Área (px) ≈ {res['area_px']} ± {est['area_margen']:.0f}  "
+              f"(muestreo de {args.muestreo} px, confianza {args.confianza:.0%})")
+        print(f"Centroide estimado (x,y): ({xm:.3f} ± {mx:.3f}, {ym:.3f} ± {my:.3f})")
+    else:
+        if est is not None:
+            print("Muestreo insuficiente (pocos px de figura): se calculó exacto.")
+        print(f"Área (px): {res['area_px']}")
+        print(f"Centroide por momentos (x,y): ({xm:.6f}, {ym:.6f})")
+        print(f"Centroide por definición (x,y): ({xd:.6f}, {yd:.6f})")
+        print(f"Diferencia entre métodos (px): {res['distancia_entre_metodos']:.6e}")
     print(f"Marcado guardado en: {res['salida_centroide']}")
     if res["salida_binaria"]:
         print(f"Binaria guardada en: {res['salida_binaria']}")
+    if res["salida_rle"]:
+        print(f"Binaria RLE guardada en: {res['salida_rle']}")
+    if res["salida_npy"]:
+        print(f"Binaria cruda guardada en: {res['salida_npy']}")
+    if args.store:
+        from almacen_resultados import agregar_a_almacen
+        agregar_a_almacen(args.store, imagen=str(in_path), origen="ej1a", umbral=args.thresh,
+                          invertido=int(args.invert), area=res["area_px"], xc=xm, yc=ym)
+        print(f"Agregado al almacén: {args.store}")
     print("Todo OK ✔️")
 
 if __name__ == "__main__":
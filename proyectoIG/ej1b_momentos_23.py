@@ -3,7 +3,7 @@
 from PIL import Image
 import numpy as np
 import sys
-from pathlib import Path
+from fractions import Fraction
 import argparse
 
 # --- reemplaza tu binarizar por esta (coherente con 1.a) ---
@@ -13,26 +13,42 @@ def binarizar(img, thresh=128, invertir=False):
     return (1 - B) if invertir else B
 
 
-def momentos_raw(B, p, q):
+def momentos_raw(B, p, q, modo="float64", hilos=1):
     # m_{p,q} = sum_x sum_y x^p y^q f(x,y)
-    yy, xx = np.indices(B.shape, dtype=np.float64)
-    f = B.astype(np.float64)
-    return float(((xx**p) * (yy**q) * f).sum())
-
-def centroide(B):
-    m00 = momentos_raw(B, 0, 0)
+    if hilos > 1 and modo == "float64":
+        from paralelo import ejecutor
+        return ejecutor(hilos).momentos(B, [(p, q)])[(p, q)]
+    if modo != "float64":
+        from momentos_precision import momento_raw
+        return momento_raw(B, p, q, modo)          # "exacto": int, sin redondear
+    # V_y^T @ B @ V_x con potencias cacheadas por tamaño (ver proyector_momentos.py)
+    from proyector_momentos import proyector
+    return proyector(B.shape, max(3, p, q)).momento(B, p, q)
+
+def centroide(B, modo="float64", hilos=1):
+    if modo == "float64" and hilos <= 1:
+        from proyector_momentos import proyector
+        return proyector(B.shape).centroide(B)
+    m00 = momentos_raw(B, 0, 0, modo, hilos)
     if m00 == 0:
         return None, 0.0
-    m10 = momentos_raw(B, 1, 0)
-    m01 = momentos_raw(B, 0, 1)
+    m10 = momentos_raw(B, 1, 0, modo, hilos)
+    m01 = momentos_raw(B, 0, 1, modo, hilos)
+    if modo == "exacto":
+        return (Fraction(m10, m00), Fraction(m01, m00)), m00
     return (m10/m00, m01/m00), m00
 
-def momento_central(B, p, q, xc, yc):
-    yy, xx = np.indices(B.shape, dtype=np.float64)
-    x = xx - xc
-    y = yy - yc
-    f = B.astype(np.float64)
-    return float(((x**p) * (y**q) * f).sum())
+def momento_central(B, p, q, xc, yc, modo="float64", hilos=1):
+    # modo: "float64" (def), "float32" o "exacto" (ver momentos_precision.py)
+    # hilos > 1: sumas por bandas de filas en paralelo (ver paralelo.py)
+    if hilos > 1 and modo == "float64":
+        from paralelo import ejecutor
+        return ejecutor(hilos).momentos(B, [(p, q)], xc, yc)[(p, q)]
+    if modo != "float64":
+        from momentos_precision import momento_central as _central
+        return _central(B, p, q, xc, yc, modo)
+    from proyector_momentos import proyector
+    return float(proyector(B.shape, max(3, p, q)).central(B, xc, yc)[q, p])
 
 def momento_central_normalizado(mu_pq, m00, p, q):
     # η_{p,q} = μ_{p,q} / m00^{1 + (p+q)/2}
@@ -57,9 +73,16 @@ def pedir_archivo_si_falta():
 
 def main():
     parser = argparse.ArgumentParser(description="Ej1(b): momentos m(2,3), μ(2,3), η(2,3).")
-    parser.add_argument("imagen", nargs="?", help="Ruta de la Figura 1.b")
+    parser.add_argument("imagen", nargs="?", help="Ruta de la Figura 1.b (o máscara .rle / .npy / shm://)")
     parser.add_argument("--thresh", type=int, default=128, help="Umbral 0..255 (def:128)")
     parser.add_argument("--invert", action="store_true", help="Invierte la máscara (1=figura)")
+    parser.add_argument("--precision", choices=("float64", "float32", "exacto"), default="float64",
+                        help="Aritmética de los momentos (def: float64)")
+    parser.add_argument("--hilos", type=int, default=1,
+                        help="Hilos para repartir la imagen en bandas de filas (def:1)")
+    parser.add_argument("--reporte-precision", action="store_true",
+                        help="Compara float64/float32/exacto e imprime el error")
+    parser.add_argument("--store", help="Agrega el resultado al almacén columnar (almacen_resultados.py)")
     args = parser.parse_args()
 
     in_path = args.imagen or pedir_archivo_si_falta()
@@ -67,43 +90,68 @@ def main():
         print("Uso: python ej1b_momentos_23.py <ruta_de_imagen> [--thresh 128] [--invert]")
         sys.exit(1)
 
-    p = Path(in_path)
-    if not p.exists():
-        print(f"Archivo no encontrado: {p}")
+    from arreglos_crudos import existe, ruta_base, es_crudo
+    if not existe(in_path):
+        print(f"Archivo no encontrado: {in_path}")
         sys.exit(1)
-
-    img = Image.open(p)
-    B = binarizar(img, thresh=args.thresh, invertir=args.invert)
+    p = ruta_base(in_path)
+
+    if p.suffix.lower() == ".rle":
+        # máscara ya binarizada (mascara_rle.py / ej1a --save-rle): se ignoran --thresh/--invert
+        from mascara_rle import cargar_mascara
+        B = cargar_mascara(p)
+    elif es_crudo(in_path):
+        # .npy / shm://: bool = máscara lista; uint8 = se umbraliza (arreglos_crudos.py)
+        from arreglos_crudos import cargar_binaria
+        B = cargar_binaria(in_path, thresh=args.thresh, invertir=args.invert)
+    else:
+        img = Image.open(p)
+        B = binarizar(img, thresh=args.thresh, invertir=args.invert)
 
     # Momentos raw y centroide
-    m00 = momentos_raw(B, 0, 0)
+    modo, hilos = args.precision, args.hilos
+    m00 = momentos_raw(B, 0, 0, modo, hilos)
     if m00 == 0:
         print("Figura vacía (m00=0). Ajusta --thresh o usa --invert.")
         sys.exit(1)
-    m10 = momentos_raw(B, 1, 0)
-    m01 = momentos_raw(B, 0, 1)
-    xc, yc = m10/m00, m01/m00
+    m10 = momentos_raw(B, 1, 0, modo, hilos)
+    m01 = momentos_raw(B, 0, 1, modo, hilos)
+    # "exacto": m00/m10/m01/m23 int y centroide Fraction; se redondea solo al imprimir
+    xc, yc = (Fraction(m10, m00), Fraction(m01, m00)) if modo == "exacto" else (m10/m00, m01/m00)
+    m23 = momentos_raw(B, 2, 3, modo, hilos)
 
     # μ(2,3) y η(2,3)
-    mu23 = momento_central(B, 2, 3, xc, yc)
+    mu23 = momento_central(B, 2, 3, xc, yc, modo, hilos)
     eta23 = momento_central_normalizado(mu23, m00, 2, 3)
 
     # Checks útiles en defensa
-    mu00 = momento_central(B, 0, 0, xc, yc)   # debería = m00
-    mu10 = momento_central(B, 1, 0, xc, yc)   # debería ≈ 0
-    mu01 = momento_central(B, 0, 1, xc, yc)   # debería ≈ 0
+    mu00 = momento_central(B, 0, 0, xc, yc, modo, hilos)   # debería = m00
+    mu10 = momento_central(B, 1, 0, xc, yc, modo, hilos)   # debería ≈ 0
+    mu01 = momento_central(B, 0, 1, xc, yc, modo, hilos)   # debería ≈ 0
 
     print("=== Resultados (Figura 1.b) ===")
-    print(f"Umbral: {args.thresh} | Invertido: {bool(args.invert)}")
-    print(f"m00 (área): {m00:.0f}")
-    print(f"Centroide:  (xc, yc) = ({xc:.6f}, {yc:.6f})")
-    print(f"m_23:       {momentos_raw(B, 2, 3):.6e}")
-    print(f"mu_23:      {mu23:.6e}")
+    print(f"Umbral: {args.thresh} | Invertido: {bool(args.invert)} | Precisión: {modo}")
+    from momentos_precision import formatear as fm
+    print(f"m00 (área): {fm(m00, '.0f')}")
+    print(f"Centroide:  (xc, yc) = ({fm(xc, '.6f')}, {fm(yc, '.6f')})")
+    print(f"m_23:       {fm(m23)}")
+    print(f"mu_23:      {fm(mu23)}")
     print(f"eta_23:     {eta23:.6e}")
     print("--- Checks ---")
-    print(f"mu00 (=m00): {mu00:.0f}")
-    print(f"mu10 ≈ 0:    {mu10:.6e}")
-    print(f"mu01 ≈ 0:    {mu01:.6e}")
+    print(f"mu00 (=m00): {fm(mu00, '.0f')}")
+    print(f"mu10 ≈ 0:    {fm(mu10)}")
+    print(f"mu01 ≈ 0:    {fm(mu01)}")
+
+    if args.reporte_precision:
+        from momentos_precision import reporte_precision, imprimir_reporte
+        imprimir_reporte(*reporte_precision(B, ((0, 0), (1, 0), (0, 1), (2, 3))))
+
+    if args.store:
+        from almacen_resultados import agregar_a_almacen
+        agregar_a_almacen(args.store, imagen=str(p), origen="ej1b", umbral=args.thresh,
+                          invertido=int(args.invert), area=int(m00), xc=float(xc), yc=float(yc),
+                          m23=float(m23), mu23=float(mu23), eta23=eta23)
+        print(f"Agregado al almacén: {args.store}")
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,11 @@
 # ej1c_hu.py
-# Uso: python ej1c_hu.py ruta/figura1c.png
+# Uso: python ej1c_hu.py ruta/figura1c.png [--thresh 128] [--invert] [--cache | --cache-dir DIR]
+# Con --cache, la misma imagen y parámetros sacan el resultado de la caché .memo/ (memo_resultados.py).
 from PIL import Image
 import numpy as np
 import sys
-from pathlib import Path
 from math import isfinite
+from fractions import Fraction
 import argparse
 from math import log10, copysign
 
@@ -19,25 +20,41 @@ def binarizar(img, thresh=128, invertir=False):
     B = (a >= thresh).astype(np.uint8)  # 1=figura
     return (1 - B) if invertir else B
 
-def raw_moment(B, p, q):
-    yy, xx = np.indices(B.shape, dtype=np.float64)
-    f = B.astype(np.float64)
-    return float(((xx**p) * (yy**q) * f).sum())
+def raw_moment(B, p, q, modo="float64", hilos=1):
+    if hilos > 1 and modo == "float64":
+        from paralelo import ejecutor
+        return ejecutor(hilos).momentos(B, [(p, q)])[(p, q)]
+    if modo != "float64":
+        from momentos_precision import momento_raw
+        return momento_raw(B, p, q, modo)          # "exacto": int, sin redondear
+    # V_y^T @ B @ V_x con potencias cacheadas por tamaño (ver proyector_momentos.py)
+    from proyector_momentos import proyector
+    return proyector(B.shape, max(3, p, q)).momento(B, p, q)
 
-def centroid(B):
-    m00 = raw_moment(B, 0, 0)
+def centroid(B, modo="float64", hilos=1):
+    if modo == "float64" and hilos <= 1:
+        from proyector_momentos import proyector
+        return proyector(B.shape).centroide(B)
+    m00 = raw_moment(B, 0, 0, modo, hilos)
     if m00 == 0:
         return None, 0.0
-    m10 = raw_moment(B, 1, 0)
-    m01 = raw_moment(B, 0, 1)
+    m10 = raw_moment(B, 1, 0, modo, hilos)
+    m01 = raw_moment(B, 0, 1, modo, hilos)
+    if modo == "exacto":
+        return (Fraction(m10, m00), Fraction(m01, m00)), m00
     return (m10/m00, m01/m00), m00
 
-def central_moment(B, p, q, xc, yc):
-    yy, xx = np.indices(B.shape, dtype=np.float64)
-    x = xx - xc
-    y = yy - yc
-    f = B.astype(np.float64)
-    return float(((x**p) * (y**q) * f).sum())
+def central_moment(B, p, q, xc, yc, modo="float64", hilos=1):
+    # modo: "float64" (def), "float32" o "exacto" (ver momentos_precision.py)
+    # hilos > 1: sumas por bandas de filas en paralelo (ver paralelo.py)
+    if hilos > 1 and modo == "float64":
+        from paralelo import ejecutor
+        return ejecutor(hilos).momentos(B, [(p, q)], xc, yc)[(p, q)]
+    if modo != "float64":
+        from momentos_precision import momento_central
+        return momento_central(B, p, q, xc, yc, modo)
+    from proyector_momentos import proyector
+    return float(proyector(B.shape, max(3, p, q)).central(B, xc, yc)[q, p])
 
 def eta(mu_pq, m00, p, q):
     if m00 == 0:
@@ -45,16 +62,53 @@ def eta(mu_pq, m00, p, q):
     gamma = 1.0 + (p + q) / 2.0
     return float(mu_pq / (m00**gamma))
 
-def hu_moments(B):
-    c, m00 = centroid(B)
+def momentos_por_runs(runs, modo="float64"):
+    """(m00, (xc, yc), μ_pq) desde runs; en "exacto" centroide y μ_pq quedan como Fraction."""
+    from momentos_contorno import momentos_raw_por_runs, momentos_centrales_desde_raw
+    m = momentos_raw_por_runs(*runs)
+    m00 = m[(0, 0)]
+    if m00 == 0:
+        return 0, None, None
+    c = (Fraction(m[(1, 0)], m00), Fraction(m[(0, 1)], m00))
+    if modo != "exacto":
+        c = (float(c[0]), float(c[1]))
+    return m00, c, momentos_centrales_desde_raw(m, exacto=(modo == "exacto"))
+
+def hu_moments(B, modo="float64", backend="area", hilos=1, runs=None):
+    # backend "contorno"/"auto": μ_pq exactos desde runs (ver momentos_contorno.py).
+    # 'auto' usa área con float32 o hilos > 1; 'contorno' explícito con ellos -> ValueError.
+    # 'runs': los de una resolución previa (no se recalculan).
+    if backend != "area":
+        from momentos_contorno import resolver_backend
+        usado, runs = resolver_backend(B, backend, modo, hilos, runs)
+        if usado == "contorno":
+            m00, c, mu = momentos_por_runs(runs, modo)
+            if c is None:
+                return (0.0, 0.0, 0.0)
+            return _hu_desde_centrales(mu, m00)
+
+    c, m00 = centroid(B, modo, hilos)
     if c is None:
         return (0.0, 0.0, 0.0)
     xc, yc = c
 
-    mu20 = central_moment(B, 2, 0, xc, yc); mu02 = central_moment(B, 0, 2, xc, yc)
-    mu11 = central_moment(B, 1, 1, xc, yc)
-    mu30 = central_moment(B, 3, 0, xc, yc); mu12 = central_moment(B, 1, 2, xc, yc)
-    mu21 = central_moment(B, 2, 1, xc, yc); mu03 = central_moment(B, 0, 3, xc, yc)
+    ordenes = ((2, 0), (0, 2), (1, 1), (3, 0), (1, 2), (2, 1), (0, 3))
+    if hilos > 1 and modo == "float64":
+        # los 7 centrales en una sola pasada por bandas
+        from paralelo import ejecutor
+        mu = ejecutor(hilos).momentos(B, ordenes, xc, yc)
+    elif modo == "float64":
+        # los 7 centrales en una sola proyección V_y^T @ B @ V_x
+        from proyector_momentos import proyector
+        U = proyector(B.shape).central(B, xc, yc)
+        mu = {(p, q): float(U[q, p]) for p, q in ordenes}
+    else:
+        mu = {(p, q): central_moment(B, p, q, xc, yc, modo) for p, q in ordenes}
+    return _hu_desde_centrales(mu, m00)
+
+def _hu_desde_centrales(mu, m00):
+    mu20, mu02, mu11 = mu[(2, 0)], mu[(0, 2)], mu[(1, 1)]
+    mu30, mu12, mu21, mu03 = mu[(3, 0)], mu[(1, 2)], mu[(2, 1)], mu[(0, 3)]
 
     n20 = eta(mu20, m00, 2, 0); n02 = eta(mu02, m00, 0, 2); n11 = eta(mu11, m00, 1, 1)
     n30 = eta(mu30, m00, 3, 0); n12 = eta(mu12, m00, 1, 2)
@@ -79,15 +133,73 @@ def pedir_archivo_si_falta():
     except Exception:
         return None
 
+def cargar_figura(in_path, p, args):
+    if p.suffix.lower() == ".rle":
+        # máscara ya binarizada (mascara_rle.py / ej1a --save-rle): se ignoran --thresh/--invert
+        from mascara_rle import cargar_mascara
+        return cargar_mascara(p)
+    from arreglos_crudos import es_crudo
+    if es_crudo(in_path):
+        # .npy / shm://: bool = máscara lista; uint8 = se umbraliza (arreglos_crudos.py)
+        from arreglos_crudos import cargar_binaria
+        return cargar_binaria(in_path, thresh=args.thresh, invertir=args.invert)
+    return binarizar(Image.open(p), thresh=args.thresh, invertir=args.invert)
+
+def _a_json(v):
+    # en "exacto" m00 es int y centroide/checks Fraction: se guardan sin redondear
+    if isinstance(v, Fraction):
+        return str(v) if v.denominator != 1 else v.numerator
+    return int(v) if isinstance(v, (int, np.integer)) else float(v)
+
+def _de_json(v):
+    return Fraction(v) if isinstance(v, str) else v
+
+def calcular(B, args):
+    """Dict con m00, centroide, Hu (y checks si se piden); None si la figura está vacía."""
+    modo, hilos = args.precision, args.hilos
+    from momentos_contorno import resolver_backend
+    usado, runs = resolver_backend(B, args.backend, modo, hilos)
+    if usado == "contorno":
+        # área, centroide, Hu y checks salen de los mismos runs: sin pasadas por píxel
+        m00, c, mu = momentos_por_runs(runs, modo)
+        if c is None:
+            return None
+        xc, yc = c
+        H1, H2, H3 = _hu_desde_centrales(mu, m00)
+    else:
+        c, m00 = centroid(B, modo, hilos)
+        if c is None:
+            return None
+        xc, yc = c
+        H1, H2, H3 = hu_moments(B, modo, backend="area", hilos=hilos)
+    res = {"m00": _a_json(m00), "xc": _a_json(xc), "yc": _a_json(yc), "backend": usado,
+           "hu": [float(v) if isfinite(v) else 0.0 for v in (H1, H2, H3)]}
+    if args.show_checks:
+        # sanidad: mu00=m00, mu10≈0, mu01≈0
+        res["checks"] = [_a_json(mu[k] if usado == "contorno" else central_moment(B, *k, xc, yc, modo, hilos))
+                         for k in ((0, 0), (1, 0), (0, 1))]
+    return res
+
 def main():
     parser = argparse.ArgumentParser(description="Ej1(c): Momentos de Hu H1-H3.")
-    parser.add_argument("imagen", nargs="?", help="Ruta de la Figura 1.c")
+    parser.add_argument("imagen", nargs="?", help="Ruta de la Figura 1.c (o máscara .rle / .npy / shm://)")
     parser.add_argument("--thresh", type=int, default=128, help="Umbral 0..255 (def:128)")
     parser.add_argument("--invert", action="store_true", help="Invierte la máscara (1=figura)")
     parser.add_argument("--show-checks", action="store_true",
                         help="Imprime μ00, μ10≈0, μ01≈0 para sanidad")
     parser.add_argument("--show-log", action="store_true",
                         help="Imprime Hu en escala log (phi)")
+    parser.add_argument("--precision", choices=("float64", "float32", "exacto"), default="float64",
+                        help="Aritmética de los momentos (def: float64)")
+    parser.add_argument("--backend", choices=("auto", "area", "contorno"), default="auto",
+                        help="Momentos por píxeles (area), por runs (contorno) o auto (def)")
+    parser.add_argument("--hilos", type=int, default=1,
+                        help="Hilos para repartir la imagen en bandas de filas (def:1)")
+    parser.add_argument("--reporte-precision", action="store_true",
+                        help="Compara float64/float32/exacto e imprime el error")
+    parser.add_argument("--store", help="Agrega el resultado al almacén columnar (almacen_resultados.py)")
+    from memo_resultados import agregar_opciones
+    agregar_opciones(parser)
     args = parser.parse_args()
 
     in_path = args.imagen or pedir_archivo_si_falta()
@@ -95,28 +207,43 @@ def main():
         print("Uso: python ej1c_hu.py <ruta_de_imagen> [--thresh 128] [--invert]")
         sys.exit(1)
 
-    p = Path(in_path)
-    if not p.exists():
-        print(f"Archivo no encontrado: {p}")
+    from arreglos_crudos import existe, ruta_base
+    if not existe(in_path):
+        print(f"Archivo no encontrado: {in_path}")
         sys.exit(1)
+    p = ruta_base(in_path)
 
-    img = Image.open(p)
-    B = binarizar(img, thresh=args.thresh, invertir=args.invert)
-
-    c, m00 = centroid(B)
-    if c is None:
-        print("Figura vacía (m00=0). Revisa el umbral o usa --invert.")
-        sys.exit(1)
-    xc, yc = c
-
-    H1, H2, H3 = hu_moments(B)
-    vals = [H1, H2, H3]
-    safe = [v if isfinite(v) else 0.0 for v in vals]
+    # misma entrada + mismos parámetros -> resultado de la caché (memo_resultados.py)
+    from memo_resultados import abrir_memo
+    memo = abrir_memo(p, args.cache, args.cache_dir)
+    clave, res, B = None, None, None
+    if memo:
+        clave = memo.clave(__file__, in_path, {
+            "thresh": args.thresh, "invert": args.invert, "precision": args.precision,
+            "backend": args.backend, "hilos": args.hilos, "checks": args.show_checks})
+        res = memo.buscar(clave, p)
+    if res is None:
+        B = cargar_figura(in_path, p, args)
+        try:
+            res = calcular(B, args)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if res is None:
+            print("Figura vacía (m00=0). Revisa el umbral o usa --invert.")
+            sys.exit(1)
+        if memo:
+            memo.guardar(clave, __file__, res)
+    m00, xc, yc = (_de_json(res[k]) for k in ("m00", "xc", "yc"))
+    safe = res["hu"]
+    modo = args.precision
 
     print("=== Momentos de Hu (Figura 1.c) ===")
-    print(f"Umbral: {args.thresh} | Invertido: {bool(args.invert)}")
-    print(f"m00 (área): {m00:.0f}")
-    print(f"Centroide:   (xc, yc) = ({xc:.6f}, {yc:.6f})")
+    print(f"Umbral: {args.thresh} | Invertido: {bool(args.invert)} | Precisión: {modo} | "
+          f"Backend: {res.get('backend', args.backend)}")
+    from momentos_precision import formatear as fm
+    print(f"m00 (área): {fm(m00, '.0f')}")
+    print(f"Centroide:   (xc, yc) = ({fm(xc, '.6f')}, {fm(yc, '.6f')})")
     print(f"H1 = {safe[0]:.6e}")
     print(f"H2 = {safe[1]:.6e}")
     print(f"H3 = {safe[2]:.6e}")
@@ -128,14 +255,24 @@ def main():
         print(f"phi3 = {hu_log(safe[2]):.6e}")
 
     if args.show_checks:
-        # sanidad: mu00=m00, mu10≈0, mu01≈0
-        mu00 = central_moment(B, 0, 0, xc, yc)
-        mu10 = central_moment(B, 1, 0, xc, yc)
-        mu01 = central_moment(B, 0, 1, xc, yc)
+        mu00, mu10, mu01 = (_de_json(v) for v in res["checks"])
         print("--- Checks ---")
-        print(f"mu00 (=m00): {mu00:.0f}")
-        print(f"mu10 ≈ 0:    {mu10:.6e}")
-        print(f"mu01 ≈ 0:    {mu01:.6e}")
+        print(f"mu00 (=m00): {fm(mu00, '.0f')}")
+        print(f"mu10 ≈ 0:    {fm(mu10)}")
+        print(f"mu01 ≈ 0:    {fm(mu01)}")
+
+    if args.reporte_precision:
+        from momentos_precision import reporte_precision, imprimir_reporte
+        imprimir_reporte(*reporte_precision(B if B is not None else cargar_figura(in_path, p, args)))
+
+    if args.store:
+        from almacen_resultados import agregar_a_almacen
+        agregar_a_almacen(args.store, imagen=str(p), origen="ej1c", umbral=args.thresh,
+                          invertido=int(args.invert), area=int(m00), xc=float(xc), yc=float(yc), hu=safe)
+        print(f"Agregado al almacén: {args.store}")
+    if memo:
+        print("(caché: " + ("acierto, sin recalcular)" if B is None else "resultado guardado)"))
+        memo.close()
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,13 @@
 # ej3_planos_y_gris.py
 # Uso:
-#   python ej3_planos_y_gris.py ruta/imagen_b.png [--show]
+#   python ej3_planos_y_gris.py ruta/imagen_b.png [--show] [--luma bt601|bt709|promedio|luminosidad]
+#                               [--formato png|npy|shm] [--preview]
+#
+# Con --formato npy|shm los planos y el gris se guardan como arreglos crudos
+# (arreglos_crudos.py) en vez de PNG. La entrada también puede ser .npy o shm://nombre.
+# Con --preview solo se arma la figura, desde el nivel reducido (vista_previa.py: caché
+# .piramide/ o draft de JPEG) que alcanza para su tamaño; no se decodifica la imagen
+# completa ni se guardan los planos.
 #
 # Si no se entrega ruta, se abrirá un cuadro para seleccionar la imagen.
 # Si se usa --show, mostrará los gráficos (ventana o visor alternativo).
@@ -8,7 +15,6 @@
 from PIL import Image
 import numpy as np
 import sys
-from pathlib import Path
 import argparse
 
 # --- Forzar backend con GUI (TkAgg o plan B) ---
@@ -35,11 +41,44 @@ def pedir_archivo_si_falta():
         return None
 
 
+def graficar(vR, vG, vB, vGR, p, figsize, dpi, show=False):
+    """Figura [R] [G] [B] [Gris] guardada como *_planos.png (y mostrada con show)."""
+    fig, axs = plt.subplots(1, 4, figsize=figsize)
+    axs[0].imshow(vR, cmap="Reds");    axs[0].set_title("R")
+    axs[1].imshow(vG, cmap="Greens");  axs[1].set_title("G")
+    axs[2].imshow(vB, cmap="Blues");   axs[2].set_title("B")
+    axs[3].imshow(vGR, cmap="gray");   axs[3].set_title("Gris")
+    for ax in axs: ax.axis("off")
+    plt.tight_layout()
+
+    out_fig = p.with_name(p.stem + "_planos.png")
+    plt.savefig(out_fig, dpi=dpi)
+
+    # Mostrar ventana o visor del sistema
+    if show:
+        try:
+            plt.show()
+        except Exception:
+            try:
+                Image.open(out_fig).show()
+            except Exception:
+                print("[AVISO] No fue posible abrir ventana ni visor del sistema.")
+
+    plt.close(fig)
+    return out_fig
+
+
 def main():
     parser = argparse.ArgumentParser(description="Ej3: separar R/G/B y Gris, graficar y guardar.")
     parser.add_argument("imagen", nargs="?", help="Ruta de la imagen")
     parser.add_argument("--show", action="store_true",
                         help="Mostrar la ventana con los gráficos (o visor alternativo)")
+    parser.add_argument("--luma", choices=("bt601", "bt709", "promedio", "luminosidad"), default="bt601",
+                        help="Fórmula del gris (def: bt601, igual a PIL)")
+    parser.add_argument("--formato", choices=("png", "npy", "shm"), default="png",
+                        help="Salida de planos y gris: png (def), npy (memmap) o shm (memoria compartida)")
+    parser.add_argument("--preview", action="store_true",
+                        help="Solo la figura, desde un nivel reducido (sin guardar planos)")
     args = parser.parse_args()
 
     in_path = args.imagen or pedir_archivo_si_falta()
@@ -47,46 +86,55 @@ def main():
         print("Uso: python ej3_planos_y_gris.py <ruta_de_imagen> [--show]")
         sys.exit(1)
 
-    p = Path(in_path)
-    if not p.exists():
-        print(f"Archivo no encontrado: {p}")
+    from arreglos_crudos import existe, es_crudo, ruta_base, cargar_rgb, guardar_crudo
+    if not existe(in_path):
+        print(f"Archivo no encontrado: {in_path}")
         sys.exit(1)
-
-    # Cargar imagen y separar planos
-    img = Image.open(p).convert("RGB")
-    r, g, b = img.split()
-    gray = img.convert("L")
+    p = ruta_base(in_path)
+    figsize, dpi = (10, 3), 150
+    from kernels_color import planos, gris
+
+    if args.preview:
+        # solo la figura, desde un nivel reducido (caché o draft JPEG): sin decodificar
+        # la imagen completa ni guardar planos a resolución completa
+        from vista_previa import nivel_reducido, lado_panel
+        try:
+            arr = cargar_rgb(in_path) if es_crudo(in_path) else None
+            v = nivel_reducido(in_path, lado_panel(figsize, dpi, paneles=4), cotas=False, arr=arr)["media"]
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        vR, vG, vB = planos(v)
+        vGR = gris(v, args.luma, out=np.empty(v.shape[:2], dtype=np.uint8))
+        out_fig = graficar(vR, vG, vB, vGR, p, figsize, dpi, args.show)
+        print(f"Vista previa {v.shape[1]}x{v.shape[0]} (planos no guardados; quita --preview para guardarlos)")
+        print(f"Figura comparativa: {out_fig}")
+        print("Todo OK ✔️")
+        return
+
+    # Cargar imagen y separar planos (vistas del buffer RGB, sin copias)
+    try:
+        rgb = cargar_rgb(in_path)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    R, G, B = planos(rgb)
+    GR = gris(rgb, args.luma, out=np.empty(rgb.shape[:2], dtype=np.uint8))
 
     # Guardar planos individuales
-    out_r = p.with_name(p.stem + "_R.png")
-    out_g = p.with_name(p.stem + "_G.png")
-    out_b = p.with_name(p.stem + "_B.png")
-    out_gray = p.with_name(p.stem + "_GRAY.png")
-    r.save(out_r); g.save(out_g); b.save(out_b); gray.save(out_gray)
+    if args.formato == "png":
+        r, g, b, gray = (Image.fromarray(np.ascontiguousarray(a)) for a in (R, G, B, GR))
+        out_r = p.with_name(p.stem + "_R.png")
+        out_g = p.with_name(p.stem + "_G.png")
+        out_b = p.with_name(p.stem + "_B.png")
+        out_gray = p.with_name(p.stem + "_GRAY.png")
+        r.save(out_r); g.save(out_g); b.save(out_b); gray.save(out_gray)
+    else:
+        out_r, out_g, out_b, out_gray = (guardar_crudo(p, suf, a, args.formato)
+                                         for suf, a in (("_R", R), ("_G", G), ("_B", B), ("_GRAY", GR)))
 
     # Graficar los planos
-    fig, axs = plt.subplots(1, 4, figsize=(10, 3))
-    axs[0].imshow(np.array(r), cmap="Reds");    axs[0].set_title("R")
-    axs[1].imshow(np.array(g), cmap="Greens");  axs[1].set_title("G")
-    axs[2].imshow(np.array(b), cmap="Blues");   axs[2].set_title("B")
-    axs[3].imshow(np.array(gray), cmap="gray"); axs[3].set_title("Gris")
-    for ax in axs: ax.axis("off")
-    plt.tight_layout()
-
-    out_fig = p.with_name(p.stem + "_planos.png")
-    plt.savefig(out_fig, dpi=150)
-
-    # Mostrar ventana o visor del sistema
-    if args.show:
-        try:
-            plt.show()
-        except Exception:
-            try:
-                Image.open(out_fig).show()
-            except Exception:
-                print("[AVISO] No fue posible abrir ventana ni visor del sistema.")
-
-    plt.close(fig)
+    out_fig = graficar(R, G, B, GR, p, figsize, dpi, args.show)
 
     print("Planos y gris guardados:")
     print(f"  R:    {out_r}")
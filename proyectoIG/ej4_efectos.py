@@ -10,13 +10,19 @@
 #      python ej4_efectos.py --base base.jpg --face lena.png --mask mask_circulo.png \
 #            --pos 240 260 --size 360 360 --blur 2 --rotate 0 --opacity 1.0 --out base_proc.png
 #
-#   2) Modo asistente (produce los 4 como en la lámina):
+#   2) Varias caras sobre una misma base en una pasada (capas en JSON):
+#      python ej4_efectos.py --base base.jpg --layers capas.json --out base_capas.png
+#      (cada capa: face, mask, pos, size, ancla centro|sup_izq|[fx,fy], z, rotate, opacity, blur)
+#
+#   3) Modo asistente (produce los 4 como en la lámina):
 #      python ej4_efectos.py --wizard
 #      (elige: 4 bases, 1 cara, y las 4 plantillas: círculo, rect, pentágono, corazón)
 #
 # Tips:
 #   - Si tu plantilla está invertida (negro=figura), usa --invert-mask
 #   - Ajusta --pos/--size/--blur para matchear mejor la figura
+#   - --feather gauss|caja|distancia usa difuminado.py (solo la banda del borde);
+#     "caja" cuesta lo mismo con cualquier --blur. Por defecto: GaussianBlur de PIL.
 # ---------------------------------------------------------------------
 
 from PIL import Image, ImageOps, ImageFilter
@@ -37,14 +43,19 @@ def pick_file(title, patterns="*.png;*.jpg;*.jpeg;*.bmp;*.tif;*.tiff"):
         return None
 
 # ---------- núcleo de composición ----------
-def prepare_alpha_from_mask(mask_img: Image.Image, blur_px=2, invert=False, rotate_deg=0):
+def prepare_alpha_from_mask(mask_img: Image.Image, blur_px=2, invert=False, rotate_deg=0, feather="pil"):
     a = ImageOps.grayscale(mask_img)
     if invert:
         a = ImageOps.invert(a)
     if rotate_deg:
         a = a.rotate(rotate_deg, resample=Image.BICUBIC, expand=True)
     if blur_px and blur_px > 0:
-        a = a.filter(ImageFilter.GaussianBlur(radius=blur_px))
+        if feather == "pil":
+            a = a.filter(ImageFilter.GaussianBlur(radius=blur_px))
+        else:
+            import numpy as np
+            from difuminado import difuminar
+            a = Image.fromarray(difuminar(np.asarray(a), blur_px, metodo=feather), mode="L")
     return a
 
 def resize_to(img: Image.Image, size_wh: tuple[int,int], rotate_deg=0):
@@ -64,6 +75,108 @@ def compose(base: Image.Image, face: Image.Image, alpha: Image.Image,
     out.paste(face_rgba, pos_xy, face_rgba)
     return out.convert("RGB")
 
+# ---------- composición multi-capa ----------
+ANCLAS = {"centro": (0.5, 0.5), "sup_izq": (0.0, 0.0)}
+
+class Capa:
+    """
+    Una cara + plantilla a pegar sobre la base.
+      pos:   punto de la base donde cae el ancla de la capa
+      ancla: "centro", "sup_izq" o (fx, fy) en fracciones del tamaño de la capa
+      z:     orden (menor = más abajo); a igual z se respeta el orden de la lista
+    """
+    def __init__(self, face, mask, pos=(0, 0), size=None, rotate=0.0, opacity=1.0,
+                 ancla="centro", z=0, blur=2, invert=False, feather="pil"):
+        self.face, self.mask = face, mask
+        self.pos = (int(pos[0]), int(pos[1]))
+        self.size = tuple(map(int, size)) if size else None
+        self.rotate, self.opacity, self.z = float(rotate), float(opacity), z
+        self.ancla = ANCLAS[ancla] if isinstance(ancla, str) else (float(ancla[0]), float(ancla[1]))
+        self.blur, self.invert, self.feather = blur, invert, feather
+
+    def preparar(self):
+        """(cara RGB float32 hxwx3, alfa float32 hxw en 0..1) ya redimensionados/rotados."""
+        import numpy as np
+        W, H = self.size or self.mask.size
+        face_r = resize_to(self.face.convert("RGB"), (W, H), rotate_deg=self.rotate)
+        mask_r = resize_to(self.mask, (W, H), rotate_deg=self.rotate)
+        alpha = prepare_alpha_from_mask(mask_r, blur_px=self.blur, invert=self.invert,
+                                        feather=self.feather)
+        a = np.asarray(alpha.convert("L"), dtype=np.float64)
+        if self.opacity < 1.0:
+            # mismo alfa entero que compose(): int(v * opacidad), truncado
+            a = np.floor(a * max(0.0, min(1.0, self.opacity)))
+        return np.asarray(face_r, dtype=np.float32), (a / 255.0).astype(np.float32)
+
+    def esquina(self, w, h):
+        """Esquina superior izquierda en la base según pos y ancla."""
+        return self.pos[0] - int(round(self.ancla[0] * w)), self.pos[1] - int(round(self.ancla[1] * h))
+
+def componer_capas(base: Image.Image, capas) -> Image.Image:
+    """
+    Mezcla todas las capas (en orden z) sobre un único buffer float32 de la base;
+    cada capa solo toca su ROI recortada a la base. Una sola conversión final a RGB.
+    Con una sola capa el resultado es idéntico a compose() (mismo alfa entero).
+    """
+    import numpy as np
+    buf = np.array(base.convert("RGB"), dtype=np.float32)
+    H, W = buf.shape[:2]
+    for capa in sorted(capas, key=lambda c: c.z):
+        face, a = capa.preparar()
+        h, w = a.shape
+        x, y = capa.esquina(w, h)
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(W, x + w), min(H, y + h)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        roi = buf[y0:y1, x0:x1]
+        f = face[y0 - y:y1 - y, x0 - x:x1 - x]
+        al = a[y0 - y:y1 - y, x0 - x:x1 - x, None]
+        roi += (f - roi) * al                       # in-place sobre la vista de buf
+    return Image.fromarray(np.clip(np.rint(buf), 0, 255).astype(np.uint8), mode="RGB")
+
+def cargar_capas(path, feather="pil", invert=False):
+    """
+    Lee un JSON con una lista de capas:
+      [{"face": "lena.png", "mask": "circulo.png", "pos": [240, 260], "size": [360, 360],
+        "ancla": "centro", "z": 0, "rotate": 0, "opacity": 1.0, "blur": 2}, ...]
+    Las rutas relativas se resuelven respecto a la carpeta del JSON.
+    """
+    import json
+    path = Path(path)
+    with open(path, encoding="utf-8") as fh:
+        datos = json.load(fh)
+    imgs = {}
+    def abrir(p):
+        p = (path.parent / p) if not Path(p).is_absolute() else Path(p)
+        if p not in imgs:
+            imgs[p] = Image.open(p)
+        return imgs[p]
+    capas = []
+    for i, d in enumerate(datos):
+        if "face" not in d or "mask" not in d:
+            raise ValueError(f"Capa {i}: faltan 'face' y/o 'mask'.")
+        capas.append(Capa(abrir(d["face"]), abrir(d["mask"]), pos=d.get("pos", (0, 0)),
+                          size=d.get("size"), rotate=d.get("rotate", 0.0),
+                          opacity=d.get("opacity", 1.0), ancla=d.get("ancla", "centro"),
+                          z=d.get("z", i), blur=d.get("blur", 2),
+                          invert=d.get("invert", invert), feather=d.get("feather", feather)))
+    return capas
+
+def run_layers(args):
+    base_path = args.base or pick_file("Selecciona la IMAGEN BASE")
+    if not base_path:
+        print("Falta la imagen base."); sys.exit(1)
+    base_path = Path(base_path)
+    try:
+        capas = cargar_capas(args.layers, feather=args.feather, invert=args.invert_mask)
+        out_img = componer_capas(Image.open(base_path), capas)
+    except Exception as e:
+        print(f"Error: {e}"); sys.exit(1)
+    out_path = Path(args.out) if args.out else base_path.with_name(base_path.stem + "_capas.png")
+    out_img.save(out_path)
+    print(f"OK ({len(capas)} capas) ->", out_path)
+
 # ---------- modo simple ----------
 def run_single(args):
     base_path = args.base or pick_file("Selecciona la IMAGEN BASE")
@@ -89,7 +202,8 @@ def run_single(args):
     mask_r = resize_to(mask, (W, H), rotate_deg=args.rotate)
 
     # alfa desde plantilla
-    alpha = prepare_alpha_from_mask(mask_r, blur_px=args.blur, invert=args.invert_mask)
+    alpha = prepare_alpha_from_mask(mask_r, blur_px=args.blur, invert=args.invert_mask,
+                                    feather=args.feather)
 
     # posición: por defecto centrado
     if args.pos:
@@ -148,7 +262,8 @@ def run_wizard(args):
         # redimensionar cara y máscara, aplicar rotación y blur
         face_r = resize_to(face, (target_W, target_H), rotate_deg=rotate[i-1])
         mask_r = resize_to(mask, (target_W, target_H), rotate_deg=rotate[i-1])
-        alpha  = prepare_alpha_from_mask(mask_r, blur_px=blur[i-1], invert=args.invert_mask)
+        alpha  = prepare_alpha_from_mask(mask_r, blur_px=blur[i-1], invert=args.invert_mask,
+                                         feather=args.feather)
 
         # posición centrada (puedes desplazar un poco para cuadrar mejor)
         x = (base.width  - face_r.width ) // 2
@@ -168,15 +283,21 @@ def main():
     ap.add_argument("--pos",  nargs=2, metavar=("X","Y"), help="Posición (x,y) donde pegar (modo simple).")
     ap.add_argument("--size", nargs=2, metavar=("W","H"), help="Tamaño (w,h) de cara/máscara (modo simple).")
     ap.add_argument("--blur", type=int, default=2, help="Feather (px) del borde.")
+    ap.add_argument("--feather", choices=["pil", "gauss", "caja", "distancia"], default="pil",
+                    help="Método de feather: pil (GaussianBlur), gauss (separable exacta), "
+                         "caja (3 pasadas, costo independiente del radio) o distancia (rampa lineal).")
     ap.add_argument("--rotate", type=float, default=0.0, help="Rotación (grados).")
     ap.add_argument("--opacity", type=float, default=1.0, help="Opacidad 0..1 de la cara.")
     ap.add_argument("--invert-mask", action="store_true", help="Invierte la plantilla.")
     ap.add_argument("--out", help="Archivo de salida (modo simple).")
     ap.add_argument("--wizard", action="store_true", help="Asistente para generar las 4 composiciones.")
+    ap.add_argument("--layers", help="JSON con varias capas (cara, plantilla, pos, ancla, z...) sobre --base.")
     args = ap.parse_args()
 
     if args.wizard:
         run_wizard(args)
+    elif args.layers:
+        run_layers(args)
     else:
         run_single(args)
 
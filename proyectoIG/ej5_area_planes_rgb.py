@@ -1,17 +1,27 @@
 # ej5_area_planes_rgb.py
 # Uso:
-#   python ej5_area_planes_rgb.py ruta/imagen.png [umbral] [--show]
+#   python ej5_area_planes_rgb.py ruta/imagen.png [umbral] [--show] [--store resultados/] [--hilos N]
+#                                 [--formato png|npy|shm] [--preview] [--aprox] [--muestreo N] [--confianza 0.95]
 #
 # Hace:
 #   - Separa los planos R, G y B (en color sobre fondo negro) y los guarda.
+#     Con --formato npy|shm se guardan los planos HxW uint8 como arreglos crudos
+#     (arreglos_crudos.py); la entrada también puede ser .npy o shm://nombre.
+#   - --preview: paneles dibujados desde el nivel reducido (vista_previa.py: caché
+#     .piramide/ o draft de JPEG) que alcanza para la figura. --aprox: áreas desde un
+#     nivel reducido con cotas rigurosas [mín, máx], sin decodificar la imagen completa
+#     si ya está en la caché y sin guardar los planos (con --store se calculan exactas).
+#   - --muestreo N: fracciones de área estimadas con N píxeles muestreados por
+#     tiles (muestreo.py), con margen al nivel de --confianza (def: 95%); un canal
+#     con pocos px muestreados a un lado del umbral se cuenta exacto.
 #   - Calcula el área ocupada (px >= umbral) en cada plano.
 #   - Genera una figura comparativa: [Imagen original] [Plano Red] [Plano Green] [Plano Blue].
 
 from PIL import Image
 import numpy as np
 import matplotlib.pyplot as plt
+import argparse
 import sys
-from pathlib import Path
 
 def pedir_archivo_si_falta():
     try:
@@ -27,68 +37,129 @@ def pedir_archivo_si_falta():
         return None
 
 def main():
-    # === Obtener ruta y umbral ===
-    show = False
-    if len(sys.argv) >= 2 and sys.argv[1] not in ("-h", "--help"):
-        in_path = sys.argv[1]
-        # umbral opcional
-        if len(sys.argv) >= 3 and sys.argv[2] not in ("--show",):
-            try:
-                thresh = int(sys.argv[2])
-            except ValueError:
-                print(f"Advertencia: umbral inválido '{sys.argv[2]}', usando 128.")
-                thresh = 128
-        else:
-            thresh = 128
-        # bandera --show en cualquier posición
-        show = ("--show" in sys.argv[2:]) or ("--show" in sys.argv[1:2])
-    else:
-        in_path = pedir_archivo_si_falta()
-        if not in_path:
-            print("Uso: python ej5_area_planes_rgb.py <ruta_de_imagen> [umbral] [--show]")
-            sys.exit(1)
-        thresh = 128
+    parser = argparse.ArgumentParser(
+        description="Ej5: planos R, G, B y área (px >= umbral) en cada canal."
+    )
+    parser.add_argument("imagen", nargs="?", help="Ruta de la imagen (o .npy / shm://nombre)")
+    parser.add_argument("umbral", nargs="?", type=int, default=128, help="Umbral 0..255 (def:128)")
+    parser.add_argument("--show", action="store_true", help="Muestra la figura al terminar")
+    parser.add_argument("--store", help="Agrega el resultado al almacén columnar (almacen_resultados.py)")
+    parser.add_argument("--hilos", type=int, default=1,
+                        help="Conteos por bandas de filas en paralelo (paralelo.py, def:1)")
+    parser.add_argument("--formato", choices=("png", "npy", "shm"), default="png",
+                        help="Formato de los planos guardados (def: png)")
+    parser.add_argument("--preview", action="store_true",
+                        help="Paneles desde un nivel reducido (vista_previa.py)")
+    parser.add_argument("--aprox", action="store_true",
+                        help="Áreas desde un nivel reducido con cotas [mín, máx]")
+    parser.add_argument("--muestreo", type=int, default=0, metavar="N",
+                        help="Fracciones de área estimadas con N píxeles muestreados (def: 0 = exacto)")
+    parser.add_argument("--confianza", type=float, default=0.95, help="Nivel de los márgenes (def:0.95)")
+    args = parser.parse_args()
+    if args.muestreo and args.aprox:
+        parser.error("--muestreo y --aprox son excluyentes (dos formas distintas de estimar).")
+    if not 0 < args.confianza < 1:
+        parser.error("--confianza debe estar en (0, 1).")
 
-    p = Path(in_path)
-    if not p.exists():
-        print(f"Archivo no encontrado: {p}")
+    thresh, show, hilos, formato, preview = args.umbral, args.show, args.hilos, args.formato, args.preview
+    confianza = args.confianza
+    store = args.store
+    # con --store se guardan áreas exactas
+    muestreo = 0 if store else args.muestreo
+    aprox = args.aprox and not store
+    in_path = args.imagen or pedir_archivo_si_falta()
+    if not in_path:
+        print("Uso: python ej5_area_planes_rgb.py <ruta_de_imagen> [umbral] [--show]")
+        sys.exit(1)
+    if not 0 <= thresh <= 255:
+        print(f"Error: umbral fuera de 0..255: {thresh}")
         sys.exit(1)
 
-    # === Cargar y separar ===
-    img = Image.open(p).convert("RGB")
-    r, g, b = img.split()
-    R = np.array(r); G = np.array(g); B = np.array(b)
-    h, w = R.shape
-    total = R.size
+    from arreglos_crudos import existe, es_crudo, ruta_base, cargar_rgb, guardar_crudo
+    if not existe(in_path):
+        print(f"Archivo no encontrado: {in_path}")
+        sys.exit(1)
+    p = ruta_base(in_path)
+    figsize, dpi = (12, 3.2), 150
 
-    # === Áreas por canal (>= umbral) ===
-    area_R = int((R >= thresh).sum())
-    area_G = int((G >= thresh).sum())
-    area_B = int((B >= thresh).sum())
+    # === Cargar ===
+    # --aprox no decodifica la imagen completa: áreas y figura salen de niveles
+    # reducidos (caché .piramide/); los planos a resolución completa no se guardan
+    from kernels_color import planos
+    rgb, nivel = None, None
+    try:
+        if aprox:
+            from vista_previa import nivel_reducido
+            crudo = cargar_rgb(in_path) if es_crudo(in_path) else None
+            nivel = nivel_reducido(in_path, arr=crudo)
+            h, w = nivel["forma"]
+        else:
+            rgb = cargar_rgb(in_path)
+            h, w = rgb.shape[:2]
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    total = h * w
 
-    # === Planos coloreados sobre negro ===
-    zero = Image.new("L", (w, h), 0)
-    plane_R = Image.merge("RGB", (r, zero, zero))
-    plane_G = Image.merge("RGB", (zero, g, zero))
-    plane_B = Image.merge("RGB", (zero, zero, b))
+    # === Áreas por canal (>= umbral) ===
+    cotas, margenes = None, None
+    if aprox:
+        from vista_previa import area_con_cotas
+        est = [area_con_cotas(nivel, c, (h, w), thresh) for c in range(3)]
+        area_R, area_G, area_B = (e[0] for e in est)
+        cotas = [e[1:] for e in est]
+    else:
+        R, G, B = planos(rgb)          # vistas del buffer intercalado, sin copia
+        if muestreo:
+            from muestreo import fracciones_por_muestreo
+            est = fracciones_por_muestreo((R, G, B), thresh, presupuesto=muestreo, confianza=confianza)
+            area_R, area_G, area_B = (int(round(f * total)) for f, _, _ in est)
+            margenes = [(m, exacto) for _, m, exacto in est]
+        elif hilos > 1:
+            from paralelo import ejecutor
+            ej = ejecutor(hilos)
+            area_R, area_G, area_B = (ej.area_umbral(P, thresh) for P in (R, G, B))
+        else:
+            area_R = int((R >= thresh).sum())
+            area_G = int((G >= thresh).sum())
+            area_B = int((B >= thresh).sum())
 
-    # Guardar planos
-    out_R  = p.with_name(p.stem + "_plane_R.png")
-    out_G  = p.with_name(p.stem + "_plane_G.png")
-    out_B  = p.with_name(p.stem + "_plane_B.png")
-    plane_R.save(out_R); plane_G.save(out_G); plane_B.save(out_B)
+    # === Planos coloreados sobre negro (y guardado a resolución completa) ===
+    out_R = out_G = out_B = None
+    if rgb is not None:
+        planes = np.zeros((3, h, w, 3), dtype=np.uint8)
+        for c, P in enumerate((R, G, B)):
+            planes[c, ..., c] = P
+        if formato == "png":
+            plane_R, plane_G, plane_B = (Image.fromarray(planes[c]) for c in range(3))
+            out_R  = p.with_name(p.stem + "_plane_R.png")
+            out_G  = p.with_name(p.stem + "_plane_G.png")
+            out_B  = p.with_name(p.stem + "_plane_B.png")
+            plane_R.save(out_R); plane_G.save(out_G); plane_B.save(out_B)
+        else:
+            out_R, out_G, out_B = (guardar_crudo(p, suf, P, formato)
+                                   for suf, P in (("_plane_R", R), ("_plane_G", G), ("_plane_B", B)))
 
     # === Figura comparativa al estilo de la guía ===
-    fig, axs = plt.subplots(1, 4, figsize=(12, 3.2))
-    axs[0].imshow(np.array(img));     axs[0].set_title("[ Imagen original ]")
-    axs[1].imshow(np.array(plane_R)); axs[1].set_title("[ Plano Red ]")
-    axs[2].imshow(np.array(plane_G)); axs[2].set_title("[ Plano Green ]")
-    axs[3].imshow(np.array(plane_B)); axs[3].set_title("[ Plano Blue ]")
+    if preview or aprox:
+        from vista_previa import nivel_reducido, lado_panel
+        v_rgb = nivel_reducido(in_path, lado_panel(figsize, dpi, paneles=4), cotas=False,
+                               arr=rgb if rgb is not None else crudo)["media"]
+        v_planes = np.zeros((3,) + v_rgb.shape, dtype=np.uint8)
+        for c in range(3):
+            v_planes[c, ..., c] = v_rgb[..., c]
+    else:
+        v_rgb, v_planes = rgb, planes
+    fig, axs = plt.subplots(1, 4, figsize=figsize)
+    axs[0].imshow(v_rgb);        axs[0].set_title("[ Imagen original ]")
+    axs[1].imshow(v_planes[0]);  axs[1].set_title("[ Plano Red ]")
+    axs[2].imshow(v_planes[1]);  axs[2].set_title("[ Plano Green ]")
+    axs[3].imshow(v_planes[2]);  axs[3].set_title("[ Plano Blue ]")
     for ax in axs: ax.axis("off")
 
     # Subtítulo con áreas
     fig.suptitle(
-        f"Umbral={thresh} | Áreas (px y %): "
+        f"Umbral={thresh} | Áreas{' aprox.' if aprox or muestreo else ''} (px y %): "
         f"R={area_R} ({area_R/total:.2%}), "
         f"G={area_G} ({area_G/total:.2%}), "
         f"B={area_B} ({area_B/total:.2%})",
@@ -97,7 +168,7 @@ def main():
     plt.tight_layout(rect=[0, 0.06, 1, 1])
 
     out_fig = p.with_name(p.stem + "_fig_planes.png")
-    fig.savefig(out_fig, dpi=150)
+    fig.savefig(out_fig, dpi=dpi)
     if show:
         plt.show()
     plt.close(fig)
@@ -107,11 +178,28 @@ def main():
     print(f"Área R (px): {area_R}  ({area_R/total:.2%})")
     print(f"Área G (px): {area_G}  ({area_G/total:.2%})")
     print(f"Área B (px): {area_B}  ({area_B/total:.2%})")
+    if margenes:
+        print(f"  (estimadas con {muestreo} px muestreados; margen al {confianza:.0%}:)")
+        for canal, (m, exacto) in zip("RGB", margenes):
+            print(f"  Área {canal}: " + ("exacta (pocos px a un lado del umbral en la muestra)" if exacto
+                                        else f"± {m * total:.0f} px (± {m:.2%})"))
+    if cotas:
+        print(f"  (aproximadas desde bloques de {nivel['paso']}x{nivel['paso']} px; cotas exactas:)")
+        for canal, (lo, hi) in zip("RGB", cotas):
+            print(f"  Área {canal} en [{lo}, {hi}]  ([{lo/total:.2%}, {hi/total:.2%}])")
     print("Guardados:")
-    print(f"  Plano R:  {out_R}")
-    print(f"  Plano G:  {out_G}")
-    print(f"  Plano B:  {out_B}")
+    if out_R is not None:
+        print(f"  Plano R:  {out_R}")
+        print(f"  Plano G:  {out_G}")
+        print(f"  Plano B:  {out_B}")
+    else:
+        print("  (--aprox: planos a resolución completa no guardados)")
     print(f"  Figura:   {out_fig}")
+    if store:
+        from almacen_resultados import agregar_a_almacen
+        agregar_a_almacen(store, imagen=str(p), origen="ej5", umbral=thresh,
+                          area_rgb=(area_R, area_G, area_B))
+        print(f"  Almacén:  {store}")
     print("Todo OK ✔️")
 
 if __name__ == "__main__":
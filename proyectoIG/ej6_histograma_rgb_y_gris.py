@@ -1,6 +1,10 @@
 # ej6_histograma_rgb_y_gris.py
 # Uso:
-#   python ej6_histograma_rgb_y_gris.py ruta/imagen.png [--smooth 5] [--show]
+#   python ej6_histograma_rgb_y_gris.py ruta/imagen.png [--smooth 5] [--show] [--store resultados/]
+#                                       [--luma bt601|bt709|promedio|luminosidad]
+#                                       [--normalizar ecualizar|igualar|estirar|clahe] [--ref ref.npy]
+#                                       [--aprox] [--muestreo N] [--confianza 0.95]
+#                                       [--cache | --cache-dir DIR]
 #
 # Qué hace:
 #   - Calcula y grafica los histogramas de R, G, B y Gris (curvas superpuestas).
@@ -9,11 +13,21 @@
 #       1) figura combinada RGB+Gris:  *_hist_rgb_gris.png
 #       2) imagen en escala de grises: *_GRAY.png     <-- NUEVO
 #       3) histograma solo del gris:   *_hist_gray.png <-- EXTRA útil
+#       4) con --normalizar: *_RGB_<op>.png y *_GRAY_<op>.png, con LUT derivadas
+#          de estos mismos histogramas (ver operaciones_punto.py)
+#   - Con --aprox los histogramas salen de un nivel reducido de la pirámide
+#     (vista_previa.py) y se informa la cota del error del histograma acumulado; si
+#     la pirámide ya está en .piramide/ no se decodifica la imagen completa y (salvo
+#     con --normalizar) no se guarda el *_GRAY.png.
+#   - Con --muestreo N los histogramas y modos se estiman con N píxeles muestreados
+#     por tiles (muestreo.py); si el modo queda ambiguo dentro del margen, ese canal
+#     se recalcula exacto.
+#   - Con --cache (o --cache-dir DIR), la misma imagen y parámetros toman los modos,
+#     histogramas y salidas de la caché .memo/ (memo_resultados.py).
 
 from PIL import Image
 import numpy as np
 import matplotlib.pyplot as plt
-from pathlib import Path
 import argparse, sys
 
 # -------- utilidades ----------
@@ -30,9 +44,36 @@ def pedir_archivo_si_falta():
     except Exception:
         return None
 
-def hist256(arr_uint8: np.ndarray) -> np.ndarray:
+def hist256(arr_uint8: np.ndarray, hilos: int = 1) -> np.ndarray:
+    if hilos > 1:
+        # suma de histogramas por bandas de filas (ver paralelo.py)
+        from paralelo import ejecutor
+        return ejecutor(hilos).hist256(arr_uint8)
     return np.bincount(arr_uint8.ravel(), minlength=256)
 
+def hist_aprox(ruta, rgb=None, luma="bt601"):
+    """
+    Histogramas R, G, B y Gris desde un nivel reducido de la pirámide (vista_previa.py);
+    con la pirámide en caché no se decodifica la imagen completa ('rgb' es opcional).
+    Devuelve (hR, hG, hB, hGR, paso, cota) con cota[c] = máximo error del histograma
+    acumulado como fracción de píxeles (riguroso, por los mín/máx de cada bloque).
+    """
+    from vista_previa import nivel_reducido, histograma_con_cotas
+    from kernels_color import gris
+    nivel = nivel_reducido(ruta, arr=rgb)
+    # el gris es monótono en cada canal: gris(mín) y gris(máx) acotan el gris de cada bloque
+    nivel_gris = {"paso": nivel["paso"]}
+    for k in ("media", "min", "max"):
+        a = np.ascontiguousarray(nivel[k])
+        nivel_gris[k] = gris(a, luma, out=np.empty(a.shape[:2], dtype=np.uint8))
+    forma = nivel["forma"]
+    total = forma[0] * forma[1]
+    res = [histograma_con_cotas(nivel, c, forma) for c in range(3)]
+    res.append(histograma_con_cotas(nivel_gris, None, forma))
+    hists = [np.round(est).astype(np.int64) for est, _, _ in res]
+    cota = [float((hi - lo).max()) / total for _, lo, hi in res]
+    return (*hists, nivel["paso"], cota)
+
 def suavizar(y: np.ndarray, k: int = 0) -> np.ndarray:
     """Suaviza el histograma con media móvil (solo visual)."""
     if k <= 1:
@@ -44,35 +85,61 @@ def suavizar(y: np.ndarray, k: int = 0) -> np.ndarray:
     kernel = np.ones(k) / k
     return np.convolve(ypad, kernel, mode="valid")
 
-# -------- principal ----------
-def main():
-    ap = argparse.ArgumentParser(description="Histograma R/G/B y Gris (modos + guardado de imagen gris).")
-    ap.add_argument("imagen", nargs="?", help="Ruta de la imagen")
-    ap.add_argument("--smooth", type=int, default=3, help="Suavizado visual de curvas (p.ej. 5)")
-    ap.add_argument("--show", action="store_true", help="Muestra la figura")
-    args = ap.parse_args()
-
-    in_path = args.imagen or pedir_archivo_si_falta()
-    if not in_path:
-        print("Uso: python ej6_histograma_rgb_y_gris.py <ruta> [--smooth 5] [--show]")
-        sys.exit(1)
-    p = Path(in_path)
-    if not p.exists():
-        print(f"Archivo no encontrado: {p}")
-        sys.exit(1)
+def normalizar(p, args, rgb, GR, hists):
+    """Aplica la operación de --normalizar reutilizando los histogramas ya calculados."""
+    from operaciones_punto import lut_desde_hist, aplicar_lut, clahe, cargar_hist_referencia
+    op = args.normalizar
+    if op == "clahe":
+        rgb_n = np.stack([clahe(rgb[..., c], tiles=args.tiles, clip=args.clip) for c in range(3)], axis=-1)
+        gr_n = clahe(GR, tiles=args.tiles, clip=args.clip)
+    else:
+        ref = None
+        if op == "igualar":
+            if not args.ref:
+                raise ValueError("'igualar' requiere --ref (histograma .npy o imagen).")
+            ref = cargar_hist_referencia(args.ref)
+        def ref_de(c):
+            if ref is None or ref.ndim == 1:
+                return ref
+            return ref[c] if c < len(ref) else ref[:3].sum(axis=0)
+        luts = [lut_desde_hist(op, h, ref_de(c), *args.percentiles) for c, h in enumerate(hists)]
+        rgb_n = aplicar_lut(rgb, np.stack(luts[:3]))
+        gr_n = aplicar_lut(GR, luts[3])
+    out_rgb = p.with_name(p.stem + f"_RGB_{op}.png")
+    out_gray = p.with_name(p.stem + f"_GRAY_{op}.png")
+    Image.fromarray(rgb_n).save(out_rgb)
+    Image.fromarray(gr_n).save(out_gray)
+    return out_rgb, out_gray
 
+# -------- cálculo ----------
+def calcular(in_path, p, args):
+    """
+    Histogramas, modos y figuras/imágenes de salida. Devuelve un dict serializable
+    (se guarda tal cual en la caché .memo/, ver memo_resultados.py).
+    """
     # ---- Cargar y separar ----
-    img = Image.open(p).convert("RGB")
-    r, g, b = img.split()
-    gray = img.convert("L")  # (0.299R + 0.587G + 0.114B) — gris normal
-
-    R = np.array(r, dtype=np.uint8)
-    G = np.array(g, dtype=np.uint8)
-    B = np.array(b, dtype=np.uint8)
-    GR = np.array(gray, dtype=np.uint8)
+    # con --aprox (sin --normalizar) no hace falta la imagen completa: ni se decodifica
+    # ni se guarda el gris a resolución completa
+    from arreglos_crudos import cargar_rgb, es_crudo
+    from kernels_color import planos, gris
+    completa = not modo_aprox(args) or bool(args.normalizar)
+    rgb = cargar_rgb(in_path) if completa or es_crudo(in_path) else None
+    if completa:
+        R, G, B = planos(rgb)          # vistas, sin copia
+        GR = gris(rgb, args.luma, out=np.empty(rgb.shape[:2], dtype=np.uint8))      # bt601: (0.299R + 0.587G + 0.114B) — gris normal
+        gray = Image.fromarray(GR)
 
     # ---- Histogramas ----
-    hR, hG, hB, hGR = hist256(R), hist256(G), hist256(B), hist256(GR)
+    n = args.hilos
+    cota_cdf, muestras, paso = None, None, None
+    if args.muestreo and not args.store:
+        from muestreo import modos_por_muestreo
+        muestras = modos_por_muestreo((R, G, B, GR), presupuesto=args.muestreo, confianza=args.confianza)
+        hR, hG, hB, hGR = (m["hist"] for m in muestras)
+    elif modo_aprox(args):
+        hR, hG, hB, hGR, paso, cota_cdf = hist_aprox(in_path, rgb, args.luma)
+    else:
+        hR, hG, hB, hGR = hist256(R, n), hist256(G, n), hist256(B, n), hist256(GR, n)
     hsR, hsG, hsB, hsGR = [suavizar(h, args.smooth) for h in (hR, hG, hB, hGR)]
 
     # ---- Modos (tonalidad más frecuente) ----
@@ -80,6 +147,8 @@ def main():
     mG, fG = int(np.argmax(hG)), int(hG.max())
     mB, fB = int(np.argmax(hB)), int(hB.max())
     mGR, fGR = int(np.argmax(hGR)), int(hGR.max())
+    if muestras:
+        (mR, fR), (mG, fG), (mB, fB), (mGR, fGR) = ((m["modo"], m["freq"]) for m in muestras)
 
     # ---- (1) Figura combinada RGB + Gris ----
     xs = np.arange(256)
@@ -95,15 +164,14 @@ def main():
     plt.legend()
     plt.xlim(0, 255)
     plt.tight_layout()
-    out_overlay = p.with_name(p.stem + "_hist_rgb_gris.png")
-    plt.savefig(out_overlay, dpi=150)
+    plt.savefig(p.with_name(p.stem + "_hist_rgb_gris.png"), dpi=150)
     if args.show:
         plt.show()
     plt.close()
 
     # ---- (2) Guardar IMAGEN en GRIS ----
-    out_gray_img = p.with_name(p.stem + "_GRAY.png")
-    gray.save(out_gray_img)
+    if completa:
+        gray.save(p.with_name(p.stem + "_GRAY.png"))
 
     # ---- (3) (Extra) Histograma solo del GRIS (barras) ----
     plt.figure(figsize=(6, 3))
@@ -113,22 +181,132 @@ def main():
     plt.ylabel("Frecuencia")
     plt.xlim(0, 255)
     plt.tight_layout()
-    out_gray_hist = p.with_name(p.stem + "_hist_gray.png")
-    plt.savefig(out_gray_hist, dpi=150)
+    plt.savefig(p.with_name(p.stem + "_hist_gray.png"), dpi=150)
     if args.show:
         plt.show()
     plt.close()
 
+    # ---- (4) Normalización (opcional) ----
+    if args.normalizar:
+        normalizar(p, args, rgb, GR, (hR, hG, hB, hGR))
+
+    return {
+        "modos": [[mR, fR], [mG, fG], [mB, fB], [mGR, fGR]],
+        "hist": [np.asarray(h).tolist() for h in (hR, hG, hB, hGR)],
+        "muestras": [{"margen": m["margen"], "exacto": m["exacto"]} for m in muestras] if muestras else None,
+        "paso": paso, "cota_cdf": cota_cdf,
+    }
+
+def modo_aprox(args) -> bool:
+    """--aprox efectivo: --store pide números exactos y --muestreo tiene prioridad."""
+    return bool(args.aprox and not args.store and not args.muestreo)
+
+def sufijos_salida(args):
+    sufijos = ["_hist_rgb_gris.png", "_GRAY.png", "_hist_gray.png"]
+    if modo_aprox(args) and not args.normalizar:
+        sufijos.remove("_GRAY.png")
+    if args.normalizar:
+        sufijos += [f"_RGB_{args.normalizar}.png", f"_GRAY_{args.normalizar}.png"]
+    return sufijos
+
+# -------- principal ----------
+def main():
+    ap = argparse.ArgumentParser(description="Histograma R/G/B y Gris (modos + guardado de imagen gris).")
+    ap.add_argument("imagen", nargs="?", help="Ruta de la imagen")
+    ap.add_argument("--smooth", type=int, default=3, help="Suavizado visual de curvas (p.ej. 5)")
+    ap.add_argument("--show", action="store_true", help="Muestra la figura")
+    ap.add_argument("--hilos", type=int, default=1,
+                    help="Hilos para repartir la imagen en bandas de filas (def:1)")
+    ap.add_argument("--luma", choices=("bt601", "bt709", "promedio", "luminosidad"), default="bt601",
+                    help="Fórmula del gris (def: bt601, igual a PIL)")
+    ap.add_argument("--normalizar", choices=("ecualizar", "igualar", "estirar", "clahe"),
+                    help="Normaliza la imagen con una LUT derivada de los histogramas")
+    ap.add_argument("--ref", help="Referencia para 'igualar': .npy (256 o Cx256) o imagen")
+    ap.add_argument("--percentiles", nargs=2, type=float, default=(1.0, 99.0), metavar=("BAJO", "ALTO"),
+                    help="Percentiles para 'estirar' (def: 1 99)")
+    ap.add_argument("--tiles", nargs=2, type=int, default=(8, 8), metavar=("TY", "TX"),
+                    help="Grilla de tiles para 'clahe' (def: 8 8)")
+    ap.add_argument("--clip", type=float, default=2.0, help="Límite de recorte para 'clahe' (def: 2.0)")
+    ap.add_argument("--aprox", action="store_true",
+                    help="Histogramas desde la pirámide reducida, con cota de error (se ignora con --store)")
+    ap.add_argument("--muestreo", type=int, default=0, metavar="N",
+                    help="Estima histogramas y modos con N píxeles muestreados (def: 0 = exacto)")
+    ap.add_argument("--confianza", type=float, default=0.95, help="Nivel de los márgenes (def:0.95)")
+    ap.add_argument("--store", help="Agrega modos e histogramas al almacén columnar (almacen_resultados.py)")
+    from memo_resultados import agregar_opciones
+    agregar_opciones(ap)
+    args = ap.parse_args()
+
+    in_path = args.imagen or pedir_archivo_si_falta()
+    if not in_path:
+        print("Uso: python ej6_histograma_rgb_y_gris.py <ruta> [--smooth 5] [--show]")
+        sys.exit(1)
+    from arreglos_crudos import existe, ruta_base
+    if not existe(in_path):
+        print(f"Archivo no encontrado: {in_path}")
+        sys.exit(1)
+    p = ruta_base(in_path)          # .npy / shm://nombre también sirven (arreglos_crudos.py)
+
+    # misma entrada + mismos parámetros -> resultado y salidas desde .memo/ (con --show se recalcula)
+    from memo_resultados import abrir_memo
+    memo = abrir_memo(p, args.cache, args.cache_dir)
+    res, clave = None, None
+    if memo:
+        aprox = modo_aprox(args)
+        muestreo = 0 if args.store else args.muestreo
+        clave = memo.clave(__file__, in_path, {
+            "luma": args.luma, "smooth": args.smooth, "titulo": p.name,
+            "normalizar": args.normalizar, "percentiles": list(args.percentiles),
+            "tiles": list(args.tiles), "clip": args.clip,
+            "ref": memo.hash_entrada(args.ref) if args.normalizar == "igualar" and args.ref else None,
+            "aprox": aprox, "muestreo": muestreo, "confianza": args.confianza if muestreo else None})
+        if not args.show:
+            res = memo.buscar(clave, p)
+    acierto = res is not None
+    if not acierto:
+        try:
+            res = calcular(in_path, p, args)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if memo:
+            memo.guardar(clave, __file__, res, p, sufijos_salida(args))
+    (mR, fR), (mG, fG), (mB, fB), (mGR, fGR) = res["modos"]
+    muestras, cota_cdf, paso = res["muestras"], res["cota_cdf"], res["paso"]
+    salidas = {s: p.with_name(p.stem + s) for s in sufijos_salida(args)}
+
     # ---- Consola ----
     print("=== Tonalidad más repetida (modo) ===")
     print(f"Rojo (R):  {mR} (freq={fR})")
     print(f"Verde (G): {mG} (freq={fG})")
     print(f"Azul (B):  {mB} (freq={fB})")
     print(f"Gris:      {mGR} (freq={fGR})")
+    if muestras:
+        print(f"(muestreo de {args.muestreo} px, confianza {args.confianza:.0%}; freq ± margen:)")
+        for canal, m in zip(("R", "G", "B", "Gris"), muestras):
+            print(f"  {canal}: " + ("exacto (modo ambiguo en la muestra)" if m["exacto"]
+                                   else f"± {m['margen']:.0f}"))
+    if cota_cdf is not None:
+        print(f"(aproximado desde bloques de {paso}x{paso} px; |CDF real - estimada| <= "
+              + ", ".join(f"{c} {e:.2%}" for c, e in zip(("R", "G", "B", "Gris"), cota_cdf)) + ")")
     print("\nGuardados:")
-    print(f"  Figura RGB+Gris: {out_overlay}")
-    print(f"  Imagen en Gris:  {out_gray_img}")     # <-- NUEVO
-    print(f"  Hist. solo Gris: {out_gray_hist}")    # <-- EXTRA
+    print(f"  Figura RGB+Gris: {salidas['_hist_rgb_gris.png']}")
+    if "_GRAY.png" in salidas:
+        print(f"  Imagen en Gris:  {salidas['_GRAY.png']}")     # <-- NUEVO
+    else:
+        print("  Imagen en Gris:  (--aprox: no se guarda a resolución completa)")
+    print(f"  Hist. solo Gris: {salidas['_hist_gray.png']}")    # <-- EXTRA
+    if args.normalizar:
+        print(f"  RGB {args.normalizar}:  {salidas[f'_RGB_{args.normalizar}.png']}")
+        print(f"  Gris {args.normalizar}: {salidas[f'_GRAY_{args.normalizar}.png']}")
+    if args.store:
+        from almacen_resultados import agregar_a_almacen
+        agregar_a_almacen(args.store, imagen=str(p), origen="ej6",
+                          modos=(mR, mG, mB, mGR), hist=np.array(res["hist"], dtype=np.int64))
+        print(f"  Almacén:         {args.store}")
+    if memo:
+        print("  (caché: " + ("acierto, sin recalcular)" if acierto else "resultado guardado)"))
+        memo.close()
     print("OK ✔️")
 
 if __name__ == "__main__":
@@ -1,14 +1,15 @@
 # ej7_aplicar_color.py
 # Uso:
-#   python ej7_aplicar_color.py ruta/figura.png [--show]
+#   python ej7_aplicar_color.py ruta/figura.png [--show] [--luma bt601|bt709|promedio|luminosidad]
 # Opcional (ajustes del azul):
 #   --dark  r g b    # color para las sombras (por defecto 0 20 90)
 #   --light r g b    # color para las luces  (por defecto 140 190 255)
+#   --cache          # reutiliza las salidas guardadas en .memo/ (memo_resultados.py)
+#   --cache-dir DIR  # idem, con la caché en DIR
 
 from PIL import Image, ImageOps
 import numpy as np
 import matplotlib.pyplot as plt
-from pathlib import Path
 import argparse, sys
 
 def pedir_archivo_si_falta():
@@ -31,6 +32,11 @@ def colorizar_azul(img_gray: Image.Image, dark=(0,20,90), light=(140,190,255)) -
     """
     return ImageOps.colorize(img_gray, black=tuple(dark), white=tuple(light))
 
+def lut_azul(dark=(0,20,90), light=(140,190,255)) -> np.ndarray:
+    """LUT 256x3 idéntica a colorizar_azul (se obtiene coloreando una rampa 0..255)."""
+    rampa = Image.fromarray(np.arange(256, dtype=np.uint8)[None, :])
+    return np.asarray(colorizar_azul(rampa, dark=dark, light=light))[0]
+
 def main():
     ap = argparse.ArgumentParser(description="Ej7: convertir a gris y colorear en azul (como la guía).")
     ap.add_argument("imagen", nargs="?", help="Ruta de la imagen de entrada")
@@ -39,6 +45,12 @@ def main():
                     help="Color para sombras (0..255 0..255 0..255)")
     ap.add_argument("--light", nargs=3, type=int, metavar=("R","G","B"), default=(140,190,255),
                     help="Color para luces (0..255 0..255 0..255)")
+    ap.add_argument("--hilos", type=int, default=1,
+                    help="Hilos para repartir la imagen en bandas de filas (def:1)")
+    ap.add_argument("--luma", choices=("bt601", "bt709", "promedio", "luminosidad"), default="bt601",
+                    help="Fórmula del gris (def: bt601, igual a PIL)")
+    from memo_resultados import agregar_opciones
+    agregar_opciones(ap)
     args = ap.parse_args()
 
     in_path = args.imagen or pedir_archivo_si_falta()
@@ -46,19 +58,41 @@ def main():
         print("Uso: python ej7_aplicar_color.py <ruta_de_imagen> [--show] [--dark r g b] [--light r g b]")
         sys.exit(1)
 
-    p = Path(in_path)
-    if not p.exists():
-        print(f"Archivo no encontrado: {p}")
+    from arreglos_crudos import existe, ruta_base, cargar_rgb
+    if not existe(in_path):
+        print(f"Archivo no encontrado: {in_path}")
         sys.exit(1)
+    p = ruta_base(in_path)          # .npy / shm://nombre también sirven (arreglos_crudos.py)
+    sufijos = ("_GRAY.png", "_color_azul.png", "_comparativa.png")
+
+    # misma entrada + mismos parámetros -> salidas restauradas desde .memo/ (con --show se recalcula)
+    from memo_resultados import abrir_memo
+    memo = abrir_memo(p, args.cache, args.cache_dir)
+    if memo:
+        clave = memo.clave(__file__, in_path, {"luma": args.luma, "dark": list(args.dark),
+                                               "light": list(args.light)})
+        if not args.show and (res := memo.buscar(clave, p)) is not None:
+            memo.close()
+            print("Listo ✅ (caché: acierto, sin recalcular)")
+            for etiqueta, sufijo in zip(("Gris:       ", "Color azul: ", "Comparativa:"), sufijos):
+                print(f"  {etiqueta} {res['salidas'][sufijo]}")
+            return
 
     # 1) Abrir y convertir a gris
-    img = Image.open(p).convert("RGB")
-    gray = img.convert("L")  # gris normal (0.299R + 0.587G + 0.114B)
+    from kernels_color import gris
+    rgb = cargar_rgb(in_path)
+    gray = Image.fromarray(gris(rgb, args.luma, out=np.empty(rgb.shape[:2], dtype=np.uint8)))  # bt601: gris normal (0.299R + 0.587G + 0.114B)
     out_gray = p.with_name(p.stem + "_GRAY.png")
     gray.save(out_gray)
 
     # 2) Colorear en azul (como la lámina)
-    colored = colorizar_azul(gray, dark=args.dark, light=args.light)
+    if args.hilos > 1:
+        # misma LUT que colorize, aplicada por bandas de filas (ver paralelo.py)
+        from paralelo import ejecutor
+        lut = lut_azul(dark=args.dark, light=args.light)
+        colored = Image.fromarray(ejecutor(args.hilos).aplicar_lut(np.asarray(gray), lut))
+    else:
+        colored = colorizar_azul(gray, dark=args.dark, light=args.light)
     out_col = p.with_name(p.stem + "_color_azul.png")
     colored.save(out_col)
 
@@ -76,6 +110,10 @@ def main():
         plt.show()
     plt.close(fig)
 
+    if memo:
+        memo.guardar(clave, __file__, {}, p, sufijos)
+        memo.close()
+
     print("Listo ✅")
     print(f"  Gris:        {out_gray}")
     print(f"  Color azul:  {out_col}")
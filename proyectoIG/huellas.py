@@ -0,0 +1,52 @@
+# huellas.py
+# Hashes de contenido compartidos por incremental.py y memo_resultados.py.
+#
+# Qué hace:
+#   - hash_archivo: blake2b (20 bytes) de los bytes de un archivo, leído por bloques.
+#   - dependencias_locales: el script más todos los módulos de esta carpeta que
+#     importa, directa o indirectamente (también los imports dentro de funciones).
+#   - hash_version: un solo hash de todas esas dependencias; cambia si se edita el
+#     script o cualquier módulo auxiliar (kernels_color, paralelo, momentos_*, ...).
+
+from functools import lru_cache
+from pathlib import Path
+import ast, hashlib
+
+def hash_archivo(path, bloque=1 << 20) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(bloque), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _imports(path: Path):
+    arbol = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    for nodo in ast.walk(arbol):
+        if isinstance(nodo, ast.Import):
+            yield from (a.name.split(".")[0] for a in nodo.names)
+        elif isinstance(nodo, ast.ImportFrom) and nodo.level == 0 and nodo.module:
+            yield nodo.module.split(".")[0]
+
+@lru_cache(maxsize=None)
+def dependencias_locales(script) -> tuple:
+    """Rutas (ordenadas) del script y de los módulos locales que alcanza por imports."""
+    script = Path(script).resolve()
+    carpeta = script.parent
+    vistos, pendientes = set(), [script]
+    while pendientes:
+        f = pendientes.pop()
+        if f in vistos:
+            continue
+        vistos.add(f)
+        for nombre in _imports(f):
+            m = carpeta / f"{nombre}.py"
+            if m.exists() and m not in vistos:
+                pendientes.append(m)
+    return tuple(sorted(vistos))
+
+def hash_version(script, hash_fn=hash_archivo) -> str:
+    """Hash del script y de todas sus dependencias locales (hash_fn(path) por archivo)."""
+    h = hashlib.blake2b(digest_size=20)
+    for f in dependencias_locales(str(Path(script).resolve())):
+        h.update(f"{f.name}:{hash_fn(f)}\n".encode())
+    return h.hexdigest()
@@ -0,0 +1,332 @@
+# incremental.py
+# Uso:
+#   python incremental.py carpeta_corpus/ --jobs ej1a ej6 ej7 [--thresh 128] [--invert] [--smooth 5]
+#   python incremental.py carpeta_corpus/ --jobs ej4 --face lena.png --mask mask_circulo.png --blur 2
+#   Opciones: --manifest ruta.json  --workers 4  --force  --dry-run
+#
+# Qué hace:
+#   - Corre los scripts ej1–ej7 sobre todas las imágenes de una carpeta, pero solo
+#     recalcula lo que cambió desde la última corrida.
+#   - Guarda un manifiesto JSON con, por (job, imagen): hash del contenido,
+#     parámetros, versión del script y rutas de salida.
+#   - Se recalcula una entrada si cambia la imagen (o la cara/plantilla en ej4),
+#     los parámetros, el script o algún módulo local que importe (huellas.py),
+#     o si falta alguna salida.
+#   - Los jobs que escriben el mismo archivo (p.ej. *_GRAY.png de ej3/ej6/ej7) se
+#     corren en serie para esa imagen; el resto, en paralelo.
+#   - Las salidas de los jobs (<stem><sufijo> junto a <stem>.<ext>) no se toman como
+#     entradas del corpus, aunque no figuren en el manifiesto.
+#   - Limpia salidas obsoletas: de imágenes que ya no existen o que dejaron de
+#     generarse (p.ej. al quitar --save-bin).
+#   - Para los scripts que solo imprimen (ej1b, ej1c, ej5, ej6) la salida de consola
+#     se guarda en *_<job>.txt para que el resultado quede persistido.
+
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import argparse, json, os, subprocess, sys
+
+from huellas import hash_archivo, hash_version
+
+AQUI = Path(__file__).resolve().parent
+EXTENSIONES = (".png", ".tif", ".tiff", ".jpg", ".jpeg", ".bmp")
+MANIFIESTO_DEF = ".manifiesto_incremental.json"
+
+# -------- definición de los jobs ----------
+# Cada job: script, parámetros que le afectan, cómo armar la línea de comando
+# y qué archivos produce para una imagen p.
+def _sufijos(p: Path, *sufijos):
+    return [p.with_name(p.stem + s) for s in sufijos]
+
+JOBS = {
+    "ej1a": {
+        "script": "ej1a_area_centroide.py",
+        "params": ("thresh", "invert", "save_bin"),
+        "args": lambda pr: ["--thresh", str(pr["thresh"])]
+                           + (["--invert"] if pr["invert"] else [])
+                           + (["--save-bin"] if pr["save_bin"] else []),
+        "salidas": lambda p, pr: _sufijos(p, "_centroide.png", *(["_bin.png"] if pr["save_bin"] else [])),
+    },
+    "ej1b": {
+        "script": "ej1b_momentos_23.py",
+        "params": ("thresh", "invert"),
+        "args": lambda pr: ["--thresh", str(pr["thresh"])] + (["--invert"] if pr["invert"] else []),
+        "salidas": lambda p, pr: [],
+    },
+    "ej1c": {
+        "script": "ej1c_hu.py",
+        "params": ("thresh", "invert"),
+        "args": lambda pr: ["--thresh", str(pr["thresh"]), "--show-checks", "--show-log"]
+                           + (["--invert"] if pr["invert"] else []),
+        "salidas": lambda p, pr: [],
+    },
+    "ej2": {
+        "script": "ej2_histograma_pil.py",
+        "params": (),
+        "args": lambda pr: [],
+        "salidas": lambda p, pr: _sufijos(p, "_hist_gris.png"),
+    },
+    "ej3": {
+        "script": "ej3_planos_y_gris.py",
+        "params": (),
+        "args": lambda pr: [],
+        "salidas": lambda p, pr: _sufijos(p, "_R.png", "_G.png", "_B.png", "_GRAY.png", "_planos.png"),
+    },
+    "ej4": {
+        "script": "ej4_efectos.py",
+        "params": ("face", "mask", "pos", "size", "blur", "rotate", "opacity", "invert_mask"),
+        "dependencias": ("face", "mask"),
+        "entrada_flag": "--base",
+        "args": lambda pr: ["--face", pr["face"], "--mask", pr["mask"],
+                            "--blur", str(pr["blur"]), "--rotate", str(pr["rotate"]),
+                            "--opacity", str(pr["opacity"])]
+                           + (["--pos", *map(str, pr["pos"])] if pr["pos"] else [])
+                           + (["--size", *map(str, pr["size"])] if pr["size"] else [])
+                           + (["--invert-mask"] if pr["invert_mask"] else []),
+        "salidas": lambda p, pr: _sufijos(p, "_comp.png"),
+    },
+    "ej5": {
+        "script": "ej5_area_planes_rgb.py",
+        "params": ("thresh",),
+        "args": lambda pr: [str(pr["thresh"])],
+        "salidas": lambda p, pr: _sufijos(p, "_plane_R.png", "_plane_G.png", "_plane_B.png", "_fig_planes.png"),
+    },
+    "ej6": {
+        "script": "ej6_histograma_rgb_y_gris.py",
+        "params": ("smooth",),
+        "args": lambda pr: ["--smooth", str(pr["smooth"])],
+        "salidas": lambda p, pr: _sufijos(p, "_hist_rgb_gris.png", "_GRAY.png", "_hist_gray.png"),
+    },
+    "ej7": {
+        "script": "ej7_aplicar_color.py",
+        "params": ("dark", "light"),
+        "args": lambda pr: ["--dark", *map(str, pr["dark"]), "--light", *map(str, pr["light"])],
+        "salidas": lambda p, pr: _sufijos(p, "_GRAY.png", "_color_azul.png", "_comparativa.png"),
+    },
+}
+
+# sufijos que pueden producir los jobs (con todas las opciones activas)
+SUFIJOS_SALIDA = tuple(sorted(
+    {Path(s).name[len("x"):] for d in JOBS.values() for s in d["salidas"](Path("x.png"), {"save_bin": True})}
+    | {f"_{job}.txt" for job in JOBS}))
+
+# -------- hashing ----------
+class CacheHashes:
+    """
+    Reutiliza el hash guardado si (tamaño, mtime) no cambió; así una corrida
+    sin cambios no vuelve a leer el corpus completo.
+    """
+    def __init__(self, previo=None):
+        self.datos = dict(previo or {})
+
+    def hash(self, path: Path) -> str:
+        st = path.stat()
+        clave = str(path.resolve())
+        e = self.datos.get(clave)
+        if e and e["size"] == st.st_size and e["mtime_ns"] == st.st_mtime_ns:
+            return e["hash"]
+        hx = hash_archivo(path)
+        self.datos[clave] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": hx}
+        return hx
+
+# -------- manifiesto ----------
+def cargar_manifiesto(path: Path) -> dict:
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as fh:
+            m = json.load(fh)
+        if m.get("version") == 1:
+            return m
+    return {"version": 1, "entradas": {}, "hashes": {}}
+
+def guardar_manifiesto(path: Path, m: dict):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(m, fh, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+# -------- planificación ----------
+def _es_salida(f: Path, stems: set) -> bool:
+    """True si f es <stem><sufijo> de otra imagen de la misma carpeta."""
+    return any(f.name.endswith(suf) and (f.parent, f.name[:-len(suf)]) in stems for suf in SUFIJOS_SALIDA)
+
+def listar_entradas(corpus: Path, excluir: set) -> list:
+    imagenes = [f for f in corpus.rglob("*") if f.is_file() and f.suffix.lower() in EXTENSIONES]
+    stems = {(f.parent, f.stem) for f in imagenes}
+    return sorted(f for f in imagenes if str(f.resolve()) not in excluir and not _es_salida(f, stems))
+
+def firma(job: str, p: Path, params: dict, hashes: CacheHashes) -> dict:
+    d = JOBS[job]
+    pr = {k: params[k] for k in d["params"]}
+    deps = {k: hashes.hash(Path(params[k])) for k in d.get("dependencias", ())}
+    return {
+        "hash": hashes.hash(p),
+        "params": pr,
+        "deps": deps,
+        "script": hash_version(AQUI / d["script"], hashes.hash),
+    }
+
+def salidas_de(job: str, p: Path, params: dict) -> list:
+    d = JOBS[job]
+    out = [str(s) for s in d["salidas"](p, params)]
+    out.append(str(p.with_name(f"{p.stem}_{job}.txt")))   # consola persistida
+    return out
+
+def planificar(corpus: Path, jobs, params, manifiesto, hashes, force=False, excluir_extra=()):
+    """Devuelve (pendientes, vigentes, obsoletas): qué correr, qué se mantiene y qué borrar."""
+    previas = manifiesto["entradas"]
+    excluir = {s for e in previas.values() for s in e["salidas"]} | set(excluir_extra)
+    entradas = listar_entradas(corpus, excluir)
+
+    pendientes, vigentes = [], {}
+    for job in jobs:
+        for p in entradas:
+            clave = f"{job}::{p.relative_to(corpus).as_posix()}"
+            f = firma(job, p, params, hashes)
+            salidas = salidas_de(job, p, params)
+            nueva = {**f, "salidas": salidas}
+            vieja = previas.get(clave)
+            al_dia = (not force and vieja is not None
+                      and all(vieja.get(k) == nueva[k] for k in ("hash", "params", "deps", "script", "salidas"))
+                      and all(Path(s).exists() for s in salidas))
+            vigentes[clave] = nueva
+            if not al_dia:
+                pendientes.append((clave, job, p))
+
+    # salidas que pertenecían a entradas previas y ya nadie produce
+    vivas = {s for e in vigentes.values() for s in e["salidas"]}
+    jobs_set = set(jobs)
+    obsoletas = set()
+    for clave, e in previas.items():
+        job = clave.split("::", 1)[0]
+        if job not in jobs_set and clave not in vigentes:
+            # job no pedido en esta corrida: se conserva tal cual si su entrada aún existe
+            if (corpus / clave.split("::", 1)[1]).exists():
+                vigentes[clave] = e
+                vivas.update(e["salidas"])
+                continue
+        obsoletas.update(s for s in e["salidas"] if s not in vivas)
+    return pendientes, vigentes, sorted(obsoletas)
+
+# -------- ejecución ----------
+def agrupar(pendientes, params):
+    """Agrupa las tareas que comparten algún archivo de salida (se corren en serie)."""
+    grupos, dueno = [], {}
+    for tarea in pendientes:
+        _, job, p = tarea
+        salidas = salidas_de(job, p, params)
+        previos = sorted({dueno[s] for s in salidas if s in dueno})
+        if previos:
+            g = previos[0]
+            for otro in previos[1:]:
+                grupos[g] += grupos[otro]
+                grupos[otro] = []
+                dueno.update({s: g for s, i in dueno.items() if i == otro})
+            grupos[g].append(tarea)
+        else:
+            g = len(grupos)
+            grupos.append([tarea])
+        dueno.update({s: g for s in salidas})
+    return [g for g in grupos if g]
+
+def ejecutar_serie(tareas, params):
+    return [(clave, *ejecutar(job, p, params)) for clave, job, p in tareas]
+
+def ejecutar(job: str, p: Path, params: dict):
+    d = JOBS[job]
+    cmd = [sys.executable, str(AQUI / d["script"])]
+    cmd += [d["entrada_flag"], str(p)] if "entrada_flag" in d else [str(p)]
+    cmd += d["args"](params)
+    env = dict(os.environ, MPLBACKEND="Agg")
+    r = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=str(p.parent))
+    p.with_name(f"{p.stem}_{job}.txt").write_text(r.stdout, encoding="utf-8")
+    return r.returncode, (r.stderr.strip() or r.stdout.strip()).splitlines()[-1:]
+
+# -------- principal ----------
+def main():
+    ap = argparse.ArgumentParser(description="Corrida incremental de ej1–ej7 sobre un corpus (manifiesto).")
+    ap.add_argument("corpus", help="Carpeta con las imágenes")
+    ap.add_argument("--jobs", nargs="+", choices=sorted(JOBS), required=True, help="Scripts a correr")
+    ap.add_argument("--manifest", help=f"Ruta del manifiesto (def: <corpus>/{MANIFIESTO_DEF})")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo")
+    ap.add_argument("--force", action="store_true", help="Recalcula todo")
+    ap.add_argument("--dry-run", action="store_true", help="Solo muestra qué se haría")
+    # parámetros de ej1–ej7
+    ap.add_argument("--thresh", type=int, default=128, help="Umbral 0..255 (ej1*, ej5)")
+    ap.add_argument("--invert", action="store_true", help="Invierte la máscara (ej1*)")
+    ap.add_argument("--save-bin", action="store_true", help="Guarda la binaria (ej1a)")
+    ap.add_argument("--smooth", type=int, default=3, help="Suavizado visual (ej6)")
+    ap.add_argument("--dark", nargs=3, type=int, default=(0, 20, 90), metavar=("R", "G", "B"), help="ej7")
+    ap.add_argument("--light", nargs=3, type=int, default=(140, 190, 255), metavar=("R", "G", "B"), help="ej7")
+    ap.add_argument("--face", help="Cara (ej4)")
+    ap.add_argument("--mask", help="Plantilla (ej4)")
+    ap.add_argument("--pos", nargs=2, type=int, metavar=("X", "Y"), help="ej4")
+    ap.add_argument("--size", nargs=2, type=int, metavar=("W", "H"), help="ej4")
+    ap.add_argument("--blur", type=int, default=2, help="ej4")
+    ap.add_argument("--rotate", type=float, default=0.0, help="ej4")
+    ap.add_argument("--opacity", type=float, default=1.0, help="ej4")
+    ap.add_argument("--invert-mask", action="store_true", help="ej4")
+    args = ap.parse_args()
+
+    corpus = Path(args.corpus).resolve()
+    if not corpus.is_dir():
+        print(f"Carpeta no encontrada: {corpus}")
+        sys.exit(1)
+    if "ej4" in args.jobs and not (args.face and args.mask):
+        print("ej4 requiere --face y --mask.")
+        sys.exit(1)
+
+    params = {
+        "thresh": args.thresh, "invert": args.invert, "save_bin": args.save_bin, "smooth": args.smooth,
+        "dark": list(args.dark), "light": list(args.light),
+        "face": str(Path(args.face).resolve()) if args.face else None,
+        "mask": str(Path(args.mask).resolve()) if args.mask else None,
+        "pos": args.pos, "size": args.size, "blur": args.blur, "rotate": args.rotate,
+        "opacity": args.opacity, "invert_mask": args.invert_mask,
+    }
+
+    path_m = Path(args.manifest) if args.manifest else corpus / MANIFIESTO_DEF
+    manifiesto = cargar_manifiesto(path_m)
+    hashes = CacheHashes(manifiesto.get("hashes"))
+    # las imágenes de ej4 (cara/plantilla) no son entradas del corpus
+    deps = [params[k] for k in ("face", "mask") if params[k]]
+
+    pendientes, vigentes, obsoletas = planificar(corpus, args.jobs, params, manifiesto, hashes,
+                                                 force=args.force, excluir_extra=deps)
+    al_dia = sum(1 for c in vigentes if c.split("::", 1)[0] in args.jobs) - len(pendientes)
+
+    print(f"Corpus: {corpus}")
+    print(f"Al día: {al_dia}  |  A recalcular: {len(pendientes)}  |  Salidas obsoletas: {len(obsoletas)}")
+    if args.dry_run:
+        for clave, _, _ in pendientes:
+            print(f"  recalcular {clave}")
+        for s in obsoletas:
+            print(f"  borrar     {s}")
+        return
+
+    for s in obsoletas:
+        try:
+            os.remove(s)
+        except FileNotFoundError:
+            pass
+
+    fallidas = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as ex:
+        futuros = [ex.submit(ejecutar_serie, g, params) for g in agrupar(pendientes, params)]
+        for fut in futuros:
+            for clave, rc, ultima in fut.result():
+                if rc != 0:
+                    fallidas.append(clave)
+                    vigentes.pop(clave, None)   # se reintenta en la próxima corrida
+                    print(f"  [FALLO] {clave}: {' '.join(ultima)}")
+
+    manifiesto["entradas"] = vigentes
+    manifiesto["hashes"] = {k: v for k, v in hashes.datos.items() if Path(k).exists()}
+    guardar_manifiesto(path_m, manifiesto)
+
+    print(f"Recalculadas: {len(pendientes) - len(fallidas)}  |  Fallidas: {len(fallidas)}")
+    print(f"Manifiesto: {path_m}")
+    print("Todo OK ✔️" if not fallidas else "Terminado con errores.")
+    if fallidas:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# kernels_color.py
+# Núcleos para gris y planos R/G/B a partir del buffer RGB intercalado (HxWx3 uint8).
+#
+# Qué hace:
+#   - Gris en aritmética entera de punto fijo (pesos escalados a 2^16), con estándares:
+#       * "bt601":       0.299 R + 0.587 G + 0.114 B  (idéntico a PIL img.convert("L"))
+#       * "bt709":       0.2126 R + 0.7152 G + 0.0722 B
+#       * "promedio":    (R + G + B) / 3
+#       * "luminosidad": (max(R,G,B) + min(R,G,B)) / 2
+#   - Planos R/G/B como vistas con stride (sin copia) o copiados a un buffer dado.
+#   - KernelGris: reserva los buffers una vez por tamaño de cuadro y luego convierte
+#     sin asignar memoria (útil en lotes y secuencias de frames).
+#   - gris(): guarda por hilo los últimos MAX_KERNELS núcleos (LRU por tamaño/estándar);
+#     quien llama pasa 'out' (p. ej. buffer_hilo(forma)) para no copiar el resultado.
+
+from collections import OrderedDict
+import threading
+import numpy as np
+
+# pesos enteros que suman 2^16 (bt601 = los mismos de PIL: L24 en Convert.c)
+PESOS = {
+    "bt601": (19595, 38470, 7471),
+    "bt709": (13933, 46871, 4732),
+}
+ESTANDARES = ("bt601", "bt709", "promedio", "luminosidad")
+_REDONDEO = 1 << 15
+MAX_KERNELS = 4      # núcleos de gris por hilo (cada uno reserva ~3 buffers del tamaño del cuadro)
+
+def _validar_rgb(rgb: np.ndarray):
+    if rgb.dtype != np.uint8 or rgb.ndim != 3 or rgb.shape[2] < 3:
+        raise ValueError("Se espera un arreglo HxWx3 (o x4) uint8.")
+
+def planos(rgb: np.ndarray):
+    """(R, G, B) como vistas sin copia del buffer intercalado."""
+    _validar_rgb(rgb)
+    return rgb[..., 0], rgb[..., 1], rgb[..., 2]
+
+def planos_contiguos(rgb: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """Copia los planos a un arreglo (3, H, W) contiguo; reutiliza 'out' si se entrega."""
+    _validar_rgb(rgb)
+    h, w = rgb.shape[:2]
+    if out is None:
+        out = np.empty((3, h, w), dtype=np.uint8)
+    elif out.shape != (3, h, w) or out.dtype != np.uint8:
+        raise ValueError(f"'out' debe ser (3, {h}, {w}) uint8.")
+    for c in range(3):
+        np.copyto(out[c], rgb[..., c])
+    return out
+
+class KernelGris:
+    """
+    Conversión a gris con buffers preasignados para un tamaño fijo:
+        k = KernelGris((h, w), "bt709")
+        g = k(rgb)            # devuelve k.out (se sobrescribe en cada llamada)
+        k(rgb, out=mi_buf)    # o escribe en un buffer propio
+    """
+    def __init__(self, forma, estandar="bt601"):
+        if estandar not in ESTANDARES:
+            raise ValueError(f"Estándar de gris desconocido: {estandar} (usa {', '.join(ESTANDARES)})")
+        self.forma = (int(forma[0]), int(forma[1]))
+        self.estandar = estandar
+        self.out = np.empty(self.forma, dtype=np.uint8)
+        tmp_dt = np.uint16 if estandar in ("promedio", "luminosidad") else np.uint32
+        self._acc = np.empty(self.forma, dtype=tmp_dt)
+        self._aux = np.empty(self.forma, dtype=tmp_dt)
+        self._u8 = np.empty(self.forma, dtype=np.uint8) if estandar == "luminosidad" else None
+
+    def __call__(self, rgb: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        _validar_rgb(rgb)
+        if rgb.shape[:2] != self.forma:
+            raise ValueError(f"Tamaño {rgb.shape[:2]} distinto del reservado {self.forma}.")
+        out = self.out if out is None else out
+        R, G, B = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+        acc, aux = self._acc, self._aux
+        if self.estandar in PESOS:
+            wr, wg, wb = (np.uint32(v) for v in PESOS[self.estandar])
+            np.multiply(R, wr, out=acc)
+            np.multiply(G, wg, out=aux); np.add(acc, aux, out=acc)
+            np.multiply(B, wb, out=aux); np.add(acc, aux, out=acc)
+            np.add(acc, np.uint32(_REDONDEO), out=acc)
+            np.right_shift(acc, 16, out=acc)
+        elif self.estandar == "promedio":
+            np.add(R, G, out=acc, dtype=np.uint16)
+            np.add(acc, B, out=acc)
+            np.add(acc, np.uint16(1), out=acc)          # redondeo de /3
+            np.floor_divide(acc, np.uint16(3), out=acc)
+        else:  # luminosidad
+            u8 = self._u8
+            np.maximum(R, G, out=u8); np.maximum(u8, B, out=u8)
+            np.copyto(acc, u8)
+            np.minimum(R, G, out=u8); np.minimum(u8, B, out=u8)
+            np.add(acc, u8, out=acc)
+            np.add(acc, np.uint16(1), out=acc)
+            np.right_shift(acc, 1, out=acc)
+        np.copyto(out, acc, casting="unsafe")
+        return out
+
+_local = threading.local()     # un juego de buffers por hilo
+
+def _lru_hilo(nombre) -> OrderedDict:
+    d = getattr(_local, nombre, None)
+    if d is None:
+        d = OrderedDict()
+        setattr(_local, nombre, d)
+    return d
+
+def _de_lru(d: OrderedDict, clave, crear):
+    v = d.get(clave)
+    if v is None:
+        v = d[clave] = crear()
+        while len(d) > MAX_KERNELS:
+            d.popitem(last=False)
+    else:
+        d.move_to_end(clave)
+    return v
+
+def buffer_hilo(forma) -> np.ndarray:
+    """
+    Buffer uint8 HxW reutilizable del hilo actual (LRU por tamaño). Sirve como 'out'
+    de gris() cuando el gris no se conserva después de procesar el cuadro.
+    """
+    forma = (int(forma[0]), int(forma[1]))
+    return _de_lru(_lru_hilo("buffers"), forma, lambda: np.empty(forma, dtype=np.uint8))
+
+def gris(rgb: np.ndarray, estandar: str = "bt601", out: np.ndarray = None) -> np.ndarray:
+    """
+    Gris uint8 HxW. Reutiliza un KernelGris por (hilo, tamaño, estándar), así llamadas
+    repetidas con el mismo tamaño no asignan memoria intermedia. Con 'out' se escribe
+    ahí sin copias; sin 'out' se devuelve una copia (el buffer interno se reutiliza).
+    """
+    _validar_rgb(rgb)
+    forma = rgb.shape[:2]
+    if out is not None and (out.shape != forma or out.dtype != np.uint8):
+        raise ValueError(f"'out' debe ser {forma} uint8.")
+    k = _de_lru(_lru_hilo("kernels"), (forma, estandar), lambda: KernelGris(forma, estandar))
+    if out is not None:
+        return k(rgb, out=out)
+    return k(rgb).copy()
@@ -0,0 +1,238 @@
+# lote_async.py
+# Uso:
+#   python lote_async.py carpeta/ --jobs ej1a ej1c ej5 ej6 ej7 [--thresh 128] [--invert]
+#                        [--prefetch 8] [--workers 4] [--procesos] [--cola-escritura 16]
+#                        [--dark R G B] [--light R G B] [--out carpeta_salida/]
+#   Pruebas de latencia: --retardo-lectura 0.05 --retardo-escritura 0.05  (segundos por archivo)
+#
+# Qué hace:
+#   - Corre los cálculos de ej1a/ej1c/ej5/ej6/ej7 sobre todas las imágenes de una
+#     carpeta (pensado para corpus en NFS u otros discos lentos).
+#   - Front end asyncio de tres etapas:
+#       1) lectura: bytes crudos de hasta --prefetch archivos por adelantado, en un
+#          pool de hilos (la lectura bloqueante no frena al bucle de eventos);
+#       2) cómputo: decodificación + análisis en un pool de --workers hilos
+#          (NumPy/PIL liberan el GIL) o procesos (--procesos);
+#       3) escritura: cola asíncrona acotada (--cola-escritura); si se llena, el
+#          cómputo espera (back-pressure) en vez de acumular PNG en memoria.
+#   - Los retardos artificiales simulan la latencia del almacenamiento: con
+#     suficiente prefetch el tiempo total ~ max(lectura, cómputo, escritura)
+#     en lugar de su suma.
+#   - Salida: <carpeta>_lote.csv con una fila por imagen (y las imágenes de ej7).
+
+from PIL import Image
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import argparse, asyncio, csv, io, sys, time
+
+EXTENSIONES = (".png", ".tif", ".tiff", ".jpg", ".jpeg", ".bmp")
+JOBS = ("ej1a", "ej1c", "ej5", "ej6", "ej7")
+SUFIJOS_SALIDA = ("_GRAY.png", "_color_azul.png")   # imágenes que escribe ej7 (no son entradas)
+_FIN = None
+
+# -------- análisis (se ejecuta en el pool de cómputo) ----------
+def _png(img: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+def procesar(nombre, datos: bytes, jobs, thresh=128, invertir=False,
+             dark=(0, 20, 90), light=(140, 190, 255)):
+    """
+    Decodifica 'datos' y corre los jobs pedidos. Devuelve (fila, salidas) con
+    salidas = [(sufijo, bytes_png), ...] para que las escriba la etapa de escritura.
+    """
+    from kernels_color import gris, buffer_hilo
+    t0 = time.perf_counter()
+    rgb = np.asarray(Image.open(io.BytesIO(datos)).convert("RGB"))
+    GR = gris(rgb, out=buffer_hilo(rgb.shape[:2]))   # se codifica a PNG antes de volver
+    fila, salidas = {"imagen": nombre}, []
+
+    B = None
+    if "ej1a" in jobs or "ej1c" in jobs:
+        B = (GR >= thresh).astype(np.uint8)
+        if invertir:
+            B = 1 - B
+        from momentos_contorno import resolver_backend
+        usado, runs = resolver_backend(B, "auto")     # una sola elección para ej1a y ej1c
+    if "ej1a" in jobs:
+        from ej1a_area_centroide import area_pixeles, centroide_por_momentos
+        c = centroide_por_momentos(B, usado, runs)
+        fila["area"] = area_pixeles(B)
+        fila["xc"], fila["yc"] = c if c is not None else (float("nan"), float("nan"))
+    if "ej1c" in jobs:
+        from ej1c_hu import hu_moments
+        fila["H1"], fila["H2"], fila["H3"] = hu_moments(B, backend=usado, runs=runs)
+    if "ej5" in jobs:
+        for c, canal in enumerate("RGB"):
+            fila[f"area_{canal}"] = int(np.count_nonzero(rgb[..., c] >= thresh))
+    if "ej6" in jobs:
+        from ej6_histograma_rgb_y_gris import hist256
+        for canal, P in zip(("R", "G", "B", "gris"), (rgb[..., 0], rgb[..., 1], rgb[..., 2], GR)):
+            fila[f"modo_{canal}"] = int(np.argmax(hist256(P)))
+    if "ej7" in jobs:
+        from ej7_aplicar_color import colorizar_azul
+        gray = Image.fromarray(GR)
+        salidas.append((SUFIJOS_SALIDA[0], _png(gray)))
+        salidas.append((SUFIJOS_SALIDA[1], _png(colorizar_azul(gray, dark=dark, light=light))))
+    fila["t_computo"] = time.perf_counter() - t0
+    return fila, salidas
+
+# -------- E/S bloqueante (corre en el pool de hilos de E/S) ----------
+def _leer(path: Path, retardo: float) -> bytes:
+    if retardo > 0:
+        time.sleep(retardo)
+    return path.read_bytes()
+
+def _escribir(path: Path, datos: bytes, retardo: float):
+    if retardo > 0:
+        time.sleep(retardo)
+    path.write_bytes(datos)
+
+# -------- driver asíncrono ----------
+async def correr_lote(rutas, jobs, salida: Path, thresh=128, invertir=False, prefetch=8,
+                      workers=4, cola_escritura=16, procesos=False,
+                      retardo_lectura=0.0, retardo_escritura=0.0,
+                      dark=(0, 20, 90), light=(140, 190, 255)):
+    """Lee, calcula y escribe solapando las tres etapas. Devuelve (filas, estadísticas)."""
+    loop = asyncio.get_running_loop()
+    pool_es = ThreadPoolExecutor(max_workers=max(1, prefetch), thread_name_prefix="es")
+    pool_cpu = (ProcessPoolExecutor if procesos else ThreadPoolExecutor)(max_workers=max(1, workers))
+    a_computo = asyncio.Queue(maxsize=max(1, prefetch))
+    a_escribir = asyncio.Queue(maxsize=max(1, cola_escritura))
+    filas, stats = [], {"t_lectura": 0.0, "t_escritura": 0.0, "escritos": 0, "errores": 0}
+    cupo = asyncio.Semaphore(max(1, prefetch))
+
+    async def leer_uno(p):
+        try:
+            t0 = time.perf_counter()
+            datos = await loop.run_in_executor(pool_es, _leer, p, retardo_lectura)
+            stats["t_lectura"] += time.perf_counter() - t0
+            await a_computo.put((p, datos))
+        except OSError as e:
+            filas.append({"imagen": p.name, "error": str(e)})
+            stats["errores"] += 1
+        finally:
+            cupo.release()
+
+    async def lector():
+        tareas = []
+        for p in rutas:
+            await cupo.acquire()            # a lo más 'prefetch' lecturas en vuelo
+            tareas.append(asyncio.create_task(leer_uno(p)))
+        await asyncio.gather(*tareas)
+        for _ in range(workers):
+            await a_computo.put(_FIN)
+
+    async def calculador():
+        while (item := await a_computo.get()) is not _FIN:
+            p, datos = item
+            try:
+                fila, salidas = await loop.run_in_executor(
+                    pool_cpu, procesar, p.name, datos, tuple(jobs), thresh, invertir,
+                    tuple(dark), tuple(light))
+            except Exception as e:
+                filas.append({"imagen": p.name, "error": str(e)})
+                stats["errores"] += 1
+                continue
+            filas.append(fila)
+            for sufijo, b in salidas:
+                await a_escribir.put((fila, salida / (p.stem + sufijo), b))   # espera si la cola está llena
+
+    async def escritor():
+        # un error de escritura se anota en la fila de la imagen y se sigue vaciando
+        # la cola: si este escritor muriera, el cómputo quedaría esperando para siempre
+        while (item := await a_escribir.get()) is not _FIN:
+            fila, path, datos = item
+            t0 = time.perf_counter()
+            try:
+                await loop.run_in_executor(pool_es, _escribir, path, datos, retardo_escritura)
+            except Exception as e:
+                msg = f"escritura {path.name}: {e}"
+                fila["error"] = f"{fila['error']}; {msg}" if "error" in fila else msg
+                stats["errores"] += 1
+                continue
+            finally:
+                stats["t_escritura"] += time.perf_counter() - t0
+            stats["escritos"] += 1
+
+    n_escritores = max(1, min(prefetch, cola_escritura))
+    escritores = [asyncio.create_task(escritor()) for _ in range(n_escritores)]
+    try:
+        await asyncio.gather(lector(), *(calculador() for _ in range(workers)))
+        for _ in escritores:
+            await a_escribir.put(_FIN)
+        await asyncio.gather(*escritores)
+    finally:
+        pool_cpu.shutdown()
+        pool_es.shutdown()
+    filas.sort(key=lambda f: f["imagen"])
+    return filas, stats
+
+def guardar_csv(path: Path, filas):
+    columnas = ["imagen"]
+    for f in filas:
+        columnas += [k for k in f if k not in columnas]
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        wr = csv.DictWriter(fh, fieldnames=columnas)
+        wr.writeheader()
+        for f in filas:
+            wr.writerow({k: (f"{v:.6g}" if isinstance(v, float) else v) for k, v in f.items()})
+
+# -------- principal ----------
+def main():
+    ap = argparse.ArgumentParser(description="Lote asíncrono ej1–ej7 con prefetch, pool de cómputo y escritura con back-pressure.")
+    ap.add_argument("carpeta", help="Carpeta con las imágenes")
+    ap.add_argument("--jobs", nargs="+", choices=JOBS, default=list(JOBS), help="Cálculos a correr (def: todos)")
+    ap.add_argument("--thresh", type=int, default=128, help="Umbral 0..255 (def:128)")
+    ap.add_argument("--invert", action="store_true", help="Invierte la máscara (1=figura)")
+    ap.add_argument("--prefetch", type=int, default=8, help="Archivos leídos por adelantado (def:8)")
+    ap.add_argument("--workers", type=int, default=4, help="Workers de cómputo (def:4)")
+    ap.add_argument("--procesos", action="store_true", help="Cómputo en procesos en vez de hilos")
+    ap.add_argument("--cola-escritura", type=int, default=16, help="Capacidad de la cola de escritura (def:16)")
+    ap.add_argument("--retardo-lectura", type=float, default=0.0, help="Retardo artificial por lectura (s)")
+    ap.add_argument("--retardo-escritura", type=float, default=0.0, help="Retardo artificial por escritura (s)")
+    ap.add_argument("--dark", nargs=3, type=int, metavar=("R", "G", "B"), default=(0, 20, 90),
+                    help="Color para tonos oscuros de ej7 (def: 0 20 90)")
+    ap.add_argument("--light", nargs=3, type=int, metavar=("R", "G", "B"), default=(140, 190, 255),
+                    help="Color para tonos claros de ej7 (def: 140 190 255)")
+    ap.add_argument("--out", help="Carpeta de salida (def: la misma carpeta)")
+    args = ap.parse_args()
+    for nombre in ("prefetch", "workers", "cola_escritura"):
+        if getattr(args, nombre) < 1:
+            ap.error(f"--{nombre.replace('_', '-')} debe ser >= 1.")
+
+    carpeta = Path(args.carpeta)
+    if not carpeta.is_dir():
+        print(f"Carpeta no encontrada: {carpeta}")
+        sys.exit(1)
+    # con --out por defecto las salidas de una corrida anterior quedan en la carpeta: se saltan
+    rutas = sorted(p for p in carpeta.iterdir()
+                   if p.suffix.lower() in EXTENSIONES and not p.name.endswith(SUFIJOS_SALIDA))
+    if not rutas:
+        print("La carpeta no tiene imágenes.")
+        sys.exit(1)
+    salida = Path(args.out) if args.out else carpeta
+    salida.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    filas, stats = asyncio.run(correr_lote(
+        rutas, args.jobs, salida, thresh=args.thresh, invertir=args.invert,
+        prefetch=args.prefetch, workers=args.workers, cola_escritura=args.cola_escritura,
+        procesos=args.procesos, retardo_lectura=args.retardo_lectura,
+        retardo_escritura=args.retardo_escritura, dark=args.dark, light=args.light))
+    dt = time.perf_counter() - t0
+
+    out_csv = salida / f"{carpeta.resolve().name}_lote.csv"
+    guardar_csv(out_csv, filas)
+    t_cpu = sum(f.get("t_computo", 0.0) for f in filas)
+    print(f"Imágenes: {len(rutas)}  |  Errores: {stats['errores']}  |  Archivos escritos: {stats['escritos']}")
+    print(f"Tiempo total: {dt:.2f} s  ({len(rutas) / dt:.1f} img/s)")
+    print(f"Suma de etapas: lectura {stats['t_lectura']:.2f} s + cómputo {t_cpu:.2f} s "
+          f"+ escritura {stats['t_escritura']:.2f} s")
+    print(f"Resultados: {out_csv}")
+    print("Todo OK ✔️")
+
+if __name__ == "__main__":
+    main()
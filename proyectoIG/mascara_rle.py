@@ -0,0 +1,188 @@
+# mascara_rle.py
+# Uso:
+#   python mascara_rle.py ruta/figura.png [--thresh 128] [--invert]   -> guarda *_bin.rle
+#   python mascara_rle.py ruta/figura_bin.rle [--png]                  -> resumen (y *_bin.png)
+#
+# Qué hace:
+#   - Máscara binaria compacta: runs por fila (y, x0, x1) en vez de 1 byte por píxel,
+#     con conversión a/desde np.packbits (1 bit por píxel) y a/desde el arreglo denso
+#     0/1 que devuelve binarizar() en ej1a/ej1b/ej1c.
+#   - Área, bounding box, momentos (p+q <= 3), centroide y centrales directamente
+#     sobre los runs (ver momentos_contorno.py), sin volver a la forma densa.
+#   - Formato .rle sin pérdida: cabecera + runs o packbits (el que pese menos), zlib.
+
+from pathlib import Path
+import argparse, struct, sys, zlib
+import numpy as np
+
+from momentos_contorno import runs_por_fila, momentos_raw_por_runs, momentos_centrales_desde_raw
+
+_MAGIA = b"RLE1"
+_CABECERA = struct.Struct("<4sBBII")     # magia, versión, codificación, h, w
+_COD_RUNS, _COD_BITS = 0, 1
+
+class MascaraRLE:
+    """Máscara binaria como runs horizontales: ys, x0, x1 (x1 inclusivo), ordenados por (y, x0)."""
+
+    def __init__(self, forma, ys, x0, x1):
+        self.forma = (int(forma[0]), int(forma[1]))
+        dt = np.uint16 if max(self.forma) <= np.iinfo(np.uint16).max else np.uint32
+        self.ys = np.asarray(ys, dtype=dt)
+        self.x0 = np.asarray(x0, dtype=dt)
+        self.x1 = np.asarray(x1, dtype=dt)
+
+    # ---- conversiones ----
+    @classmethod
+    def desde_densa(cls, B: np.ndarray) -> "MascaraRLE":
+        return cls(B.shape, *runs_por_fila(B))
+
+    def a_densa(self, dtype=np.uint8) -> np.ndarray:
+        """Arreglo 0/1 (como binarizar). Pinta cada run con una diferencia acumulada por fila."""
+        h, w = self.forma
+        d = np.zeros((h, w + 1), dtype=np.int32)
+        ys = self.ys.astype(np.intp)
+        np.add.at(d, (ys, self.x0.astype(np.intp)), 1)
+        np.add.at(d, (ys, self.x1.astype(np.intp) + 1), -1)
+        return np.cumsum(d[:, :w], axis=1).astype(dtype)
+
+    @classmethod
+    def desde_packbits(cls, bits: np.ndarray, forma) -> "MascaraRLE":
+        h, w = forma
+        B = np.unpackbits(bits.reshape(h, -1), axis=1, count=w)
+        return cls.desde_densa(B)
+
+    def a_packbits(self) -> np.ndarray:
+        """(h, ceil(w/8)) uint8, 1 bit por píxel."""
+        return np.packbits(self.a_densa(np.uint8), axis=1)
+
+    # ---- medidas ----
+    def _runs_i64(self):
+        return self.ys.astype(np.int64), self.x0.astype(np.int64), self.x1.astype(np.int64)
+
+    @property
+    def n_runs(self) -> int:
+        return int(self.ys.size)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ys.nbytes + self.x0.nbytes + self.x1.nbytes
+
+    def area(self) -> int:
+        return int((self.x1.astype(np.int64) - self.x0 + 1).sum())
+
+    def bbox(self):
+        """(xmin, ymin, xmax, ymax) inclusivo, o None si está vacía."""
+        if self.n_runs == 0:
+            return None
+        return int(self.x0.min()), int(self.ys[0]), int(self.x1.max()), int(self.ys[-1])
+
+    def momentos(self, orden=3) -> dict:
+        """{(p, q): m_pq int exacto} para p + q <= orden."""
+        return momentos_raw_por_runs(*self._runs_i64(), orden=orden)
+
+    def momentos_centrales(self, orden=3) -> dict:
+        return momentos_centrales_desde_raw(self.momentos(orden), orden=orden)
+
+    def centroide(self):
+        m = self.momentos(orden=1)
+        if m[(0, 0)] == 0:
+            return None
+        return (m[(1, 0)] / m[(0, 0)], m[(0, 1)] / m[(0, 0)])
+
+    # ---- disco ----
+    def a_bytes(self) -> bytes:
+        h, w = self.forma
+        # runs: cantidad de runs por fila + (x0, largo) ; se elige lo más chico vs packbits
+        por_fila = np.bincount(self.ys.astype(np.intp), minlength=h).astype(np.uint32)
+        dt = np.uint16 if w <= np.iinfo(np.uint16).max else np.uint32
+        largo = (self.x1.astype(np.int64) - self.x0 + 1).astype(dt)
+        crudo_runs = por_fila.tobytes() + self.x0.astype(dt).tobytes() + largo.tobytes()
+        # packbits ocupa h * ceil(w/8): solo se arma la densa si de verdad gana
+        if len(crudo_runs) <= h * ((w + 7) // 8):
+            cod, cuerpo = _COD_RUNS, crudo_runs
+        else:
+            cod, cuerpo = _COD_BITS, self.a_packbits().tobytes()
+        return _CABECERA.pack(_MAGIA, 1, cod, h, w) + zlib.compress(cuerpo, 6)
+
+    @classmethod
+    def desde_bytes(cls, datos: bytes) -> "MascaraRLE":
+        magia, version, cod, h, w = _CABECERA.unpack_from(datos)
+        if magia != _MAGIA or version != 1:
+            raise ValueError("Archivo .rle inválido o de versión no soportada.")
+        cuerpo = zlib.decompress(datos[_CABECERA.size:])
+        if cod == _COD_BITS:
+            return cls.desde_packbits(np.frombuffer(cuerpo, np.uint8), (h, w))
+        dt = np.uint16 if w <= np.iinfo(np.uint16).max else np.uint32
+        por_fila = np.frombuffer(cuerpo, np.uint32, h)
+        n = int(por_fila.sum())
+        off = por_fila.nbytes
+        x0 = np.frombuffer(cuerpo, dt, n, off).astype(np.int64)
+        largo = np.frombuffer(cuerpo, dt, n, off + n * np.dtype(dt).itemsize).astype(np.int64)
+        ys = np.repeat(np.arange(h, dtype=np.int64), por_fila)
+        return cls((h, w), ys, x0, x0 + largo - 1)
+
+    def guardar(self, path):
+        Path(path).write_bytes(self.a_bytes())
+
+    @classmethod
+    def cargar(cls, path) -> "MascaraRLE":
+        return cls.desde_bytes(Path(path).read_bytes())
+
+    def __eq__(self, otra):
+        return (isinstance(otra, MascaraRLE) and self.forma == otra.forma
+                and np.array_equal(self.ys, otra.ys) and np.array_equal(self.x0, otra.x0)
+                and np.array_equal(self.x1, otra.x1))
+
+    def __repr__(self):
+        h, w = self.forma
+        return f"MascaraRLE({w}x{h}, runs={self.n_runs}, área={self.area()})"
+
+def cargar_mascara(path) -> np.ndarray:
+    """Máscara densa 0/1 desde un .rle (para usar en lugar de binarizar)."""
+    return MascaraRLE.cargar(path).a_densa()
+
+# -------- principal ----------
+def main():
+    ap = argparse.ArgumentParser(description="Máscara binaria RLE: crear, inspeccionar y convertir.")
+    ap.add_argument("entrada", help="Imagen (se binariza) o archivo .rle")
+    ap.add_argument("--thresh", type=int, default=128, help="Umbral 0..255 (def:128)")
+    ap.add_argument("--invert", action="store_true", help="Invierte la máscara (1=figura)")
+    ap.add_argument("--png", action="store_true", help="Con entrada .rle: exporta *_bin.png")
+    args = ap.parse_args()
+
+    p = Path(args.entrada)
+    if not p.exists():
+        print(f"Archivo no encontrado: {p}")
+        sys.exit(1)
+
+    if p.suffix.lower() == ".rle":
+        try:
+            M = MascaraRLE.cargar(p)
+        except (ValueError, struct.error, zlib.error) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        out = None
+        if args.png:
+            from PIL import Image
+            out = p.with_name(p.stem + ".png") if p.stem.endswith("_bin") else p.with_name(p.stem + "_bin.png")
+            Image.fromarray(M.a_densa() * 255).save(out)
+    else:
+        from PIL import Image
+        from ej1a_area_centroide import binarizar
+        B = binarizar(Image.open(p), thresh=args.thresh, invertir=args.invert)
+        M = MascaraRLE.desde_densa(B)
+        out = p.with_name(p.stem + "_bin.rle")
+        M.guardar(out)
+
+    h, w = M.forma
+    c = M.centroide()
+    print(repr(M))
+    print(f"Bounding box (x0,y0,x1,y1): {M.bbox()}")
+    if c is not None:
+        print(f"Centroide (x,y): ({c[0]:.6f}, {c[1]:.6f})")
+    print(f"Memoria: densa={h * w} B | packbits={h * ((w + 7) // 8)} B | runs={M.nbytes} B")
+    if out:
+        print(f"Guardado: {out} ({Path(out).stat().st_size} B)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# memo_resultados.py
+# Memoización persistente de resultados: si ej1c / ej6 / ej7 se vuelven a correr
+# sobre la misma imagen con los mismos parámetros, se devuelven los números y las
+# salidas guardadas sin recalcular.
+#
+# Qué hace:
+#   - Desactivada por defecto: se activa con --cache (base en .memo/ junto a la imagen)
+#     o --cache-dir DIR (base en DIR, p. ej. compartida fuera de las carpetas de imágenes).
+#   - Clave = blake2b(script + versión + contenido de la entrada + parámetros). La
+#     versión es huellas.hash_version: el script y todos los módulos locales que importa.
+#     El contenido es el hash de los bytes del archivo (reutilizado mientras no cambie
+#     tamaño/mtime) o, para shm://nombre, el de los píxeles.
+#   - Base SQLite:
+#       memo        clave -> resultado JSON, bytes, último uso
+#       artefactos  clave, sufijo -> objeto (hash del PNG de salida)
+#       objetos     PNG de salida guardados por contenido en .memo/objetos/
+#       hashes      ruta -> hash del contenido (válido mientras no cambie tamaño/mtime)
+#       stats       aciertos / fallos
+#   - En un acierto se restauran las salidas que falten o cuyo contenido (hash) no
+#     coincida con el guardado, copiándolas desde objetos/.
+#   - Tamaño acotado (def: 256 MB por carpeta): se expulsan las entradas usadas hace
+#     más tiempo (LRU) y los objetos que ya nadie referencia. Antes se borran los
+#     hashes de archivos que ya no existen o cambiaron.
+#
+# Uso:
+#   python ej1c_hu.py fig.png --thresh 100 --cache        (2da corrida: "memo: acierto")
+#   python ej6_histograma_rgb_y_gris.py foto.png --cache-dir ~/.cache/proyectoIG
+#   python memo_resultados.py stats  carpeta/              (carpeta con .memo/, o el DIR de --cache-dir)
+#   python memo_resultados.py podar  carpeta/ --max-mb 64
+#   python memo_resultados.py vaciar carpeta/
+
+import argparse, hashlib, json, os, shutil, sqlite3, sys, time
+from pathlib import Path
+from huellas import hash_archivo, hash_version
+
+DIR_MEMO = ".memo"
+MAX_BYTES_DEF = 256 << 20
+VERSION = 1          # subir si cambia el formato de los resultados guardados
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS memo (
+    clave TEXT PRIMARY KEY, script TEXT, resultado TEXT, bytes INTEGER,
+    creado REAL, ultimo_uso REAL);
+CREATE TABLE IF NOT EXISTS artefactos (
+    clave TEXT, sufijo TEXT, objeto TEXT, PRIMARY KEY (clave, sufijo));
+CREATE TABLE IF NOT EXISTS objetos (objeto TEXT PRIMARY KEY, bytes INTEGER);
+CREATE TABLE IF NOT EXISTS hashes (
+    ruta TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT);
+CREATE TABLE IF NOT EXISTS stats (nombre TEXT PRIMARY KEY, valor INTEGER);
+"""
+
+class Memo:
+    """Caché de resultados en carpeta/.memo/, o directamente en dir_memo (ver cabecera)."""
+    def __init__(self, carpeta=None, max_bytes=MAX_BYTES_DEF, dir_memo=None):
+        self.dir = Path(dir_memo) if dir_memo else Path(carpeta) / DIR_MEMO
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(self.dir / "memo.sqlite", timeout=30)
+        self.db.executescript(_ESQUEMA)
+
+    def close(self):
+        self.db.close()
+
+    # -------- claves ----------
+    def hash_entrada(self, ruta) -> str:
+        """Hash del contenido: bytes del archivo (cacheado por tamaño/mtime) o píxeles de shm://."""
+        from arreglos_crudos import PREFIJO_SHM, cargar
+        s = str(ruta)
+        if s.startswith(PREFIJO_SHM):
+            a = cargar(s)
+            h = hashlib.blake2b(f"{a.dtype}{a.shape}".encode(), digest_size=20)
+            h.update(memoryview(a).cast("B") if a.flags.c_contiguous else a.tobytes())
+            return h.hexdigest()
+        p = Path(s).resolve()
+        st = p.stat()
+        fila = self.db.execute("SELECT size, mtime_ns, hash FROM hashes WHERE ruta=?", (str(p),)).fetchone()
+        if fila and fila[0] == st.st_size and fila[1] == st.st_mtime_ns:
+            return fila[2]
+        hx = hash_archivo(p)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO hashes VALUES (?,?,?,?)",
+                            (str(p), st.st_size, st.st_mtime_ns, hx))
+        return hx
+
+    def clave(self, script, entrada, params: dict) -> str:
+        """Clave de (script, versión del script y sus módulos, contenido de la entrada, parámetros)."""
+        h = hashlib.blake2b(digest_size=20)
+        h.update(json.dumps([VERSION, Path(script).name, hash_version(script),
+                             self.hash_entrada(entrada), params], sort_keys=True).encode())
+        return h.hexdigest()
+
+    # -------- consulta / guardado ----------
+    def _contar(self, nombre):
+        self.db.execute("INSERT INTO stats VALUES (?, 1) ON CONFLICT(nombre) DO UPDATE SET valor=valor+1",
+                        (nombre,))
+
+    def _ruta_objeto(self, objeto) -> Path:
+        return self.dir / "objetos" / objeto[:2] / objeto
+
+    def buscar(self, clave, base: Path):
+        """
+        Resultado guardado (dict) o None. En un acierto restaura las salidas
+        <base.stem><sufijo> que falten o cuyo contenido no sea el guardado, y agrega
+        resultado["salidas"] = {sufijo: ruta}.
+        """
+        with self.db:
+            fila = self.db.execute("SELECT resultado FROM memo WHERE clave=?", (clave,)).fetchone()
+            arts = self.db.execute("SELECT sufijo, objeto FROM artefactos WHERE clave=?", (clave,)).fetchall()
+            if fila is None or not all(self._ruta_objeto(o).exists() for _, o in arts):
+                self._contar("fallos")
+                return None
+            self._contar("aciertos")
+            self.db.execute("UPDATE memo SET ultimo_uso=? WHERE clave=?", (time.time(), clave))
+        res = json.loads(fila[0])
+        res["salidas"] = {}
+        for sufijo, objeto in arts:
+            destino = base.with_name(base.stem + sufijo)
+            # objeto = hash del contenido guardado; hash_entrada lo recalcula solo si
+            # cambió tamaño/mtime del destino
+            if not destino.exists() or self.hash_entrada(destino) != objeto:
+                shutil.copyfile(self._ruta_objeto(objeto), destino)
+            res["salidas"][sufijo] = str(destino)
+        return res
+
+    def guardar(self, clave, script, resultado: dict, base: Path = None, sufijos=()):
+        """Guarda 'resultado' (JSON) y copia las salidas <base.stem><sufijo> al almacén de objetos."""
+        texto = json.dumps(resultado)
+        arts = []
+        for sufijo in sufijos:
+            src = base.with_name(base.stem + sufijo)
+            objeto = hash_archivo(src)
+            dst = self._ruta_objeto(objeto)
+            if not dst.exists():
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                # copia temporal + os.replace: otro proceso nunca ve un objeto a medias
+                tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+                shutil.copyfile(src, tmp)
+                os.replace(tmp, dst)
+            arts.append((sufijo, objeto, dst.stat().st_size))
+        ahora = time.time()
+        with self.db:
+            self.db.execute("DELETE FROM artefactos WHERE clave=?", (clave,))
+            self.db.execute("INSERT OR REPLACE INTO memo VALUES (?,?,?,?,?,?)",
+                            (clave, Path(script).name, texto, len(texto), ahora, ahora))
+            for sufijo, objeto, n in arts:
+                self.db.execute("INSERT OR REPLACE INTO artefactos VALUES (?,?,?)", (clave, sufijo, objeto))
+                self.db.execute("INSERT OR IGNORE INTO objetos VALUES (?,?)", (objeto, n))
+        self.podar()
+
+    # -------- tamaño / estadísticas ----------
+    def tamano(self) -> int:
+        a = self.db.execute("SELECT COALESCE(SUM(bytes), 0) FROM memo").fetchone()[0]
+        b = self.db.execute("SELECT COALESCE(SUM(bytes), 0) FROM objetos").fetchone()[0]
+        c = self.db.execute("SELECT COALESCE(SUM(LENGTH(ruta) + LENGTH(hash) + 16), 0) FROM hashes").fetchone()[0]
+        return int(a + b + c)
+
+    def _podar_hashes(self):
+        """Borra los hashes de archivos que ya no existen o cambiaron (no volverían a servir)."""
+        viejos = []
+        for ruta, size, mtime_ns in self.db.execute("SELECT ruta, size, mtime_ns FROM hashes").fetchall():
+            try:
+                st = os.stat(ruta)
+                if st.st_size == size and st.st_mtime_ns == mtime_ns:
+                    continue
+            except OSError:
+                pass
+            viejos.append((ruta,))
+        with self.db:
+            self.db.executemany("DELETE FROM hashes WHERE ruta=?", viejos)
+
+    def podar(self, max_bytes=None) -> int:
+        """Expulsa entradas LRU hasta quedar bajo max_bytes; devuelve cuántas se expulsaron."""
+        limite = self.max_bytes if max_bytes is None else max_bytes
+        if self.tamano() <= limite:
+            return 0
+        self._podar_hashes()
+        total, n = self.tamano(), 0
+        with self.db:
+            for (clave,) in self.db.execute("SELECT clave FROM memo ORDER BY ultimo_uso").fetchall():
+                if total <= limite:
+                    break
+                self.db.execute("DELETE FROM memo WHERE clave=?", (clave,))
+                self.db.execute("DELETE FROM artefactos WHERE clave=?", (clave,))
+                huerfanos = self.db.execute(
+                    "SELECT objeto FROM objetos WHERE objeto NOT IN (SELECT objeto FROM artefactos)").fetchall()
+                for (objeto,) in huerfanos:
+                    self._ruta_objeto(objeto).unlink(missing_ok=True)
+                    self.db.execute("DELETE FROM objetos WHERE objeto=?", (objeto,))
+                total, n = self.tamano(), n + 1
+            if total > limite:
+                self.db.execute("DELETE FROM hashes")     # sin entradas: solo queda esta caché
+        return n
+
+    def estadisticas(self) -> dict:
+        st = dict(self.db.execute("SELECT nombre, valor FROM stats").fetchall())
+        return {"entradas": self.db.execute("SELECT COUNT(*) FROM memo").fetchone()[0],
+                "objetos": self.db.execute("SELECT COUNT(*) FROM objetos").fetchone()[0],
+                "bytes": self.tamano(), "aciertos": st.get("aciertos", 0), "fallos": st.get("fallos", 0)}
+
+    def vaciar(self):
+        with self.db:
+            for t in ("memo", "artefactos", "objetos", "hashes", "stats"):
+                self.db.execute(f"DELETE FROM {t}")
+        shutil.rmtree(self.dir / "objetos", ignore_errors=True)
+
+def agregar_opciones(ap: argparse.ArgumentParser):
+    """Opciones --cache / --cache-dir comunes a ej1c, ej6 y ej7."""
+    ap.add_argument("--cache", action="store_true",
+                    help="Reutiliza resultados de la caché .memo/ junto a la imagen (memo_resultados.py)")
+    ap.add_argument("--cache-dir", metavar="DIR",
+                    help="Como --cache, pero con la caché en DIR (no escribe en la carpeta de la imagen)")
+
+def abrir_memo(base: Path, activado=False, carpeta=None):
+    """
+    Memo en 'carpeta' (--cache-dir) o en .memo/ junto a 'base' (--cache); None si no se
+    pidió caché o si no se puede escribir.
+    """
+    if not (activado or carpeta):
+        return None
+    try:
+        if carpeta:
+            return Memo(dir_memo=Path(carpeta).expanduser())
+        return Memo(Path(base).resolve().parent)
+    except (OSError, sqlite3.Error):
+        return None
+
+# -------- principal ----------
+def main():
+    ap = argparse.ArgumentParser(description="Caché de resultados (.memo/): estadísticas, poda y vaciado.")
+    ap.add_argument("cmd", choices=("stats", "podar", "vaciar"))
+    ap.add_argument("carpeta", nargs="?", default=".",
+                    help="Carpeta de las imágenes (con .memo/) o el DIR de --cache-dir (def: .)")
+    ap.add_argument("--max-mb", type=float, default=MAX_BYTES_DEF / (1 << 20),
+                    help="Límite para 'podar' en MB (def:256)")
+    args = ap.parse_args()
+
+    carpeta = Path(args.carpeta).expanduser()
+    if (carpeta / DIR_MEMO).is_dir():
+        carpeta = carpeta / DIR_MEMO
+    elif not (carpeta / "memo.sqlite").is_file():
+        print(f"No hay caché en: {carpeta}")
+        sys.exit(1)
+    try:
+        m = Memo(dir_memo=carpeta)
+        if args.cmd == "podar":
+            n = m.podar(int(args.max_mb * (1 << 20)))
+            print(f"Expulsadas: {n}")
+        elif args.cmd == "vaciar":
+            m.vaciar()
+            print("Caché vaciada.")
+        e = m.estadisticas()
+        consultas = e["aciertos"] + e["fallos"]
+        tasa = f"{e['aciertos'] / consultas:.1%}" if consultas else "-"
+        print(f"Entradas: {e['entradas']}  |  Objetos: {e['objetos']}  |  Tamaño: {e['bytes'] / (1 << 20):.2f} MB")
+        print(f"Aciertos: {e['aciertos']}  |  Fallos: {e['fallos']}  |  Tasa de acierto: {tasa}")
+        m.close()
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
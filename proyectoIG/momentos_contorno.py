@@ -0,0 +1,168 @@
+# momentos_contorno.py
+# Uso (compara backends área vs contorno):
+#   python momentos_contorno.py ruta/figura.png [--thresh 128] [--invert]
+#
+# Qué hace:
+#   - Momentos m_pq (p+q <= 3) de una figura binaria a partir de sus RUNS por fila
+#     (tramos horizontales [x0, x1] de píxeles figura), en vez de recorrer cada
+#     píxel interior. Es la versión discreta del teorema de Green: cada run aporta
+#       y^q * sum_{x=x0}^{x1} x^p = y^q * (S_p(x1) - S_p(x0 - 1))
+#     con S_p las sumas cerradas de potencias (Faulhaber). Resultado exacto (enteros).
+#   - El costo de los momentos es proporcional al número de runs (≈ perímetro),
+#     no al área. Extraer los runs desde la máscara densa sí es una pasada O(área),
+#     pero sin potencias ni productos por píxel.
+#   - 'auto' elige por razón de llenado (px figura / px de la caja envolvente):
+#     contorno para figuras sólidas (llenado alto), área para máscaras ralas o
+#     ruidosas. Con --precision float32 o --hilos > 1 'auto' usa área (el camino
+#     por runs es siempre exacto y de un hilo); "exacto" sí se respeta por runs.
+
+from fractions import Fraction
+from math import comb
+from pathlib import Path
+import argparse, sys, time
+import numpy as np
+
+BACKENDS = ("area", "contorno", "auto")
+LLENADO_MIN = 0.5       # razón de llenado desde la cual conviene 'contorno'
+ORDEN_MAX = 3
+
+# -------- runs ----------
+def runs_por_fila(B: np.ndarray):
+    """(ys, x0, x1) int64 de cada run horizontal de 1s; x1 inclusivo. Ordenados por (y, x0)."""
+    b = (np.asarray(B) != 0).view(np.int8)
+    h, w = b.shape
+    pad = np.zeros((h, w + 2), dtype=np.int8)
+    pad[:, 1:-1] = b
+    d = np.diff(pad, axis=1)
+    ys, x0 = np.nonzero(d == 1)
+    _, x1 = np.nonzero(d == -1)
+    return ys.astype(np.int64), x0.astype(np.int64), x1.astype(np.int64) - 1
+
+def _suma_potencias(n: np.ndarray, p: int) -> np.ndarray:
+    """S_p(n) = sum_{x=0}^{n} x^p (int64, vectorizado). S_p(-1) = 0."""
+    if p == 0:
+        return n + 1
+    if p == 1:
+        return n * (n + 1) // 2
+    if p == 2:
+        return n * (n + 1) * (2 * n + 1) // 6
+    if p == 3:
+        t = n * (n + 1) // 2
+        return t * t
+    raise ValueError("Solo se soportan órdenes p <= 3.")
+
+def momentos_raw_por_runs(ys, x0, x1, orden=ORDEN_MAX) -> dict:
+    """
+    {(p, q): m_pq int exacto} para p + q <= orden, a partir de runs.
+    Las sumas por run y por fila van en int64; la suma final por filas, en int de Python.
+    """
+    if orden > ORDEN_MAX:
+        raise ValueError(f"Orden máximo soportado: {ORDEN_MAX}")
+    out = {(p, q): 0 for p in range(orden + 1) for q in range(orden + 1 - p)}
+    if ys.size == 0:
+        return out
+    # runs ordenados por fila: agrupar con reduceat
+    inicio = np.flatnonzero(np.r_[True, ys[1:] != ys[:-1]])
+    filas = ys[inicio].astype(object)
+    for p in range(orden + 1):
+        c = _suma_potencias(x1, p) - _suma_potencias(x0 - 1, p)
+        R = np.add.reduceat(c, inicio).astype(object)
+        for q in range(orden + 1 - p):
+            out[(p, q)] = int(np.dot(R, filas ** q)) if q else int(R.sum())
+    return out
+
+def momentos_centrales_desde_raw(m: dict, orden=ORDEN_MAX, exacto=False) -> dict:
+    """
+    {(p, q): μ_pq} por expansión binomial exacta alrededor del centroide racional;
+    float, o Fraction sin redondear con exacto=True.
+    """
+    m00 = m[(0, 0)]
+    if m00 == 0:
+        return {k: (Fraction(0) if exacto else 0.0) for k in m}
+    xc, yc = Fraction(m[(1, 0)], m00), Fraction(m[(0, 1)], m00)
+    mu = {}
+    for p in range(orden + 1):
+        for q in range(orden + 1 - p):
+            v = sum(comb(p, i) * comb(q, j) * (-xc) ** (p - i) * (-yc) ** (q - j) * m[(i, j)]
+                    for i in range(p + 1) for j in range(q + 1))
+            mu[(p, q)] = v if exacto else float(v)
+    return mu
+
+# -------- selección de backend ----------
+def razon_llenado(runs) -> float:
+    """px figura / px de la caja envolvente (1.0 si la figura está vacía)."""
+    ys, x0, x1 = runs
+    if ys.size == 0:
+        return 1.0
+    caja = (int(ys[-1]) - int(ys[0]) + 1) * (int(x1.max()) - int(x0.min()) + 1)
+    return float((x1 - x0 + 1).sum()) / caja
+
+def elegir_backend(B: np.ndarray, runs=None, modo="float64", hilos=1) -> str:
+    """
+    'contorno' si la razón de llenado es >= LLENADO_MIN, si no 'area'. Con modo
+    float32 o hilos > 1 siempre 'area' (el camino por runs no los usa).
+    """
+    if modo == "float32" or hilos > 1:
+        return "area"
+    return "contorno" if razon_llenado(runs if runs is not None else runs_por_fila(B)) >= LLENADO_MIN else "area"
+
+def resolver_backend(B: np.ndarray, backend="auto", modo="float64", hilos=1, runs=None):
+    """
+    (backend efectivo, runs o None). 'contorno' explícito con float32 o hilos > 1
+    es un error: esas opciones no tendrían efecto. 'runs' ya calculados de B se reutilizan.
+    """
+    if backend == "area":
+        return "area", None
+    if backend == "contorno" and (modo == "float32" or hilos > 1):
+        raise ValueError("--backend contorno es exacto y de un hilo: no admite --precision float32 ni --hilos.")
+    if runs is None:
+        runs = runs_por_fila(B)
+    if backend == "contorno" or elegir_backend(B, runs, modo, hilos) == "contorno":
+        return "contorno", runs
+    return "area", None
+
+def momentos_contorno(B: np.ndarray, orden=ORDEN_MAX):
+    """(raw, centrales) como dicts {(p, q): valor} usando runs."""
+    m = momentos_raw_por_runs(*runs_por_fila(B), orden=orden)
+    return m, momentos_centrales_desde_raw(m, orden=orden)
+
+# -------- principal ----------
+def main():
+    from PIL import Image
+    from ej1a_area_centroide import binarizar
+    from ej1c_hu import raw_moment, central_moment
+    ap = argparse.ArgumentParser(description="Momentos por runs (contorno) vs por área.")
+    ap.add_argument("imagen", help="Ruta de la figura")
+    ap.add_argument("--thresh", type=int, default=128, help="Umbral 0..255 (def:128)")
+    ap.add_argument("--invert", action="store_true", help="Invierte la máscara (1=figura)")
+    args = ap.parse_args()
+
+    p = Path(args.imagen)
+    if not p.exists():
+        print(f"Archivo no encontrado: {p}")
+        sys.exit(1)
+    B = binarizar(Image.open(p), thresh=args.thresh, invertir=args.invert)
+
+    t0 = time.perf_counter()
+    runs = runs_por_fila(B)
+    m = momentos_raw_por_runs(*runs)
+    mu = momentos_centrales_desde_raw(m)
+    t_cont = time.perf_counter() - t0
+    if m[(0, 0)] == 0:
+        print("Figura vacía (m00=0). Ajusta --thresh o usa --invert.")
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    xc, yc = m[(1, 0)] / m[(0, 0)], m[(0, 1)] / m[(0, 0)]
+    area = {k: (raw_moment(B, *k), central_moment(B, *k, xc, yc)) for k in m}
+    t_area = time.perf_counter() - t0
+
+    print(f"Imagen: {p.name}  |  {B.shape[1]}x{B.shape[0]}  |  Runs: {runs[0].size}  |  "
+          f"Llenado: {razon_llenado(runs):.2f}  |  Backend auto: {elegir_backend(B, runs)}")
+    print(f"{'pq':>3s} {'m_pq (runs)':>24s} {'m_pq (área)':>24s} {'μ_pq (runs)':>14s} {'μ_pq (área)':>14s}")
+    for k in sorted(m):
+        print(f"{k[0]}{k[1]:>2d} {m[k]:>24d} {area[k][0]:>24.1f} {mu[k]:>14.6e} {area[k][1]:>14.6e}")
+    print(f"Tiempos (s): contorno={t_cont:.4f}  área={t_area:.4f}")
+
+if __name__ == "__main__":
+    main()
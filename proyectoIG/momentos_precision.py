@@ -0,0 +1,172 @@
+# momentos_precision.py
+# Uso (reporte de error entre modos):
+#   python momentos_precision.py ruta/figura.png [--thresh 128] [--invert]
+#
+# Qué hace:
+#   - Momentos raw y centrales de una figura binaria con precisión seleccionable:
+#       * "float64": como ej1b/ej1c (por defecto).
+#       * "float32": rápido; sumas separables en float32.
+#       * "exacto":  enteros exactos. m_pq = sum_y y^q * (sum_x x^p B[y,x]); las sumas
+#                    por fila van en int64 cuando no desbordan y si no en int de Python.
+#                    Los centrales se obtienen por expansión binomial con el centroide
+#                    racional (Fraction), así μ10 = μ01 = 0 exactamente. Los valores
+#                    quedan como int / Fraction; solo se redondean al imprimir (formatear).
+#   - Reporte comparando los tres modos (valor, error relativo y tiempo).
+
+from fractions import Fraction
+from math import comb
+from pathlib import Path
+import argparse, sys, time
+import numpy as np
+
+MODOS = ("float64", "float32", "exacto")
+_INT64_MAX = np.iinfo(np.int64).max
+
+def _validar_modo(modo):
+    if modo not in MODOS:
+        raise ValueError(f"Modo de precisión desconocido: {modo} (usa {', '.join(MODOS)})")
+
+# -------- enteros exactos ----------
+def _sumas_por_fila_exactas(B: np.ndarray, p: int) -> np.ndarray:
+    """S_p[y] = sum_x x^p B[y,x] en enteros; int64 si cabe, si no objetos (int de Python)."""
+    h, w = B.shape
+    b = (B != 0)
+    if w == 0:
+        return np.zeros(h, dtype=np.int64)
+    if (w - 1) ** p * w <= _INT64_MAX:
+        xp = np.arange(w, dtype=np.int64) ** p
+        return b.astype(np.int64) @ xp
+    xp = np.array([x ** p for x in range(w)], dtype=object)
+    return np.array([int(xp[fila].sum()) for fila in b], dtype=object)
+
+def momentos_raw_exactos(B: np.ndarray, orden_p: int, orden_q: int) -> dict:
+    """{(p, q): m_pq int} para todo p <= orden_p, q <= orden_q (una pasada por cada p)."""
+    out = {}
+    for p in range(orden_p + 1):
+        filas = [(y, int(s)) for y, s in enumerate(_sumas_por_fila_exactas(B, p)) if s]
+        for q in range(orden_q + 1):
+            out[(p, q)] = sum(s * y ** q for y, s in filas)
+    return out
+
+def momento_raw_exacto(B: np.ndarray, p: int, q: int) -> int:
+    S = _sumas_por_fila_exactas(B, p)
+    return sum(int(s) * y ** q for y, s in enumerate(S) if s)
+
+def centroide_exacto(B: np.ndarray):
+    """(xc, yc) como Fraction, y m00 int. None si la figura está vacía."""
+    m = momentos_raw_exactos(B, 1, 1)
+    if m[(0, 0)] == 0:
+        return None, 0
+    return (Fraction(m[(1, 0)], m[(0, 0)]), Fraction(m[(0, 1)], m[(0, 0)])), m[(0, 0)]
+
+def momento_central_exacto(B: np.ndarray, p: int, q: int) -> Fraction:
+    """μ_pq exacto: sum_i sum_j C(p,i) C(q,j) (-xc)^(p-i) (-yc)^(q-j) m_ij."""
+    m = momentos_raw_exactos(B, p, q)
+    if m[(0, 0)] == 0:
+        return Fraction(0)
+    xc = Fraction(m[(1, 0)], m[(0, 0)]) if p else Fraction(0)
+    yc = Fraction(m[(0, 1)], m[(0, 0)]) if q else Fraction(0)
+    return sum(comb(p, i) * comb(q, j) * (-xc) ** (p - i) * (-yc) ** (q - j) * m[(i, j)]
+               for i in range(p + 1) for j in range(q + 1))
+
+# -------- punto flotante separable ----------
+def _momento_flotante(B, p, q, xc, yc, dt):
+    h, w = B.shape
+    f = B.astype(dt, copy=False)
+    x = (np.arange(w, dtype=dt) - dt(xc)) ** p
+    y = (np.arange(h, dtype=dt) - dt(yc)) ** q
+    return float(y @ (f @ x))
+
+# -------- API común ----------
+def momento_raw(B: np.ndarray, p: int, q: int, modo: str = "float64"):
+    """m_pq según el modo: float (float64/float32) o int exacto."""
+    _validar_modo(modo)
+    if modo == "exacto":
+        return momento_raw_exacto(B, p, q)
+    return _momento_flotante(B, p, q, 0.0, 0.0, np.float32 if modo == "float32" else np.float64)
+
+def momento_central(B: np.ndarray, p: int, q: int, xc: float, yc: float, modo: str = "float64"):
+    """
+    μ_pq según el modo. En "exacto" se ignoran xc, yc y se usa el centroide
+    racional de B (los flotantes de entrada ya vienen redondeados).
+    """
+    _validar_modo(modo)
+    if modo == "exacto":
+        return momento_central_exacto(B, p, q)
+    return _momento_flotante(B, p, q, xc, yc, np.float32 if modo == "float32" else np.float64)
+
+def formatear(v, spec=".6e") -> str:
+    """Texto de un momento: los int exactos completos; Fraction y float con 'spec'."""
+    if isinstance(v, Fraction) and v.denominator == 1:
+        v = v.numerator
+    if isinstance(v, (int, np.integer)) and not isinstance(v, bool):
+        return str(int(v))
+    return format(float(v), spec)
+
+# -------- reporte ----------
+ORDENES_REPORTE = ((0, 0), (1, 0), (0, 1), (2, 0), (1, 1), (0, 2), (3, 0), (2, 1), (1, 2), (0, 3), (2, 3), (3, 3))
+
+def reporte_precision(B: np.ndarray, ordenes=ORDENES_REPORTE):
+    """
+    Compara float64 y float32 contra el modo exacto para raw y centrales.
+    Devuelve una lista de dicts: tipo, p, q, exacto, float64, float32, err64, err32,
+    y un dict de tiempos totales por modo (s).
+    """
+    filas = []
+    tiempos = {m: 0.0 for m in MODOS}
+    c, _ = centroide_exacto(B)
+    if c is None:
+        return filas, tiempos
+    xc, yc = float(c[0]), float(c[1])
+    for tipo in ("raw", "central"):
+        for p, q in ordenes:
+            vals = {}
+            for modo in MODOS:
+                t0 = time.perf_counter()
+                if tipo == "raw":
+                    v = momento_raw(B, p, q, modo)
+                else:
+                    v = momento_central_exacto(B, p, q) if modo == "exacto" else \
+                        momento_central(B, p, q, xc, yc, modo)
+                tiempos[modo] += time.perf_counter() - t0
+                vals[modo] = v
+            ex = vals["exacto"]
+            escala = abs(ex) if ex != 0 else 1
+            err = {m: float(abs(Fraction(vals[m]) - Fraction(ex)) / escala) for m in ("float64", "float32")}
+            filas.append({"tipo": tipo, "p": p, "q": q, "exacto": ex,
+                          "float64": vals["float64"], "float32": vals["float32"],
+                          "err64": err["float64"], "err32": err["float32"]})
+    return filas, tiempos
+
+def imprimir_reporte(filas, tiempos):
+    print("--- Reporte de precisión (error relativo vs exacto) ---")
+    print(f"{'tipo':8s} {'pq':>3s} {'exacto':>24s} {'err float64':>12s} {'err float32':>12s}")
+    for f in filas:
+        ex = f["exacto"]
+        ex_s = f"{ex}" if isinstance(ex, int) and abs(ex) < 10**22 else f"{float(ex):.16e}"
+        print(f"{f['tipo']:8s} {f['p']}{f['q']:>2d} {ex_s:>24s} {f['err64']:12.3e} {f['err32']:12.3e}")
+    print("Tiempos (s): " + "  ".join(f"{m}={t:.4f}" for m, t in tiempos.items()))
+
+def main():
+    from PIL import Image
+    from ej1a_area_centroide import binarizar
+    ap = argparse.ArgumentParser(description="Momentos: comparación float64 / float32 / exacto.")
+    ap.add_argument("imagen", help="Ruta de la figura")
+    ap.add_argument("--thresh", type=int, default=128, help="Umbral 0..255 (def:128)")
+    ap.add_argument("--invert", action="store_true", help="Invierte la máscara (1=figura)")
+    args = ap.parse_args()
+
+    p = Path(args.imagen)
+    if not p.exists():
+        print(f"Archivo no encontrado: {p}")
+        sys.exit(1)
+    B = binarizar(Image.open(p), thresh=args.thresh, invertir=args.invert)
+    filas, tiempos = reporte_precision(B)
+    if not filas:
+        print("Figura vacía (m00=0). Ajusta --thresh o usa --invert.")
+        sys.exit(1)
+    print(f"Imagen: {p.name}  |  {B.shape[1]}x{B.shape[0]}  |  Umbral: {args.thresh}")
+    imprimir_reporte(filas, tiempos)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# muestreo.py
+# Estadísticas aproximadas por muestreo estratificado de píxeles, con intervalos
+# de confianza y vuelta al cálculo exacto cuando la estimación es ambigua.
+#
+# Qué hace:
+#   - muestra_estratificada: divide la imagen en tiles y toma la misma cantidad de
+#     píxeles al azar en cada uno, SIN reposición (presupuesto total configurable).
+#     Si el presupuesto no alcanza para un píxel por tile, los tiles se agrandan
+#     (~sqrt(h*w/presupuesto)). Dentro de un tile de n px con k muestras, el índice
+#     0..n-1 se corta en k tramos y se toma un píxel al azar de cada tramo (todo
+#     vectorizado); cada píxel pesa el largo de su tramo (~n/k), así los tiles del
+#     borde no quedan sobrerrepresentados. Los márgenes usan la corrección por
+#     población finita, que solo vale para muestras sin reposición.
+#   - Estimadores (z = cuantil normal de la confianza pedida):
+#       * histograma y modo:   frecuencia por bin +- z * error estándar;
+#                              si otro bin puede empatar al modo -> exacto.
+#       * fracción >= umbral:  p +- z * sqrt(p(1-p)/n)   (ej5)
+#                              con pocos px muestreados a un lado del umbral -> exacto.
+#       * centroide:           media de x, y de los px figura +- z * s / sqrt(n_fig)   (ej1a)
+#                              con pocos px figura en la muestra -> exacto.
+#
+# Uso desde los scripts: ej1a/ej5/ej6 --muestreo N [--confianza 0.95]
+# Chequeo de cobertura de los intervalos (imágenes sintéticas, muchas semillas):
+#   python muestreo.py --cobertura [--repeticiones 300] [--fraccion 0.5] [--confianza 0.95]
+
+from statistics import NormalDist
+import argparse, sys
+import numpy as np
+
+PRESUPUESTO_DEF = 1 << 16
+TILE_DEF = 64
+MIN_FIGURA = 50          # px figura mínimos en la muestra para estimar un centroide
+                         # (y px a cada lado del umbral para estimar una fracción)
+
+def z_confianza(confianza: float = 0.95) -> float:
+    return NormalDist().inv_cdf(0.5 + confianza / 2.0)
+
+def muestra_estratificada(forma, presupuesto=PRESUPUESTO_DEF, tile=TILE_DEF, semilla=0):
+    """
+    (ys, xs, pesos) con ~presupuesto píxeles repartidos en tiles de tile x tile, o más
+    grandes si hay más tiles que presupuesto. Si el presupuesto alcanza para toda la
+    imagen se devuelven todos los píxeles (peso 1).
+    """
+    h, w = int(forma[0]), int(forma[1])
+    if presupuesto >= h * w:
+        ys, xs = np.divmod(np.arange(h * w), w)
+        return ys, xs, np.ones(h * w)
+    presupuesto = max(1, presupuesto)
+    tile = max(tile, int(np.sqrt(h * w / presupuesto)))
+    while -(-h // tile) * -(-w // tile) > presupuesto:  # a lo más unos pocos pasos
+        tile += 1
+    ty, tx = -(-h // tile), -(-w // tile)
+    k = presupuesto // (ty * tx)                        # muestras por tile (>= 1)
+    rng = np.random.default_rng(semilla)
+    y0 = np.repeat(np.arange(ty) * tile, tx)
+    x0 = np.tile(np.arange(tx) * tile, ty)
+    alto = np.minimum(tile, h - y0)
+    ancho = np.minimum(tile, w - x0)
+    n_t = alto * ancho
+    k_t = np.minimum(k, n_t)                            # un tile del borde puede tener < k px
+    # sin reposición dentro de cada tile: la muestra j toma un índice al azar del tramo
+    # [j*n/k, (j+1)*n/k) de 0..n_t-1; los tramos no se solapan y miden >= 1 (k <= n)
+    t = np.repeat(np.arange(ty * tx), k_t)
+    j = np.arange(t.size) - np.repeat(np.cumsum(k_t) - k_t, k_t)
+    n, m = n_t[t], k_t[t]
+    desde, hasta = j * n // m, (j + 1) * n // m
+    idx = desde + rng.integers(0, hasta - desde)
+    ys = y0[t] + idx // ancho[t]
+    xs = x0[t] + idx % ancho[t]
+    pesos = (hasta - desde).astype(np.float64)          # 1 / prob. de inclusión
+    return ys, xs, pesos
+
+def _n_efectivo(pesos):
+    return pesos.sum() ** 2 / (pesos ** 2).sum()
+
+def _fpc(n, total):
+    """Corrección por población finita (margen 0 si se muestrearon todos los píxeles)."""
+    return np.sqrt(max(0.0, 1.0 - n / total))
+
+# -------- histograma y modo ----------
+def histograma_estimado(valores: np.ndarray, pesos: np.ndarray, total: int):
+    """(hist estimado escalado a 'total' px, error estándar por bin en px)."""
+    p = np.bincount(valores, weights=pesos, minlength=256) / pesos.sum()
+    se = np.sqrt(p * (1.0 - p) / _n_efectivo(pesos)) * _fpc(pesos.size, total)
+    return p * total, se * total
+
+def modo_estimado(hist, se, z):
+    """(modo, ambiguo): ambiguo si algún otro bin puede superar al modo dentro del margen."""
+    m = int(np.argmax(hist))
+    otros = np.delete(np.arange(hist.size), m)
+    ambiguo = bool(np.any(hist[otros] + z * se[otros] >= hist[m] - z * se[m]))
+    return m, ambiguo
+
+def modos_por_muestreo(planos, presupuesto=PRESUPUESTO_DEF, confianza=0.95, semilla=0):
+    """
+    Para cada plano HxW uint8: {"modo", "freq", "margen", "exacto", "hist"}. Si el modo
+    muestreado es ambiguo se recalcula con el histograma completo (exacto=True).
+    """
+    z = z_confianza(confianza)
+    forma = planos[0].shape
+    ys, xs, pesos = muestra_estratificada(forma, presupuesto, semilla=semilla)
+    total = forma[0] * forma[1]
+    out = []
+    for P in planos:
+        h, se = histograma_estimado(P[ys, xs], pesos, total)
+        m, ambiguo = modo_estimado(h, se, z)
+        if ambiguo:
+            hx = np.bincount(P.ravel(), minlength=256)
+            m = int(np.argmax(hx))
+            out.append({"modo": m, "freq": int(hx[m]), "margen": 0.0, "exacto": True, "hist": hx})
+        else:
+            out.append({"modo": m, "freq": int(round(h[m])), "margen": float(z * se[m]),
+                        "exacto": False, "hist": h})
+    return out
+
+# -------- fracción sobre umbral ----------
+def fracciones_por_muestreo(planos, thresh, presupuesto=PRESUPUESTO_DEF, confianza=0.95, semilla=0):
+    """
+    Por plano: (fracción de px >= thresh, margen, exacto) con margen = z * error estándar.
+    Si la muestra tiene menos de MIN_FIGURA px a algún lado del umbral la aproximación
+    normal no sirve: se cuenta exacto (margen 0, exacto=True).
+    """
+    z = z_confianza(confianza)
+    ys, xs, pesos = muestra_estratificada(planos[0].shape, presupuesto, semilla=semilla)
+    n, f = _n_efectivo(pesos), _fpc(pesos.size, planos[0].size)
+    out = []
+    for P in planos:
+        sobre = P[ys, xs] >= thresh
+        k = int(np.count_nonzero(sobre))
+        if min(k, sobre.size - k) < MIN_FIGURA:
+            out.append((int(np.count_nonzero(P >= thresh)) / P.size, 0.0, True))
+            continue
+        p = float((sobre * pesos).sum() / pesos.sum())
+        out.append((p, z * np.sqrt(p * (1.0 - p) / n) * f, False))
+    return out
+
+# -------- centroide ----------
+def centroide_por_muestreo(B: np.ndarray, presupuesto=PRESUPUESTO_DEF, confianza=0.95, semilla=0):
+    """
+    {"area", "area_margen", "centroide", "margen": (mx, my), "exacto"} para B binaria 0/1.
+    Con menos de MIN_FIGURA px figura en la muestra se calcula exacto.
+    """
+    z = z_confianza(confianza)
+    total = B.shape[0] * B.shape[1]
+    ys, xs, pesos = muestra_estratificada(B.shape, presupuesto, semilla=semilla)
+    b = B[ys, xs].astype(bool)
+    if b.sum() < MIN_FIGURA:
+        fy, fx = np.nonzero(B)
+        if fx.size == 0:
+            return None
+        return {"area": int(fx.size), "area_margen": 0.0, "centroide": (fx.mean(), fy.mean()),
+                "margen": (0.0, 0.0), "exacto": True}
+    n, f = _n_efectivo(pesos), _fpc(pesos.size, total)
+    p = float((b * pesos).sum() / pesos.sum())
+    wf = pesos[b]
+    xc = float((xs[b] * wf).sum() / wf.sum())
+    yc = float((ys[b] * wf).sum() / wf.sum())
+    nf = _n_efectivo(wf) / (f * f) if f > 0 else np.inf
+    sx = np.sqrt(float((wf * (xs[b] - xc) ** 2).sum() / wf.sum()))
+    sy = np.sqrt(float((wf * (ys[b] - yc) ** 2).sum() / wf.sum()))
+    return {"area": int(round(p * total)), "area_margen": float(z * np.sqrt(p * (1 - p) / n) * f * total),
+            "centroide": (xc, yc), "margen": (float(z * sx / np.sqrt(nf)), float(z * sy / np.sqrt(nf))),
+            "exacto": False}
+
+# -------- chequeo de cobertura ----------
+def _imagen_sintetica(rng, forma=(256, 256)):
+    """Gradiente diagonal + ruido gaussiano (uint8): fracciones y centroides no triviales."""
+    h, w = forma
+    yy, xx = np.indices(forma)
+    base = (xx / w + yy / h) * 127.5 + rng.normal(0.0, 40.0, forma)
+    return np.clip(base, 0, 255).astype(np.uint8)
+
+def cobertura(repeticiones=300, fraccion=0.5, confianza=0.95, thresh=128, semilla=0):
+    """
+    Proporción de intervalos que contienen el valor exacto, para la fracción >= thresh
+    (ej5), el área y el centroide (ej1a), sobre 'repeticiones' muestras distintas de
+    'fraccion' de los píxeles. Devuelve {estimador: cobertura}.
+    """
+    rng = np.random.default_rng(semilla)
+    P = _imagen_sintetica(rng)
+    B = (P >= thresh).astype(np.uint8)
+    total = P.size
+    presupuesto = int(fraccion * total)
+    p_ex = float((P >= thresh).mean())
+    fy, fx = np.nonzero(B)
+    area_ex, c_ex = fy.size, (fx.mean(), fy.mean())
+    cubre = {"fraccion": 0, "area": 0, "centroide x": 0, "centroide y": 0}
+    for i in range(repeticiones):
+        (p, m, _), = fracciones_por_muestreo((P,), thresh, presupuesto, confianza, semilla=i + 1)
+        cubre["fraccion"] += abs(p - p_ex) <= m
+        est = centroide_por_muestreo(B, presupuesto, confianza, semilla=i + 1)
+        cubre["area"] += abs(est["area"] - area_ex) <= est["area_margen"] + 0.5
+        for j, eje in enumerate(("centroide x", "centroide y")):
+            cubre[eje] += abs(est["centroide"][j] - c_ex[j]) <= est["margen"][j]
+    return {k: float(v) / repeticiones for k, v in cubre.items()}
+
+def main():
+    ap = argparse.ArgumentParser(description="Muestreo estratificado: chequeo de cobertura de los intervalos.")
+    ap.add_argument("--cobertura", action="store_true", help="Corre el chequeo de cobertura")
+    ap.add_argument("--repeticiones", type=int, default=300, help="Muestras distintas (def:300)")
+    ap.add_argument("--fraccion", type=float, default=0.5, help="Fracción de píxeles muestreados (def:0.5)")
+    ap.add_argument("--confianza", type=float, default=0.95, help="Nivel de los intervalos (def:0.95)")
+    args = ap.parse_args()
+    if not args.cobertura:
+        ap.print_help()
+        sys.exit(1)
+    if not 0 < args.fraccion < 1 or not 0 < args.confianza < 1:
+        print("Error: --fraccion y --confianza deben estar en (0, 1).")
+        sys.exit(1)
+
+    res = cobertura(args.repeticiones, args.fraccion, args.confianza)
+    # tolerancia: 3 errores estándar de una proporción binomial con 'repeticiones' ensayos
+    tol = 3 * np.sqrt(args.confianza * (1 - args.confianza) / args.repeticiones)
+    print(f"Cobertura con {args.repeticiones} muestras de {args.fraccion:.0%} de los px "
+          f"(nominal {args.confianza:.0%}, tolerancia {tol:.1%}):")
+    bajas = []
+    for nombre, c in res.items():
+        ok = c >= args.confianza - tol
+        print(f"  {nombre:12s} {c:.1%}" + ("" if ok else "  <-- baja"))
+        if not ok:
+            bajas.append(nombre)
+    if bajas:
+        print("Cobertura por debajo de lo nominal: " + ", ".join(bajas))
+        sys.exit(1)
+    print("Todo OK ✔️")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# operaciones_punto.py
+# Operaciones de punto (LUT de 256 entradas) derivadas de los histogramas de ej6.
+#
+# Qué hace:
+#   - LUT globales calculadas desde un histograma ya existente (hist256 de ej6),
+#     sin volver a recorrer la imagen:
+#       * ecualización:        T(v) = round(255 * (cdf(v) - cdf_min) / (N - cdf_min))
+#       * igualación (matching) a un histograma de referencia (p.ej. acumulado de
+#         muchas imágenes): T(v) = menor u con cdf_ref(u) >= cdf(v)
+#       * estiramiento por percentiles: [p_bajo, p_alto] -> [0, 255]
+#   - aplicar_lut: un solo gather (np.take) por canal.
+#   - CLAHE por tiles: histogramas por tile en una pasada (bincount), recorte y
+#     redistribución, LUT por tile vectorizadas y mezcla bilineal entre los 4
+#     tiles vecinos. Necesita sus propios histogramas locales (no los globales).
+
+import numpy as np
+
+OPERACIONES = ("ecualizar", "igualar", "estirar", "clahe")
+
+def _cdf(hist: np.ndarray) -> np.ndarray:
+    return np.cumsum(np.asarray(hist, dtype=np.float64), axis=-1)
+
+# -------- LUT globales ----------
+def lut_ecualizacion(hist: np.ndarray) -> np.ndarray:
+    """LUT uint8 de ecualización global a partir de un histograma de 256 bins."""
+    cdf = _cdf(hist)
+    n = cdf[-1]
+    if n == 0:
+        return np.arange(256, dtype=np.uint8)
+    cdf_min = cdf[np.flatnonzero(cdf)[0]]
+    if n == cdf_min:                       # imagen de un solo valor
+        return np.arange(256, dtype=np.uint8)
+    lut = np.round((cdf - cdf_min) / (n - cdf_min) * 255.0)
+    return np.clip(lut, 0, 255).astype(np.uint8)
+
+def lut_igualacion(hist: np.ndarray, hist_ref: np.ndarray) -> np.ndarray:
+    """LUT uint8 que lleva el histograma 'hist' a la forma de 'hist_ref' (ambos 256 bins)."""
+    cdf = _cdf(hist)
+    ref = _cdf(hist_ref)
+    if cdf[-1] == 0 or ref[-1] == 0:
+        return np.arange(256, dtype=np.uint8)
+    cdf /= cdf[-1]
+    ref /= ref[-1]
+    lut = np.searchsorted(ref, cdf - 1e-12, side="left")
+    return np.clip(lut, 0, 255).astype(np.uint8)
+
+def percentil_desde_hist(hist: np.ndarray, pct: float) -> int:
+    """Nivel v tal que al menos pct% de los píxeles son <= v."""
+    cdf = _cdf(hist)
+    if cdf[-1] == 0:
+        return 0
+    return int(np.searchsorted(cdf, cdf[-1] * pct / 100.0, side="left"))
+
+def lut_estiramiento(hist: np.ndarray, p_bajo: float = 1.0, p_alto: float = 99.0) -> np.ndarray:
+    """LUT uint8 que lleva [percentil p_bajo, percentil p_alto] a [0, 255] (recortando)."""
+    lo = percentil_desde_hist(hist, p_bajo)
+    hi = percentil_desde_hist(hist, p_alto)
+    if hi <= lo:
+        return np.arange(256, dtype=np.uint8)
+    v = np.arange(256, dtype=np.float64)
+    return np.clip(np.round((v - lo) * 255.0 / (hi - lo)), 0, 255).astype(np.uint8)
+
+def lut_desde_hist(operacion: str, hist, hist_ref=None, p_bajo=1.0, p_alto=99.0) -> np.ndarray:
+    if operacion == "ecualizar":
+        return lut_ecualizacion(hist)
+    if operacion == "igualar":
+        if hist_ref is None:
+            raise ValueError("La igualación necesita un histograma de referencia.")
+        return lut_igualacion(hist, hist_ref)
+    if operacion == "estirar":
+        return lut_estiramiento(hist, p_bajo, p_alto)
+    raise ValueError(f"Operación global desconocida: {operacion}")
+
+# -------- aplicación ----------
+def aplicar_lut(arr: np.ndarray, luts, out: np.ndarray = None) -> np.ndarray:
+    """
+    arr HxW con una LUT (256,), o HxWxC con una LUT por canal (C, 256) o una común (256,).
+    Un gather (np.take) por canal; escribe en 'out' si se entrega.
+    """
+    luts = np.asarray(luts, dtype=np.uint8)
+    if out is None:
+        out = np.empty(arr.shape, dtype=np.uint8)
+    if arr.ndim == 2:
+        np.take(luts if luts.ndim == 1 else luts[0], arr, out=out)
+        return out
+    for c in range(arr.shape[2]):
+        lut = luts if luts.ndim == 1 else luts[c]
+        np.take(lut, arr[..., c], out=out[..., c])
+    return out
+
+# -------- CLAHE ----------
+def _luts_clahe(hists: np.ndarray, clip: float) -> np.ndarray:
+    """hists (..., 256) por tile -> LUT (..., 256) float con recorte y redistribución."""
+    h = hists.astype(np.float64)
+    n = h.sum(axis=-1, keepdims=True)
+    if clip > 0:
+        limite = np.maximum(clip * n / 256.0, 1.0)
+        exceso = np.maximum(h - limite, 0.0).sum(axis=-1, keepdims=True)
+        h = np.minimum(h, limite) + exceso / 256.0
+    cdf = np.cumsum(h, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lut = np.where(n > 0, cdf * 255.0 / n, np.arange(256.0))
+    return np.clip(lut, 0, 255)
+
+def clahe(gray: np.ndarray, tiles=(8, 8), clip: float = 2.0) -> np.ndarray:
+    """
+    CLAHE sobre una imagen HxW uint8 con una grilla de 'tiles' (ty, tx).
+    clip: límite relativo a la altura media del histograma (0 = sin recorte, AHE).
+    """
+    from cobertura_canales import histogramas_por_grupo
+    h, w = gray.shape
+    ty, tx = max(1, min(int(tiles[0]), h)), max(1, min(int(tiles[1]), w))
+    # tile de cada fila/columna (tiles de tamaño casi igual)
+    fy = np.minimum((np.arange(h) * ty) // h, ty - 1)
+    fx = np.minimum((np.arange(w) * tx) // w, tx - 1)
+    idx = fy[:, None] * tx + fx[None, :]
+    hists = histogramas_por_grupo(gray, idx, ty * tx)[:, 0, :]          # (ty*tx, 256)
+    luts = _luts_clahe(hists, clip).reshape(ty, tx, 256)
+
+    # centros de tile y pesos bilineales (separables por fila y columna)
+    cy = (np.arange(ty) + 0.5) * h / ty - 0.5
+    cx = (np.arange(tx) + 0.5) * w / tx - 0.5
+    def _vecinos(coord, centros, n):
+        j = np.clip(np.searchsorted(centros, coord, side="right") - 1, 0, n - 1)
+        j1 = np.minimum(j + 1, n - 1)
+        paso = np.where(j1 > j, centros[j1] - centros[j], 1.0)
+        t = np.clip((coord - centros[j]) / paso, 0.0, 1.0)
+        return j, j1, t
+    y0, y1, ay = _vecinos(np.arange(h, dtype=np.float64), cy, ty)
+    x0, x1, ax = _vecinos(np.arange(w, dtype=np.float64), cx, tx)
+
+    v = gray
+    Y0, Y1 = y0[:, None], y1[:, None]
+    X0, X1 = x0[None, :], x1[None, :]
+    arriba = luts[Y0, X0, v] * (1 - ax)[None, :] + luts[Y0, X1, v] * ax[None, :]
+    abajo = luts[Y1, X0, v] * (1 - ax)[None, :] + luts[Y1, X1, v] * ax[None, :]
+    out = arriba * (1 - ay)[:, None] + abajo * ay[:, None]
+    return np.clip(np.round(out), 0, 255).astype(np.uint8)
+
+def cargar_hist_referencia(path) -> np.ndarray:
+    """
+    Histograma(s) de referencia: .npy con (256,) o (C, 256) (p.ej. acumulado de varias
+    corridas), o una imagen de la cual se calculan R, G, B y Gris (4, 256).
+    """
+    from pathlib import Path
+    p = Path(path)
+    if p.suffix.lower() == ".npy":
+        ref = np.load(p)
+        if ref.shape[-1] != 256:
+            raise ValueError(f"Referencia con forma {ref.shape}; se esperaba (..., 256).")
+        return ref
+    from PIL import Image
+    from kernels_color import gris, buffer_hilo
+    rgb = np.asarray(Image.open(p).convert("RGB"))
+    return np.stack([np.bincount(a.ravel(), minlength=256)
+                     for a in (rgb[..., 0], rgb[..., 1], rgb[..., 2], gris(rgb, out=buffer_hilo(rgb.shape[:2])))])
@@ -0,0 +1,110 @@
+# paralelo.py
+# Ejecución en paralelo DENTRO de una imagen: se divide el arreglo en bandas de
+# filas, cada banda corre el núcleo NumPy en un ThreadPoolExecutor (NumPy libera
+# el GIL en bincount, sumas, comparaciones y gathers) y los parciales se reducen:
+#   - momentos:    suma de las sumas por banda (con el desplazamiento en y)
+#   - histogramas: suma de histogramas
+#   - áreas:       suma de conteos
+#   - LUT:         cada banda escribe su porción de la salida
+#
+# Uso desde otros scripts:
+#   from paralelo import EjecutorBandas
+#   ej = EjecutorBandas(hilos=16)
+#   h = ej.hist256(GR)                 # == ej6.hist256(GR)
+#   m = ej.momentos(B, [(2, 3)], 0, 0) # momentos por bandas
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import numpy as np
+
+FILAS_MIN_BANDA = 64      # bajo esto no compensa repartir
+
+class EjecutorBandas:
+    """Reparte un arreglo HxW(...) en bandas de filas y reduce los parciales."""
+
+    def __init__(self, hilos=None, filas_min=FILAS_MIN_BANDA):
+        self.hilos = max(1, int(hilos or os.cpu_count() or 1))
+        self.filas_min = max(1, int(filas_min))
+        self._pool = ThreadPoolExecutor(max_workers=self.hilos) if self.hilos > 1 else None
+
+    def cerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    # ---- reparto ----
+    def bandas(self, h: int):
+        """Lista de (y0, y1) que cubre 0..h en a lo más 'hilos' bandas."""
+        n = max(1, min(self.hilos, h // self.filas_min))
+        cortes = np.linspace(0, h, n + 1).astype(int)
+        return [(int(a), int(b)) for a, b in zip(cortes[:-1], cortes[1:]) if b > a]
+
+    def mapear(self, funcion, arr: np.ndarray, *extra):
+        """[funcion(arr[y0:y1], y0, *extra) por banda], en orden."""
+        bs = self.bandas(arr.shape[0])
+        if self._pool is None or len(bs) == 1:
+            return [funcion(arr[a:b], a, *extra) for a, b in bs]
+        return list(self._pool.map(lambda ab: funcion(arr[ab[0]:ab[1]], ab[0], *extra), bs))
+
+    # ---- núcleos con reducción ----
+    def hist256(self, arr_uint8: np.ndarray) -> np.ndarray:
+        """Histograma de 256 bins (suma de histogramas por banda)."""
+        partes = self.mapear(lambda b, _y0: np.bincount(b.ravel(), minlength=256), arr_uint8)
+        return np.sum(partes, axis=0)
+
+    def area_umbral(self, arr_uint8: np.ndarray, thresh: int) -> int:
+        """Cantidad de px >= thresh (suma de conteos por banda)."""
+        partes = self.mapear(lambda b, _y0: int(np.count_nonzero(b >= thresh)), arr_uint8)
+        return int(sum(partes))
+
+    def momentos(self, B: np.ndarray, ordenes, xc: float = 0.0, yc: float = 0.0) -> dict:
+        """
+        {(p, q): sum (x-xc)^p (y-yc)^q B} en float64. Cada banda usa la forma separable
+        (y^q)·(B_banda @ x^p) con sus coordenadas y absolutas; luego se suman.
+        Con xc = yc = 0 son los momentos raw; con el centroide, los centrales.
+        """
+        ordenes = [tuple(o) for o in ordenes]
+        w = B.shape[1]
+        xs = np.arange(w, dtype=np.float64) - xc
+        px = {p: xs ** p for p in {p for p, _ in ordenes}}
+
+        def banda(b, y0):
+            f = b.astype(np.float64)
+            ys = np.arange(y0, y0 + b.shape[0], dtype=np.float64) - yc
+            filas = {p: f @ v for p, v in px.items()}
+            return {(p, q): float((ys ** q) @ filas[p]) for p, q in ordenes}
+
+        out = {o: 0.0 for o in ordenes}
+        for parcial in self.mapear(banda, B):
+            for o, v in parcial.items():
+                out[o] += v
+        return out
+
+    def aplicar_lut(self, arr_uint8: np.ndarray, lut: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """lut[arr] por bandas; cada banda escribe su parte de 'out' (misma forma + forma de la LUT)."""
+        lut = np.asarray(lut)
+        if out is None:
+            out = np.empty(arr_uint8.shape + lut.shape[1:], dtype=lut.dtype)
+
+        def banda(b, y0):
+            np.take(lut, b, axis=0, out=out[y0:y0 + b.shape[0]])
+
+        self.mapear(banda, arr_uint8)
+        return out
+
+_EJECUTOR = None
+
+def ejecutor(hilos=None) -> EjecutorBandas:
+    """Ejecutor compartido del proceso (se crea una vez con 'hilos')."""
+    global _EJECUTOR
+    if _EJECUTOR is None or (hilos and hilos != _EJECUTOR.hilos):
+        if _EJECUTOR is not None:
+            _EJECUTOR.cerrar()
+        _EJECUTOR = EjecutorBandas(hilos)
+    return _EJECUTOR
@@ -0,0 +1,90 @@
+# proyector_momentos.py
+# Momentos de una máscara como productos matriz-vector con tablas de potencias
+# precalculadas para un tamaño de cuadro fijo.
+#
+# Qué hace:
+#   - Para un tamaño (h, w) guarda V_x (w x (P+1)) con columnas x^p y
+#     V_y (h x (Q+1)) con columnas y^q (1-D, separables).
+#   - Todos los momentos raw de una máscara nueva salen de
+#         M = V_y^T @ B @ V_x          (M[q, p] = m_pq)
+#     y los centrales de la misma forma con columnas (x - xc)^p, (y - yc)^q.
+#   - Los buffers (máscara en float64, producto intermedio, resultado y potencias
+#     desplazadas) se reservan una vez: en flujo de frames no hay asignaciones.
+#   - proyector(forma) devuelve uno cacheado por tamaño (y por hilo).
+
+import threading
+import numpy as np
+
+ORDEN_DEF = 3
+
+class ProyectorMomentos:
+    """Momentos raw/centrales hasta 'orden' en x e y para máscaras de tamaño 'forma'."""
+
+    def __init__(self, forma, orden=ORDEN_DEF):
+        self.forma = (int(forma[0]), int(forma[1]))
+        self.orden = int(orden)
+        h, w = self.forma
+        k = self.orden + 1
+        self._x = np.arange(w, dtype=np.float64)
+        self._y = np.arange(h, dtype=np.float64)
+        self.Vx = self._x[:, None] ** np.arange(k)          # w x k
+        self.Vy = self._y[:, None] ** np.arange(k)          # h x k
+        # buffers reutilizables
+        self._f = np.empty((h, w), dtype=np.float64)
+        self._BV = np.empty((h, k), dtype=np.float64)
+        self._M = np.empty((k, k), dtype=np.float64)
+        self._Vxc = np.empty((w, k), dtype=np.float64)
+        self._Vyc = np.empty((h, k), dtype=np.float64)
+        self._dx = np.empty(w, dtype=np.float64)
+        self._dy = np.empty(h, dtype=np.float64)
+
+    def _cargar(self, B):
+        if B.shape != self.forma:
+            raise ValueError(f"Máscara {B.shape} distinta del tamaño del proyector {self.forma}.")
+        np.copyto(self._f, B)
+
+    def _proyectar(self, Vy, Vx):
+        np.matmul(self._f, Vx, out=self._BV)
+        np.matmul(Vy.T, self._BV, out=self._M)
+        return self._M
+
+    def raw(self, B: np.ndarray) -> np.ndarray:
+        """Matriz M[q, p] = m_pq (se sobrescribe en la siguiente llamada; copiar si hace falta)."""
+        self._cargar(B)
+        return self._proyectar(self.Vy, self.Vx)
+
+    @staticmethod
+    def _potencias(v, c, dv, out):
+        np.subtract(v, c, out=dv)
+        out[:, 0] = 1.0
+        for p in range(1, out.shape[1]):
+            np.multiply(out[:, p - 1], dv, out=out[:, p])
+        return out
+
+    def central(self, B: np.ndarray, xc: float, yc: float) -> np.ndarray:
+        """Matriz U[q, p] = μ_pq alrededor de (xc, yc), calculada directo (sin expansión binomial)."""
+        self._cargar(B)
+        self._potencias(self._x, xc, self._dx, self._Vxc)
+        self._potencias(self._y, yc, self._dy, self._Vyc)
+        return self._proyectar(self._Vyc, self._Vxc)
+
+    def momento(self, B: np.ndarray, p: int, q: int) -> float:
+        return float(self.raw(B)[q, p])
+
+    def centroide(self, B: np.ndarray):
+        M = self.raw(B)
+        m00 = float(M[0, 0])
+        if m00 == 0:
+            return None, 0.0
+        return (float(M[0, 1]) / m00, float(M[1, 0]) / m00), m00
+
+_local = threading.local()
+
+def proyector(forma, orden=ORDEN_DEF) -> ProyectorMomentos:
+    """Proyector cacheado por (tamaño, orden) y por hilo (los buffers no se comparten)."""
+    cache = _local.__dict__.setdefault("proyectores", {})
+    clave = (tuple(forma), orden)
+    pr = cache.get(clave)
+    if pr is None:
+        pr = cache[clave] = ProyectorMomentos(forma, orden)
+    return pr
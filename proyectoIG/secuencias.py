@@ -0,0 +1,317 @@
+# secuencias.py
+# Uso:
+#   python secuencias.py carpeta_frames/ [--thresh 128] [--invert] [--workers 4]
+#   python secuencias.py video.y4m       [--thresh 128]
+#   cat video.y4m | python secuencias.py -
+#   cat crudo.rgb | python secuencias.py - --rgb-size 640 480
+#   Opcional: --colorizar  (guarda cada frame coloreado en azul como ej7)
+#
+# Qué hace:
+#   - Lee una secuencia de frames: carpeta con PNG/TIFF/JPG numerados, un archivo
+#     Y4M o un flujo RGB crudo (24 bits) por stdin.
+#   - Pipeline productor/consumidor: un hilo decodifica y llena una cola acotada;
+#     un pool de hilos calcula por frame (NumPy/PIL liberan el GIL) y los
+#     resultados se entregan EN ORDEN.
+#   - Por frame: histogramas R/G/B/Gris (ej6), áreas por canal (ej5),
+#     área y centroide de la figura binaria (como ej1a) y, opcional, colorizado (ej7).
+#   - Salidas temporales:
+#       1) trayectoria del centroide y áreas:  *_trayectoria.csv
+#       2) histogramas en el tiempo (T x 256): *_hist_tiempo.npz
+#       3) figura: trayectoria + histograma gris en el tiempo: *_temporal.png
+
+from PIL import Image
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import argparse, csv, queue, re, sys, threading, time
+
+from ej6_histograma_rgb_y_gris import hist256
+from ej7_aplicar_color import colorizar_azul
+from kernels_color import gris, buffer_hilo
+from proyector_momentos import proyector
+
+EXTENSIONES = (".png", ".tif", ".tiff", ".jpg", ".jpeg", ".bmp")
+SUFIJOS_SALIDA = ("_temporal.png",)       # imágenes que escribe este script (no son frames)
+
+# -------- lectores ----------
+def _clave_natural(p: Path):
+    # "frame10" después de "frame9"
+    return [int(t) if t.isdigit() else t.lower() for t in re.split(r"(\d+)", p.name)]
+
+def leer_carpeta(carpeta):
+    """
+    Genera (nombre, RGB HxWx3 uint8) para cada imagen de la carpeta, en orden numérico.
+    Un frame ilegible se entrega como (nombre, OSError) para no cortar la secuencia.
+    Se saltan las salidas de este script (SUFIJOS_SALIDA) si quedaron en la carpeta.
+    """
+    archivos = sorted((f for f in Path(carpeta).iterdir()
+                       if f.suffix.lower() in EXTENSIONES and not f.name.endswith(SUFIJOS_SALIDA)),
+                      key=_clave_natural)
+    for f in archivos:
+        try:
+            with Image.open(f) as im:
+                rgb = np.asarray(im.convert("RGB"))
+        except OSError as e:
+            yield f.name, e
+            continue
+        yield f.name, rgb
+
+def _leer_exacto(stream, n):
+    buf = stream.read(n)
+    if len(buf) < n:
+        return None
+    return buf
+
+def leer_y4m(stream):
+    """
+    Genera (nombre, RGB) desde un flujo YUV4MPEG2 (C420*, C422, C444, Cmono).
+    La conversión YCbCr->RGB la hace PIL (rango completo, como JPEG).
+    """
+    cab = stream.readline().decode("ascii", "replace").split()
+    if not cab or cab[0] != "YUV4MPEG2":
+        raise ValueError("Flujo Y4M inválido (falta cabecera YUV4MPEG2).")
+    params = {t[0]: t[1:] for t in cab[1:]}
+    w, h = int(params["W"]), int(params["H"])
+    cs = params.get("C", "420jpeg")
+    if re.search(r"p\d+$", cs):
+        # C420p10, C444p12, ...: muestras de 16 bits, no 8
+        raise ValueError(f"Espacio de color Y4M de más de 8 bits no soportado: C{cs}")
+    if cs.startswith("420"):
+        cw, ch = (w + 1) // 2, (h + 1) // 2
+    elif cs.startswith("422"):
+        cw, ch = (w + 1) // 2, h
+    elif cs.startswith("444"):
+        cw, ch = w, h
+    elif cs.startswith("mono"):
+        cw = ch = 0
+    else:
+        raise ValueError(f"Espacio de color Y4M no soportado: C{cs}")
+    n_y, n_c = w * h, cw * ch
+    i = 0
+    while True:
+        linea = stream.readline()
+        if not linea:
+            return
+        if not linea.startswith(b"FRAME"):
+            raise ValueError(f"Frame {i}: se esperaba 'FRAME'.")
+        buf = _leer_exacto(stream, n_y + 2 * n_c)
+        if buf is None:
+            return
+        Y = np.frombuffer(buf, np.uint8, n_y).reshape(h, w)
+        if n_c == 0:
+            rgb = np.repeat(Y[..., None], 3, axis=2)
+        else:
+            planos = [Y]
+            for k in range(2):
+                c = np.frombuffer(buf, np.uint8, n_c, n_y + k * n_c).reshape(ch, cw)
+                # sobremuestreo por repetición hasta el tamaño de luma
+                c = np.repeat(np.repeat(c, 1 if ch == h else 2, axis=0), 1 if cw == w else 2, axis=1)
+                planos.append(c[:h, :w])
+            rgb = np.asarray(Image.merge("YCbCr", [Image.fromarray(np.ascontiguousarray(pl)) for pl in planos])
+                             .convert("RGB"))
+        yield f"frame_{i:06d}", rgb
+        i += 1
+
+def leer_rgb_crudo(stream, w, h):
+    """Genera (nombre, RGB) desde un flujo de frames RGB24 contiguos de w x h."""
+    n = w * h * 3
+    i = 0
+    while True:
+        buf = _leer_exacto(stream, n)
+        if buf is None:
+            return
+        yield f"frame_{i:06d}", np.frombuffer(buf, np.uint8).reshape(h, w, 3)
+        i += 1
+
+def abrir_secuencia(entrada, rgb_size=None):
+    """Elige el lector según la entrada: carpeta, archivo .y4m o '-' (stdin)."""
+    if entrada == "-":
+        stream = sys.stdin.buffer
+        if rgb_size:
+            return leer_rgb_crudo(stream, *rgb_size)
+        return leer_y4m(stream)
+    p = Path(entrada)
+    if p.is_dir():
+        return leer_carpeta(p)
+    if p.suffix.lower() == ".y4m":
+        def _gen():
+            with open(p, "rb") as fh:
+                yield from leer_y4m(fh)
+        return _gen()
+    if rgb_size:
+        def _gen_crudo():
+            with open(p, "rb") as fh:
+                yield from leer_rgb_crudo(fh, *rgb_size)
+        return _gen_crudo()
+    raise ValueError(f"Entrada no reconocida: {entrada} (usa carpeta, .y4m o '-')")
+
+# -------- pipeline ----------
+_FIN = object()
+
+def pipeline(frames, funcion, workers=4, capacidad=8):
+    """
+    Productor/consumidor: un hilo decodificador llena una cola acotada
+    (capacidad frames) y 'workers' hilos aplican funcion(nombre, rgb).
+    Genera los resultados en el mismo orden de entrada.
+    """
+    cola = queue.Queue(maxsize=capacidad)
+    error = []
+
+    def productor():
+        try:
+            for item in frames:
+                cola.put(item)
+        except Exception as e:
+            error.append(e)
+        finally:
+            cola.put(_FIN)
+
+    hilo = threading.Thread(target=productor, name="decodificador", daemon=True)
+    hilo.start()
+    pendientes = deque()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        while True:
+            item = cola.get()
+            if item is _FIN:
+                break
+            pendientes.append(ex.submit(funcion, *item))
+            # no acumular más trabajo que el necesario para mantener ocupados los hilos
+            while len(pendientes) > 2 * workers:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+    hilo.join()
+    if error:
+        raise error[0]
+
+# -------- análisis por frame ----------
+def analizar_frame(nombre, rgb, thresh=128, invertir=False, dir_color=None,
+                   dark=(0, 20, 90), light=(140, 190, 255)):
+    """Histogramas (ej6), áreas por canal (ej5), área/centroide (ej1a) y colorizado (ej7)."""
+    GR = gris(rgb, out=buffer_hilo(rgb.shape[:2]))   # el gris no sale de esta función
+    hists = np.stack([hist256(rgb[..., 0]), hist256(rgb[..., 1]), hist256(rgb[..., 2]), hist256(GR)])
+
+    # áreas por canal (>= umbral) desde los histogramas, sin otra pasada
+    areas = hists[:3, thresh:].sum(axis=1)
+
+    B = (GR >= thresh).astype(np.uint8)
+    if invertir:
+        B = 1 - B
+    # potencias cacheadas por tamaño de frame: sin asignaciones por frame
+    c, m00 = proyector(B.shape, orden=1).centroide(B)
+    centroide = c if c is not None else (float("nan"), float("nan"))
+
+    if dir_color is not None:
+        colorizar_azul(Image.fromarray(GR), dark=dark, light=light).save(Path(dir_color) / f"{Path(nombre).stem}_color_azul.png")
+
+    return {"nombre": nombre, "hists": hists, "areas": areas,
+            "area_fig": int(m00), "centroide": centroide}
+
+# -------- salidas temporales ----------
+def guardar_trayectoria(path, resultados):
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        wr = csv.writer(fh)
+        wr.writerow(["frame", "nombre", "area_px", "xc", "yc", "area_R", "area_G", "area_B"])
+        for i, r in enumerate(resultados):
+            xc, yc = r["centroide"]
+            wr.writerow([i, r["nombre"], r["area_fig"], f"{xc:.6f}", f"{yc:.6f}", *map(int, r["areas"])])
+
+def guardar_figura_temporal(path, tray, hist_gris, titulo=""):
+    import matplotlib.pyplot as plt
+    fig, axs = plt.subplots(1, 2, figsize=(10, 3.5))
+    axs[0].plot(tray[:, 0], tray[:, 1], "-", color="green", lw=1)
+    axs[0].plot(tray[:1, 0], tray[:1, 1], "o", color="black", label="inicio")
+    axs[0].invert_yaxis()
+    axs[0].set_aspect("equal", adjustable="datalim")
+    axs[0].set_title("Trayectoria del centroide")
+    axs[0].legend()
+    axs[1].imshow(np.log1p(hist_gris.T), aspect="auto", origin="lower", cmap="magma")
+    axs[1].set_xlabel("Frame")
+    axs[1].set_ylabel("Intensidad (0–255)")
+    axs[1].set_title("Histograma gris en el tiempo (log)")
+    fig.suptitle(titulo, fontsize=9)
+    plt.tight_layout()
+    fig.savefig(path, dpi=150)
+    plt.close(fig)
+
+# -------- principal ----------
+def main():
+    ap = argparse.ArgumentParser(description="Análisis por frame de secuencias (carpetas, Y4M o RGB crudo).")
+    ap.add_argument("entrada", help="Carpeta de frames, archivo .y4m o '-' para stdin")
+    ap.add_argument("--rgb-size", nargs=2, type=int, metavar=("W", "H"),
+                    help="Entrada RGB24 cruda de W x H (en vez de Y4M)")
+    ap.add_argument("--thresh", type=int, default=128, help="Umbral 0..255 (def:128)")
+    ap.add_argument("--invert", action="store_true", help="Invierte la máscara (1=figura)")
+    ap.add_argument("--workers", type=int, default=4, help="Hilos de cómputo (def:4)")
+    ap.add_argument("--cola", type=int, default=8, help="Capacidad de la cola de frames (def:8)")
+    ap.add_argument("--colorizar", action="store_true", help="Guarda cada frame coloreado (ej7)")
+    ap.add_argument("--out", help="Prefijo de salida (def: junto a la entrada)")
+    args = ap.parse_args()
+    if not 0 <= args.thresh <= 255:
+        ap.error(f"--thresh fuera de 0..255: {args.thresh}")
+
+    if args.entrada != "-" and not Path(args.entrada).exists():
+        print(f"Archivo no encontrado: {args.entrada}")
+        sys.exit(1)
+
+    if args.out:
+        base = Path(args.out)
+    elif args.entrada == "-":
+        base = Path("stdin")
+    else:
+        pe = Path(args.entrada)
+        # salidas junto a la carpeta (no dentro: la próxima corrida las leería como frames)
+        base = pe.resolve() if pe.is_dir() else pe.with_suffix("")
+    dir_color = None
+    if args.colorizar:
+        dir_color = base.with_name(base.name + "_color_azul")
+        dir_color.mkdir(parents=True, exist_ok=True)
+
+    def tarea(nombre, rgb):
+        # errores de E/S por frame (lectura o guardado del colorizado): se omite ese frame
+        if isinstance(rgb, OSError):
+            return {"nombre": nombre, "error": str(rgb)}
+        try:
+            return analizar_frame(nombre, rgb, thresh=args.thresh, invertir=args.invert, dir_color=dir_color)
+        except OSError as e:
+            return {"nombre": nombre, "error": str(e)}
+
+    t0 = time.perf_counter()
+    try:
+        frames = abrir_secuencia(args.entrada, rgb_size=args.rgb_size)
+        resultados = list(pipeline(frames, tarea, workers=args.workers, capacidad=args.cola))
+    except (ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    dt = time.perf_counter() - t0
+    fallidos = [r for r in resultados if "error" in r]
+    resultados = [r for r in resultados if "error" not in r]
+    for r in fallidos:
+        print(f"Aviso: frame omitido {r['nombre']}: {r['error']}")
+    if not resultados:
+        print("La secuencia no tiene frames.")
+        sys.exit(1)
+
+    hists = np.stack([r["hists"] for r in resultados])           # T x 4 x 256
+    tray = np.array([r["centroide"] for r in resultados])        # T x 2
+
+    out_csv = base.with_name(base.name + "_trayectoria.csv")
+    out_npz = base.with_name(base.name + "_hist_tiempo.npz")
+    out_fig = base.with_name(base.name + "_temporal.png")
+    guardar_trayectoria(out_csv, resultados)
+    np.savez_compressed(out_npz, R=hists[:, 0], G=hists[:, 1], B=hists[:, 2], gris=hists[:, 3],
+                        nombres=np.array([r["nombre"] for r in resultados]))
+    guardar_figura_temporal(out_fig, tray, hists[:, 3], titulo=f"{args.entrada} | umbral={args.thresh}")
+
+    print(f"Frames: {len(resultados)}  |  Omitidos: {len(fallidos)}  |  Tiempo: {dt:.2f} s  |  {len(resultados) / dt:.1f} fps")
+    print("Guardados:")
+    print(f"  Trayectoria:       {out_csv}")
+    print(f"  Histogramas (npz): {out_npz}")
+    print(f"  Figura temporal:   {out_fig}")
+    if dir_color:
+        print(f"  Frames coloreados: {dir_color}")
+    print("Todo OK ✔️")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+# vista_previa.py
+# Vista previa a resolución reducida: decodificación "draft" de JPEG y pirámide
+# multinivel cacheada en disco.
+#
+# Qué hace:
+#   - Pirámide: cada nivel agrupa bloques de 2^k x 2^k píxeles y guarda tres mapas por
+#     canal: media (para mostrar), mínimo y máximo del bloque (para acotar errores).
+#     No se arma desde el nivel 0: el primer nivel guardado es el más reducido que aún
+#     tiene MIN_PX bloques (una sola pasada sobre la imagen completa) y los siguientes
+#     se reducen desde él.
+#   - Se cachea comprimida en .piramide/ junto a la imagen (clave: nombre, tamaño y
+#     mtime), así la siguiente vista previa no decodifica la imagen completa. Al
+#     guardar se borran las versiones viejas de la misma imagen y, si la carpeta pasa
+#     de MAX_CACHE_BYTES, las entradas usadas hace más tiempo.
+#   - nivel_reducido: un nivel sin decodificar la imagen completa cuando se puede:
+#     caché; si no, JPEG con Image.draft() (reducción 1/2, 1/4, 1/8 en el dominio DCT;
+#     solo media, sin cotas); si no, decodifica una vez y arma la pirámide reducida.
+#   - elegir_nivel: el nivel más chico que todavía cubre el tamaño en píxeles del
+#     panel de la figura (figsize * dpi / paneles); imshow no necesita más.
+#   - Modo aproximado con cotas rigurosas: con mín/máx por bloque,
+#       #px >= t  está entre  sum(n_bloque | min >= t)  y  sum(n_bloque | max >= t)
+#     (vale para áreas por umbral y para todo el histograma acumulado).
+#
+# Uso:
+#   python vista_previa.py foto.jpg [--lado 512] [--show]
+#   ej3/ej5: --preview (paneles desde el nivel adecuado); ej5/ej6: --aprox (números con cotas)
+
+import argparse, os, re, sys, time
+from pathlib import Path
+import numpy as np
+from PIL import Image
+
+LADO_MIN = 64                 # no se reduce por debajo de esto
+MIN_PX = 1 << 18              # bloques del nivel usado para estimaciones numéricas
+DIR_CACHE = ".piramide"
+MAX_CACHE_BYTES = 64 << 20    # por carpeta
+
+# -------- pirámide ----------
+def _reducir(a: np.ndarray, op):
+    """Reduce 2x2 (bordes impares replicados) con op = np.mean | np.min | np.max."""
+    h, w = a.shape[:2]
+    pads = [(0, h % 2), (0, w % 2)] + [(0, 0)] * (a.ndim - 2)
+    if h % 2 or w % 2:
+        a = np.pad(a, pads, mode="edge")
+    b = a.reshape(a.shape[0] // 2, 2, a.shape[1] // 2, 2, *a.shape[2:])
+    if op is np.mean:
+        s = b.sum(axis=(1, 3), dtype=np.uint32)
+        return ((s + 2) // 4).astype(np.uint8)
+    return op(b, axis=(1, 3))
+
+def _reducir_bloques(a: np.ndarray, paso: int):
+    """(media, mín, máx) de bloques paso x paso (bordes replicados), directo desde 'a'."""
+    if paso == 1:
+        return a, a, a
+    h, w = a.shape[:2]
+    ph, pw = -h % paso, -w % paso
+    if ph or pw:
+        a = np.pad(a, [(0, ph), (0, pw)] + [(0, 0)] * (a.ndim - 2), mode="edge")
+    b = a.reshape(a.shape[0] // paso, paso, a.shape[1] // paso, paso, *a.shape[2:])
+    n = paso * paso
+    media = ((b.sum(axis=(1, 3), dtype=np.uint32) + n // 2) // n).astype(np.uint8)
+    return media, b.min(axis=(1, 3)), b.max(axis=(1, 3))
+
+def _bloques(forma, paso):
+    return -(-forma[0] // paso), -(-forma[1] // paso)
+
+def paso_para_pixeles(forma, min_px=MIN_PX, lado_min=LADO_MIN) -> int:
+    """Paso (potencia de 2) más grande que deja al menos 'min_px' bloques."""
+    paso = 1
+    while True:
+        bh, bw = _bloques(forma, 2 * paso)
+        if min(bh, bw) < lado_min or bh * bw < min_px:
+            return paso
+        paso *= 2
+
+def construir_piramide(arr: np.ndarray, lado_min: int = LADO_MIN, min_px: int = 0):
+    """
+    Lista de niveles {"media", "min", "max", "paso", "forma"}: el nivel k agrupa bloques
+    de 2^k x 2^k píxeles. Los niveles más finos que paso_para_pixeles(min_px) quedan en
+    None (salvo el 0, que es 'arr'); con min_px=0 se arman todos.
+    """
+    forma = arr.shape[:2]
+    p0 = paso_para_pixeles(forma, min_px, lado_min) if min_px else 1
+    niveles = [{"media": arr, "min": arr, "max": arr, "paso": 1, "forma": forma}]
+    niveles += [{"media": None, "min": None, "max": None, "paso": 2 ** i, "forma": forma}
+                for i in range(1, p0.bit_length() - 1)]
+    if p0 > 1:
+        media, mn, mx = _reducir_bloques(arr, p0)
+        niveles.append({"media": media, "min": mn, "max": mx, "paso": p0, "forma": forma})
+    while min(niveles[-1]["media"].shape[:2]) // 2 >= lado_min:
+        n = niveles[-1]
+        niveles.append({"media": _reducir(n["media"], np.mean), "min": _reducir(n["min"], np.min),
+                        "max": _reducir(n["max"], np.max), "paso": n["paso"] * 2, "forma": forma})
+    return niveles
+
+# -------- caché en disco ----------
+def _ruta_cache(path: Path) -> Path:
+    st = path.stat()
+    return path.parent / DIR_CACHE / f"{path.name}.{st.st_size}_{st.st_mtime_ns}.npz"
+
+def _leer_cache(cache: Path, arr: np.ndarray = None):
+    with np.load(cache) as z:
+        forma = tuple(int(v) for v in z["forma"])
+        pasos = [int(v) for v in z["pasos"]]
+        niveles = [{"media": None, "min": None, "max": None, "paso": 2 ** i, "forma": forma}
+                   for i in range(max(pasos).bit_length())]
+        for paso in pasos:
+            n = niveles[paso.bit_length() - 1]
+            n["media"], n["min"], n["max"] = z[f"media{paso}"], z[f"min{paso}"], z[f"max{paso}"]
+    if arr is not None:
+        niveles[0].update(media=arr, min=arr, max=arr)
+    try:
+        os.utime(cache)       # marca de uso para la expulsión
+    except OSError:
+        pass
+    return niveles
+
+def _guardar_cache(cache: Path, niveles):
+    """Guarda los niveles reducidos (comprimido, escritura atómica) y poda la carpeta."""
+    p0 = paso_para_pixeles(niveles[0]["forma"])
+    guardados = [n for n in niveles if n["media"] is not None and n["paso"] >= p0]
+    datos = {"forma": np.array(niveles[0]["forma"], dtype=np.int64),
+             "pasos": np.array([n["paso"] for n in guardados], dtype=np.int64)}
+    for n in guardados:
+        datos.update({f"media{n['paso']}": n["media"], f"min{n['paso']}": n["min"],
+                      f"max{n['paso']}": n["max"]})
+    cache.parent.mkdir(exist_ok=True)
+    tmp = cache.with_name(f".{cache.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as fh:
+        np.savez_compressed(fh, **datos)
+    os.replace(tmp, cache)
+    podar_cache(cache.parent, conservar=cache)
+
+def podar_cache(carpeta: Path, max_bytes=MAX_CACHE_BYTES, conservar: Path = None) -> int:
+    """
+    Borra versiones viejas de la misma imagen que 'conservar' y luego las entradas
+    menos usadas hasta quedar bajo max_bytes. Devuelve cuántos archivos se borraron.
+    """
+    carpeta, borrados = Path(carpeta), 0
+    entradas = [f for f in carpeta.glob("*.npz") if f.is_file()]
+    if conservar is not None:
+        viejo = re.compile(re.escape(conservar.name.rsplit(".", 2)[0]) + r"\.\d+_\d+\.npz")
+        for f in entradas:
+            if f != conservar and viejo.fullmatch(f.name):
+                f.unlink(missing_ok=True)
+                borrados += 1
+        entradas = [f for f in entradas if f.exists()]
+    info = sorted(((f.stat().st_mtime, f.stat().st_size, f) for f in entradas), key=lambda t: t[0])
+    total = sum(t[1] for t in info)
+    for _, n, f in info:
+        if total <= max_bytes:
+            break
+        if f == conservar:
+            continue
+        f.unlink(missing_ok=True)
+        total, borrados = total - n, borrados + 1
+    return borrados
+
+def piramide_cacheada(path, arr: np.ndarray = None, guardar: bool = True, min_px: int = MIN_PX):
+    """
+    Pirámide RGB reducida de 'path' (ver construir_piramide), desde la caché si existe.
+    El nivel 0 es 'arr' si se entrega; si no, None. Solo sin caché y sin 'arr' se
+    decodifica la imagen completa (una vez, y se cachea).
+    """
+    path = Path(path)
+    try:
+        cache = _ruta_cache(path)
+    except OSError:           # p.ej. shm://nombre: no hay archivo al cual asociar la caché
+        cache, guardar = None, False
+    if cache is not None and cache.exists():
+        try:
+            return _leer_cache(cache, arr)
+        except (OSError, ValueError, KeyError):
+            pass              # caché dañada o de otro formato: se rearma
+    if arr is None:
+        arr = np.asarray(Image.open(path).convert("RGB"))
+        niveles = construir_piramide(arr, min_px=min_px)
+        if paso_para_pixeles(arr.shape[:2], min_px) > 1:
+            niveles[0].update(media=None, min=None, max=None)    # no retener la imagen completa
+    else:
+        niveles = construir_piramide(arr, min_px=min_px)
+    if guardar:
+        try:
+            _guardar_cache(cache, niveles)
+        except OSError:
+            pass              # carpeta de solo lectura: se usa sin caché
+    return niveles
+
+def nivel_reducido(path, objetivo=None, cotas=True, arr: np.ndarray = None):
+    """
+    Un nivel {"media", "min", "max", "paso", "forma"} sin decodificar la imagen completa
+    cuando se puede. Con 'objetivo' (alto, ancho) el nivel de una figura; si no, el de
+    las estimaciones (MIN_PX bloques). Con cotas=False un JPEG sin caché se lee con
+    draft() y el nivel trae solo la media (min/max = None, paso aproximado).
+    """
+    path = Path(path)
+    try:
+        hay_cache = _ruta_cache(path).exists()
+    except OSError:
+        hay_cache = False
+    if not hay_cache and not cotas and arr is None and objetivo is not None:
+        with Image.open(path) as img:
+            if img.format == "JPEG":
+                forma = (img.height, img.width)
+                img.draft("RGB", (objetivo[1], objetivo[0]))
+                media = np.asarray(img.convert("RGB"))
+                paso = max(1, round(forma[1] / media.shape[1]))
+                return {"media": media, "min": None, "max": None, "paso": paso, "forma": forma}
+    niveles = piramide_cacheada(path, arr)
+    i = elegir_nivel(niveles, objetivo) if objetivo is not None else elegir_nivel_por_pixeles(niveles)
+    return niveles[i]
+
+# -------- elección de nivel ----------
+def lado_panel(figsize, dpi=150, paneles=1):
+    """(alto, ancho) en píxeles de un panel de una fila de 'paneles' subplots."""
+    return int(figsize[1] * dpi), int(figsize[0] * dpi / paneles)
+
+def elegir_nivel(niveles, objetivo):
+    """Índice del nivel más reducido que aún cubre 'objetivo' (alto, ancho) en algún eje."""
+    oh, ow = objetivo
+    mejor = next(i for i, n in enumerate(niveles) if n["media"] is not None)
+    for i, n in enumerate(niveles):
+        if n["media"] is None:
+            continue
+        h, w = n["media"].shape[:2]
+        if h >= oh or w >= ow:
+            mejor = i
+    return mejor
+
+def elegir_nivel_por_pixeles(niveles, min_px=MIN_PX):
+    """Nivel más reducido con al menos 'min_px' bloques (para estimaciones numéricas)."""
+    mejor = 0
+    for i, n in enumerate(niveles):
+        if n["media"] is not None and n["media"].shape[0] * n["media"].shape[1] >= min_px:
+            mejor = i
+    return mejor
+
+def nivel_para_figura(niveles, figsize, dpi=150, paneles=1) -> np.ndarray:
+    return niveles[elegir_nivel(niveles, lado_panel(figsize, dpi, paneles))]["media"]
+
+# -------- estimaciones con cotas ----------
+def pixeles_por_bloque(forma, paso, forma_nivel) -> np.ndarray:
+    """Cantidad real de píxeles que cubre cada bloque (los del borde pueden ser menos)."""
+    h, w = forma
+    bh, bw = forma_nivel
+    ry = np.clip(h - np.arange(bh) * paso, 0, paso)
+    rx = np.clip(w - np.arange(bw) * paso, 0, paso)
+    return np.outer(ry, rx)
+
+def histograma_con_cotas(nivel, canal, forma):
+    """
+    (hist_est, cdf_inf, cdf_sup) de un canal usando el nivel: hist_est pondera la media
+    de cada bloque por sus píxeles; cdf_*[v] acotan el número REAL de px >= v.
+    """
+    sel = (lambda a: a) if canal is None else (lambda a: a[..., canal])
+    med, mn, mx = sel(nivel["media"]), sel(nivel["min"]), sel(nivel["max"])
+    n = pixeles_por_bloque(forma, nivel["paso"], med.shape[:2]).ravel()
+    est = np.bincount(med.ravel(), weights=n, minlength=256)
+    sobre = lambda a: np.cumsum(np.bincount(a.ravel(), weights=n, minlength=256)[::-1])[::-1]
+    return est, sobre(mn), sobre(mx)
+
+def area_con_cotas(nivel, canal, forma, thresh):
+    """(estimación, cota_inf, cota_sup) del número de px >= thresh en el canal."""
+    est, lo, hi = histograma_con_cotas(nivel, canal, forma)
+    return int(round(est[thresh:].sum())), int(lo[thresh]), int(hi[thresh])
+
+# -------- vista previa rápida ----------
+def abrir_preview(path, objetivo=(512, 512)):
+    """
+    Imagen RGB (ndarray) del tamaño aproximado 'objetivo' (alto, ancho) y cómo se obtuvo:
+    "piramide" (caché), "draft" (JPEG reducido al decodificar) o "reducida".
+    """
+    path = Path(path)
+    if _ruta_cache(path).exists():
+        niveles = piramide_cacheada(path)
+        return niveles[elegir_nivel(niveles, objetivo)]["media"], "piramide"
+    img = Image.open(path)
+    if img.format == "JPEG":
+        img.draft("RGB", (objetivo[1], objetivo[0]))
+        return np.asarray(img.convert("RGB")), "draft"
+    img = img.convert("RGB")
+    f = max(1, min(img.width // max(1, objetivo[1]), img.height // max(1, objetivo[0])))
+    return np.asarray(img.reduce(f) if f > 1 else img), "reducida"
+
+def main():
+    ap = argparse.ArgumentParser(description="Vista previa reducida (draft JPEG o pirámide cacheada).")
+    ap.add_argument("imagen", help="Ruta de la imagen")
+    ap.add_argument("--lado", type=int, default=512, help="Lado objetivo en px (def:512)")
+    ap.add_argument("--piramide", action="store_true", help="Construye y cachea la pirámide reducida")
+    ap.add_argument("--show", action="store_true", help="Muestra la vista previa")
+    args = ap.parse_args()
+
+    p = Path(args.imagen)
+    if not p.exists():
+        print(f"Archivo no encontrado: {p}")
+        sys.exit(1)
+    t0 = time.perf_counter()
+    try:
+        if args.piramide:
+            niveles = piramide_cacheada(p)
+            print("Niveles:", ", ".join(f"{n['media'].shape[1]}x{n['media'].shape[0]}"
+                                        for n in niveles if n["media"] is not None))
+            prev, como = niveles[elegir_nivel(niveles, (args.lado, args.lado))]["media"], "piramide"
+        else:
+            prev, como = abrir_preview(p, (args.lado, args.lado))
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    dt = time.perf_counter() - t0
+    out = p.with_name(p.stem + "_preview.png")
+    Image.fromarray(prev).save(out)
+    print(f"Vista previa {prev.shape[1]}x{prev.shape[0]} ({como}) en {dt * 1000:.1f} ms -> {out}")
+    if args.show:
+        Image.fromarray(prev).show()
+
+if __name__ == "__main__":
+    main()